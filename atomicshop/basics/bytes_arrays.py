@@ -1,5 +1,9 @@
-from typing import Union
+from typing import Union, Iterator, Iterable
 import string
+import os
+import re
+import mmap
+from concurrent.futures import ProcessPoolExecutor
 
 
 def get_single_byte_from_byte_string(byte_string, index: int):
@@ -91,9 +95,14 @@ def find_position(target: bytes, file_path: str = None, file_bytes: bytes = None
     :param chunk_size: integer, chunk size  in bytes.
     :param starting_position: integer, starting position in bytes. You can specify the starting seeking point
         in the file.
+        If 'file_path' is specified without 'chunk_size', the file is memory mapped and searched without reading
+        it in chunks. Check 'find_all_positions' to find all the positions of one or many targets.
     :return:
     """
 
+    if file_path and not chunk_size and file_bytes is None:
+        return next(find_all_positions(target, file_path=file_path, starting_position=starting_position), (-1,))[0]
+
     def read_chunk(position):
         if file_path:
             return file.read(chunk_size)
@@ -153,6 +162,161 @@ def find_position(target: bytes, file_path: str = None, file_bytes: bytes = None
     return -1
 
 
+SEARCH_SEGMENT_SIZE: int = 256 * 1024 * 1024
+
+
+class _MultiTargetSearcher:
+    """
+    Searches a buffer (bytes, bytearray, mmap, memoryview) for all the start positions of one or many targets
+    in one pass.
+    One target is searched with 'find' of the buffer. Many targets, or a buffer without 'find' (memoryview), are
+    searched with one regex with a lookahead, so overlapping matches and targets that start at the same position
+    are all found.
+    """
+
+    def __init__(self, targets: tuple[bytes, ...]):
+        # Longest targets first, so the regex alternative that matches is the longest at the position.
+        self.targets: tuple[bytes, ...] = tuple(sorted(set(targets), key=len, reverse=True))
+        self.max_target_length: int = len(self.targets[0])
+
+        self.regex = re.compile(b'(?=(' + b'|'.join(re.escape(target) for target in self.targets) + b'))')
+
+    def search(self, buffer, start: int, end: int) -> Iterator[tuple[int, bytes]]:
+        """
+        Yield (position, target) for all the targets that start in [start, end) and fully fit in the buffer.
+        """
+
+        if len(self.targets) == 1 and hasattr(buffer, 'find'):
+            target: bytes = self.targets[0]
+            # 'find' of 'mmap' and 'bytes' is done in C, 'end' of 'find' is the end of the whole match,
+            # so extend it by the target length.
+            search_end: int = min(end + len(target) - 1, len(buffer))
+            position: int = buffer.find(target, start, search_end)
+            while position != -1:
+                yield position, target
+                position = buffer.find(target, position + 1, search_end)
+            return
+
+        search_end: int = min(end + self.max_target_length - 1, len(buffer))
+        for match in self.regex.finditer(buffer, start, search_end):
+            position: int = match.start()
+            if position >= end:
+                break
+
+            # Check the rest of the targets at this position, only here. Mostly it is only one.
+            for target in self.targets:
+                if buffer[position:position + len(target)] == target:
+                    yield position, target
+
+
+def _search_file_segment_worker(
+        file_path: str,
+        targets: tuple[bytes, ...],
+        start: int,
+        end: int
+) -> list[tuple[int, bytes]]:
+    with open(file_path, 'rb') as file_object:
+        with mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ) as mmap_object:
+            return list(_MultiTargetSearcher(targets).search(mmap_object, start, end))
+
+
+def find_all_positions(
+        targets: Union[bytes, Iterable[bytes]],
+        file_path: str = None,
+        file_bytes: Union[bytes, bytearray, memoryview] = None,
+        starting_position: int = 0,
+        ending_position: int = None,
+        processes: int = 1,
+        segment_size: int = SEARCH_SEGMENT_SIZE
+) -> Iterator[tuple[int, bytes]]:
+    """
+    Find all the positions of one or many target bytes strings in the file, in one pass.
+    The file is memory mapped, so it is not read to memory in chunks by python, the OS pages it in.
+    The positions are yielded lazily, sorted by position. Overlapping matches are returned too.
+
+    Example:
+        for position, target in find_all_positions([b'\x1f\x8b\x08', b'hsqs'], file_path='firmware.bin'):
+            print(position, target)
+
+    :param targets: bytes or iterable of bytes, the target bytes strings to find.
+    :param file_path: string, path to file.
+    :param file_bytes: bytes, bytearray or memoryview of the file. Used instead of 'file_path'.
+    :param starting_position: integer, position in bytes to start the search from.
+    :param ending_position: integer, position in bytes to end the search at (matches that start before it).
+        None - the end of the file.
+    :param processes: integer, number of worker processes. If more than 1 and 'file_path' is specified, the file is
+        split to segments of 'segment_size' that are searched in parallel. Each process maps the file by itself,
+        only the found positions are returned to the parent.
+    :param segment_size: integer, size in bytes of each segment for the 'processes' search.
+    :return: iterator of tuples (position: int, target: bytes).
+    """
+
+    # The arguments are checked here and not in the generator, so the errors are raised on the call and not on
+    # the first iteration.
+    if isinstance(targets, (bytes, bytearray)):
+        targets = (bytes(targets),)
+    else:
+        targets = tuple(bytes(target) for target in targets)
+
+    if not targets or any(not target for target in targets):
+        raise ValueError("[targets] must contain at least one target, and targets can't be empty.")
+
+    if file_bytes is None and not file_path:
+        raise ValueError("Either file_path or file_bytes must be provided.")
+
+    if file_bytes is not None:
+        if isinstance(file_bytes, memoryview) and file_bytes.format != 'B':
+            # Positions are in bytes, not in items of the view.
+            file_bytes = file_bytes.cast('B')
+        if ending_position is None:
+            ending_position = len(file_bytes)
+        return _MultiTargetSearcher(targets).search(file_bytes, starting_position, ending_position)
+
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"File doesn't exist: {file_path}")
+
+    return _find_all_positions_in_file(
+        targets, file_path, starting_position, ending_position, processes, segment_size)
+
+
+def _find_all_positions_in_file(
+        targets: tuple[bytes, ...],
+        file_path: str,
+        starting_position: int,
+        ending_position: Union[int, None],
+        processes: int,
+        segment_size: int
+) -> Iterator[tuple[int, bytes]]:
+    file_size: int = os.path.getsize(file_path)
+    if ending_position is None or ending_position > file_size:
+        ending_position = file_size
+
+    # Empty file can't be memory mapped.
+    if starting_position >= ending_position:
+        return
+
+    if processes > 1 and ending_position - starting_position > segment_size:
+        segments: list = [
+            (segment_start, min(segment_start + segment_size, ending_position))
+            for segment_start in range(starting_position, ending_position, segment_size)]
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            # 'map' returns the results by the order of the segments, so the positions stay sorted.
+            segments_results = executor.map(
+                _search_file_segment_worker,
+                [file_path] * len(segments),
+                [targets] * len(segments),
+                [segment[0] for segment in segments],
+                [segment[1] for segment in segments])
+            for segment_results in segments_results:
+                yield from segment_results
+        return
+
+    with open(file_path, 'rb') as file_object:
+        with mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ) as mmap_object:
+            yield from _MultiTargetSearcher(targets).search(mmap_object, starting_position, ending_position)
+
+
 def read_bytes_from_position(
         starting_position: int,
         num_bytes: int,
@@ -125,12 +125,13 @@ def is_value_exist_in_key(
     :return: bool, True if the value exists in the key in any entry in the list of dicts, False if not.
     """
 
+    pattern_set: strings.PatternSet = strings.compile_patterns(
+        [value_to_match], case_insensitive=value_case_insensitive, prefix_suffix=prefix_suffix)
+
     for dictionary in list_of_dicts:
         try:
             # if value_to_find in dictionary.get(key, None):
-            if strings.match_pattern_against_string(
-                    value_to_match, dictionary.get(key, None), case_insensitive=value_case_insensitive,
-                    prefix_suffix=prefix_suffix):
+            if pattern_set.match(dictionary.get(key, None)):
                 return True
         # If the key is not present in the dict 'TypeError' will be raised, since 'None' doesn't have the 'in' operator.
         except TypeError:
@@ -1,11 +1,14 @@
 import multiprocessing
 import multiprocessing.managers
 import os
+import queue
+import struct
 import threading
 import concurrent.futures
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from collections import deque
-from typing import Callable
+from multiprocessing import shared_memory
+from typing import Callable, Any
 import time
 
 from ..import system_resources
@@ -77,6 +80,17 @@ def is_process_crashed(
     return None, None  # all processes are still alive
 
 
+def _process_items_chunk(process_function: Callable, items: list) -> list:
+    # Runs in the pool worker, executes the function on each item of the chunk and returns all the new items
+    # in one IPC round-trip.
+    new_items: list = []
+    for item in items:
+        result = process_function(item)
+        if result:
+            new_items.extend(result)
+    return new_items
+
+
 class MultiProcessorRecursive:
     def __init__(
             self,
@@ -86,7 +100,10 @@ class MultiProcessorRecursive:
             cpu_percent_max: int = 80,
             memory_percent_max: int = 80,
             wait_time: float = 5,
-            system_monitor_manager_dict: multiprocessing.managers.DictProxy = None
+            system_monitor_manager_dict: multiprocessing.managers.DictProxy = None,
+            chunk_size: int = 1,
+            max_in_flight: int = None,
+            resource_sample_interval: float = 0.5
     ):
         """
         MultiProcessor class. Used to execute functions in parallel. The result of each execution is fed back
@@ -99,13 +116,23 @@ class MultiProcessorRecursive:
             execution.
         :param memory_percent_max: integer, maximum memory percentage. Above that usage, we will wait, before starting
             new execution.
-        :param wait_time: float, time to wait if the CPU or memory usage is above the maximum percentage.
+        :param wait_time: float, time to wait before sampling the resources again, if the CPU or memory usage is
+            above the maximum percentage. While it isn't, the resources are sampled each 'resource_sample_interval'
+            seconds.
         :param system_monitor_manager_dict: multiprocessing.managers.DictProxy, shared manager dict for
             system monitoring. The object is the output of atomicshop.system_resource_monitor.
             If you are already running this monitor, you can pass the manager_dict to both the system monitor and this
             class to share the system resources data.
-            If this is used, the system resources will be checked before starting each new execution from this
-            shared dict instead of performing new checks.
+            If this is used, the system resources will be read from this shared dict instead of performing new checks.
+        :param chunk_size: integer, number of items that are sent to a worker in one task (one IPC round-trip).
+            Use more than 1 for many small items. The new items that the function returns for the whole chunk
+            are sent back together.
+        :param max_in_flight: integer, maximum number of tasks (chunks) that were submitted to the pool and
+            not finished yet. Default is None, which is twice the number of workers, so the workers don't wait
+            for the next task.
+        :param resource_sample_interval: float, seconds between the samples of the CPU and memory usage.
+            The resources aren't checked before each task, the samples resize a budget of tasks in flight.
+            Check 'system_resources.ResourceAdmissionController'.
 
         Usage Examples:
             def unpack_file(file_path):
@@ -187,10 +214,19 @@ class MultiProcessorRecursive:
         self.memory_percent_max: int = memory_percent_max
         self.wait_time: float = wait_time
         self.system_monitor_manager_dict: multiprocessing.managers.DictProxy = system_monitor_manager_dict
+        self.chunk_size: int = chunk_size
+        self.resource_sample_interval: float = resource_sample_interval
+
+        if self.chunk_size < 1:
+            raise ValueError('chunk_size must be at least 1.')
 
         # Create the pool once and reuse it
         self.pool: multiprocessing.Pool = multiprocessing.Pool(processes=self.max_workers)
 
+        if max_in_flight is None:
+            max_in_flight = (self.max_workers or os.cpu_count() or 1) * 2
+        self.max_in_flight: int = max_in_flight
+
         # Keep track of outstanding async results across calls
         self.async_results: list = []
 
@@ -199,57 +235,81 @@ class MultiProcessorRecursive:
         Start with the items currently in self.input_list, but whenever a task
         finishes schedule the children it returns *right away*.
         The loop ends when there are no more outstanding tasks.
+
+        The submission is done only from the current thread. The pool callbacks (that run in the result thread
+        of the pool) only queue the new items and return the tokens to the admission controller, so the result
+        thread is never blocked by waiting for resources.
         """
         # ----------  internal helpers  ----------
-        outstanding = 0  # tasks that have been submitted but not yet finished
-        done_event = threading.Event()  # let the main thread wait until work is over
+        pending_items: deque = deque(self.input_list)
+        # Clear the input list; after this point everything is driven by the pending queue.
+        self.input_list.clear()
 
-        def _submit(item):
-            nonlocal outstanding
-            # Wait for resources *before* submitting a new job
-            system_resources.wait_for_resource_availability(
-                cpu_percent_max=self.cpu_percent_max,
-                memory_percent_max=self.memory_percent_max,
-                wait_time=self.wait_time,
-                system_monitor_manager_dict=self.system_monitor_manager_dict
-            )
-            outstanding += 1
-            self.pool.apply_async(
-                self.process_function,
-                (item,),
-                callback=_on_finish,  # called in the main process when result is ready
-                error_callback=_on_error
-            )
+        outstanding = 0  # chunks that have been submitted but not yet finished
+        errors: list = []
+        condition = threading.Condition()
+
+        controller = system_resources.ResourceAdmissionController(
+            max_in_flight=self.max_in_flight,
+            cpu_percent_max=self.cpu_percent_max,
+            memory_percent_max=self.memory_percent_max,
+            sample_interval=self.resource_sample_interval,
+            system_monitor_manager_dict=self.system_monitor_manager_dict,
+            overuse_wait_time=self.wait_time
+        )
 
         def _on_finish(result):
-            """Pool calls this in the parent process thread when a job completes."""
+            """Pool calls this in the parent process thread when a chunk completes."""
             nonlocal outstanding
-            outstanding -= 1
-
-            # The worker returned a list of new items – submit them immediately
-            if result:
-                for child in result:
-                    _submit(child)
-
-            # If no work left, release the waiter
-            if outstanding == 0:
-                done_event.set()
+            controller.release()
+            with condition:
+                outstanding -= 1
+                # The worker returned a list of new items – queue them for submission.
+                if result:
+                    pending_items.extend(result)
+                condition.notify()
 
         def _on_error(exc):
-            """Propagate the first exception and stop everything cleanly."""
-            done_event.set()
-            raise exc  # let your code deal with it – you can customise this
-
-        # ----------  kick‑off  ----------
-        # Schedule the items we already have
-        for item in self.input_list:
-            _submit(item)
-
-        # Clear the input list; after this point everything is driven by callbacks
-        self.input_list.clear()
-
-        # Wait until all recursively spawned work is finished
-        done_event.wait()
+            """Keep the first exception, it is raised in the submitting thread."""
+            nonlocal outstanding
+            controller.release()
+            with condition:
+                outstanding -= 1
+                errors.append(exc)
+                condition.notify()
+
+        # ----------  submission loop  ----------
+        controller.start()
+        try:
+            while True:
+                with condition:
+                    condition.wait_for(lambda: pending_items or outstanding == 0 or errors)
+                    if errors:
+                        raise errors[0]
+                    if not pending_items:
+                        # Nothing is pending and nothing is outstanding, all the recursive work is finished.
+                        break
+
+                    chunk: list = []
+                    while pending_items and len(chunk) < self.chunk_size:
+                        chunk.append(pending_items.popleft())
+
+                # Wait for a token outside the condition, so the callbacks can queue and release meanwhile.
+                controller.acquire()
+                with condition:
+                    outstanding += 1
+                self.pool.apply_async(
+                    _process_items_chunk,
+                    (self.process_function, chunk),
+                    callback=_on_finish,  # called in the main process when result is ready
+                    error_callback=_on_error
+                )
+        finally:
+            if errors:
+                # Let the submitted tasks finish before leaving.
+                with condition:
+                    condition.wait_for(lambda: outstanding == 0)
+            controller.stop()
 
     def shutdown(self):
         """Shuts down the pool gracefully."""
@@ -515,6 +575,219 @@ class ConcurrentProcessorRecursive:
                         futures[new_future] = new_item
 
 
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to existing shared memory block by name, without taking the ownership of the block.
+
+    :param name: string, name of the shared memory block.
+    :return: shared_memory.SharedMemory.
+    """
+
+    try:
+        # Python 3.13+, the attaching process shouldn't remove the block at its exit.
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before 3.13 the block is registered in the resource tracker on attach. Processes that were started
+        # by the creator share its tracker, so it is the same registration that is removed on 'unlink'.
+        return shared_memory.SharedMemory(name=name)
+
+
+_PAYLOAD_RING_MAGIC: bytes = b'ASPQ'
+# magic, capacity, read counter (written only by the consumer).
+_PAYLOAD_RING_HEADER_STRUCT = struct.Struct('<4sxxxxQQ')
+_PAYLOAD_RING_READ_COUNTER_OFFSET: int = _PAYLOAD_RING_HEADER_STRUCT.size - 8
+# The key of the payload descriptor in the queued items: (ring name, write position counter, length, end counter).
+_PAYLOAD_DESCRIPTOR_KEY: str = '__shared_memory_payload__'
+
+
+class SharedMemoryPayloadQueue:
+    """
+    Wrapper of 'multiprocessing.Queue' for dict items with large bytes payloads.
+    The payload of each item is copied to a shared memory ring buffer, and only a small descriptor with its position
+    goes through the queue pipe, instead of pickling the payload, writing it through the pipe and unpickling it in the
+    consumer.
+
+    Each producer process creates its own ring on the first 'put', so there is one writer for each ring, and all the
+    threads of the process put under the same lock. The consumer reads the items of each producer in their order, so it
+    frees the space of each ring in the same order it was allocated, the ring needs only the read counter that the
+    consumer updates. Payloads that don't fit in the free space of the ring are sent inline through the queue, so the
+    producer never waits for the consumer.
+
+    There should be only one consumer process. The object is passed to the processes as an argument, same as the queue.
+
+    Usage:
+        # Parent process.
+        payload_queue = SharedMemoryPayloadQueue(payload_key='raw_bytes')
+        multiprocessing.Process(target=consumer, args=(payload_queue,)).start()
+
+        # Any producer process / thread.
+        payload_queue.put({'raw_bytes': big_bytes, 'thread_id': 1})
+
+        # Consumer process.
+        item: dict = payload_queue.get()
+        ...
+        payload_queue.close()
+    """
+
+    def __init__(
+            self,
+            multiprocessing_queue: multiprocessing.Queue = None,
+            payload_key: str = 'raw_bytes',
+            ring_size: int = 64 * 1024 * 1024,
+            min_shared_payload_size: int = 16 * 1024
+    ):
+        """
+        :param multiprocessing_queue: multiprocessing.Queue, the queue of the descriptors. None creates a new queue.
+        :param payload_key: string, the key of the bytes payload in the dict items.
+        :param ring_size: integer, size in bytes of the ring of each producer process.
+        :param min_shared_payload_size: integer, smaller payloads are sent inline through the queue, since
+            pickling them is cheaper than the ring bookkeeping.
+        """
+
+        if multiprocessing_queue is None:
+            multiprocessing_queue = multiprocessing.Queue()
+
+        if os.name == 'posix':
+            # The rings are created in the producer processes. Starting the resource tracker before the processes,
+            # makes them share it, so the rings are removed once at the end of this process and not when each
+            # producer exits, and 'unlink' of the consumer removes their registration.
+            from multiprocessing import resource_tracker
+            resource_tracker.ensure_running()
+
+        self.queue: multiprocessing.Queue = multiprocessing_queue
+        self.payload_key: str = payload_key
+        self.ring_size: int = ring_size
+        self.min_shared_payload_size: int = min_shared_payload_size
+
+        self._init_process_state()
+
+    def _init_process_state(self):
+        # Producer side, the ring of this process.
+        self._ring_pid: int | None = None
+        self._ring: shared_memory.SharedMemory | None = None
+        self._write_counter: int = 0
+        self._put_lock = threading.Lock()
+        # Consumer side, the rings of the producers and their capacities by name.
+        self._attached_rings: dict[str, tuple[shared_memory.SharedMemory, int]] = dict()
+
+    def __getstate__(self):
+        return {
+            'queue': self.queue, 'payload_key': self.payload_key, 'ring_size': self.ring_size,
+            'min_shared_payload_size': self.min_shared_payload_size}
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._init_process_state()
+
+    def put(self, item: Any):
+        """
+        Put an item to the queue. Only dict items with bytes payload under 'payload_key' use the shared memory,
+        anything else (as the 'None' stop signal) is put to the queue as is.
+
+        :param item: the item.
+        """
+
+        payload = item.get(self.payload_key) if isinstance(item, dict) else None
+        if not payload or len(payload) < self.min_shared_payload_size or len(payload) > self.ring_size:
+            self.queue.put(item)
+            return
+
+        with self._put_lock:
+            descriptor = self._write_payload(payload)
+            if descriptor is not None:
+                item = dict(item)
+                item[self.payload_key] = None
+                item[_PAYLOAD_DESCRIPTOR_KEY] = descriptor
+            # Put under the lock, so the items of this process are in the queue by the order of the ring.
+            self.queue.put(item)
+
+    def get(self, block: bool = True, timeout: float = None) -> Any:
+        """
+        Get an item from the queue, with the payload restored as bytes.
+        Raises 'queue.Empty' same as 'multiprocessing.Queue.get'.
+
+        :param block: boolean, wait for an item.
+        :param timeout: float, seconds to wait. None to wait forever.
+        :return: the item.
+        """
+
+        item = self.queue.get(block, timeout)
+        if isinstance(item, dict) and _PAYLOAD_DESCRIPTOR_KEY in item:
+            ring_name, write_counter, payload_length, end_counter = item.pop(_PAYLOAD_DESCRIPTOR_KEY)
+
+            attached_ring = self._attached_rings.get(ring_name)
+            if attached_ring is None:
+                attached_ring = self._attach_ring(ring_name)
+                self._attached_rings[ring_name] = attached_ring
+            ring, capacity = attached_ring
+
+            start: int = _PAYLOAD_RING_HEADER_STRUCT.size + write_counter % capacity
+            item[self.payload_key] = bytes(ring.buf[start:start + payload_length])
+            # Free the space for the producer.
+            struct.pack_into('<Q', ring.buf, _PAYLOAD_RING_READ_COUNTER_OFFSET, end_counter)
+
+        return item
+
+    @staticmethod
+    def _attach_ring(ring_name: str) -> tuple[shared_memory.SharedMemory, int]:
+        ring = attach_shared_memory(ring_name)
+        # The size of the attached block is rounded up to the page size on Windows and macOS, so the capacity is
+        # taken from the header that the producer wrote and not from the size of the block.
+        magic, capacity, _ = _PAYLOAD_RING_HEADER_STRUCT.unpack_from(ring.buf, 0)
+        if magic != _PAYLOAD_RING_MAGIC:
+            ring.close()
+            raise ValueError(f"Shared memory [{ring_name}] is not a payload ring.")
+        return ring, capacity
+
+    def close(self):
+        """
+        Close the shared memory of this process.
+        The consumer also removes the rings of the producers. It must be called only after all the producer
+        processes stopped, since a producer that is still running keeps writing to its removed ring, and its
+        payloads are lost.
+        """
+
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+        for ring, _ in self._attached_rings.values():
+            ring.close()
+            try:
+                ring.unlink()
+            except FileNotFoundError:
+                pass
+        self._attached_rings.clear()
+
+    def _write_payload(self, payload) -> tuple | None:
+        if self._ring_pid != os.getpid():
+            # New process (or fork of a producer), each process writes only to its own ring.
+            self._ring = shared_memory.SharedMemory(
+                create=True, size=_PAYLOAD_RING_HEADER_STRUCT.size + self.ring_size)
+            _PAYLOAD_RING_HEADER_STRUCT.pack_into(self._ring.buf, 0, _PAYLOAD_RING_MAGIC, self.ring_size, 0)
+            self._ring_pid = os.getpid()
+            self._write_counter = 0
+
+        payload_length: int = len(payload)
+        position: int = self._write_counter % self.ring_size
+        write_counter: int = self._write_counter
+        # The payload is contiguous, if it doesn't fit until the end of the ring, it starts from the beginning.
+        if position + payload_length > self.ring_size:
+            write_counter += self.ring_size - position
+            position = 0
+        end_counter: int = write_counter + payload_length
+
+        read_counter: int = struct.unpack_from('<Q', self._ring.buf, _PAYLOAD_RING_READ_COUNTER_OFFSET)[0]
+        if end_counter - read_counter > self.ring_size:
+            return None
+
+        start: int = _PAYLOAD_RING_HEADER_STRUCT.size + position
+        self._ring.buf[start:start + payload_length] = payload
+        self._write_counter = end_counter
+
+        return self._ring.name, write_counter, payload_length, end_counter
+
+
 class _MultiProcessorTest:
     def __init__(self, worker_count: int = 8, initialize_at_start: bool = True):
         """
@@ -1,12 +1,19 @@
 import fnmatch
+import functools
+import os
 import re
+import shutil
 from pathlib import Path
 import argparse
+from typing import Union, Iterable
 
 from . import lists
 from .. import print_api
 
 
+REPLACE_IN_FILE_CHUNK_SIZE: int = 1024 * 1024
+
+
 def get_nth_character_from_start(input_string: str, nth: int):
     """
     Example:
@@ -259,9 +266,13 @@ def match_pattern_against_string(
 
     :return: boolean.
     """
-    # Determine the regex flags based on case_insensitive.
-    flags = re.IGNORECASE if case_insensitive else 0
 
+    # The compiled regex is cached, so calling this in a loop with the same pattern doesn't rebuild it.
+    return compile_patterns((pattern,), case_insensitive=case_insensitive, prefix_suffix=prefix_suffix).match(
+        check_string)
+
+
+def _convert_wildcard_pattern_to_regex(pattern: str, prefix_suffix: bool = False) -> str:
     # Escape the pattern for regex, then replace '*' with '.*' to match any characters.
     escaped_pattern = re.escape(pattern).replace(r'\*', '.*')
 
@@ -274,11 +285,121 @@ def match_pattern_against_string(
     else:
         escaped_pattern = '^' + escaped_pattern + '$'
 
-    # Compile the regex pattern with the appropriate flags.
-    regex_pattern = re.compile(escaped_pattern, flags)
+    return escaped_pattern
+
+
+class PatternSet:
+    """
+    List of wildcard patterns compiled into one combined regex, each pattern is a capturing group alternative.
+    The semantics are the same as 'match_pattern_against_string' for each pattern, but matching a string against
+    all the patterns is one regex search instead of one regex build and search per pattern.
+
+    Use 'compile_patterns' to get a cached instance.
+
+    Example:
+        pattern_set = compile_patterns(['*python*example.py', '*ffmpeg*'], case_insensitive=True, prefix_suffix=True)
+        for cmdline in cmdlines:
+            if pattern_set.match(cmdline):
+                print(cmdline, pattern_set.get_matched_pattern(cmdline))
+    """
+
+    def __init__(
+            self,
+            patterns: Iterable[str],
+            case_insensitive: bool = False,
+            prefix_suffix: bool = False
+    ):
+        """
+        :param patterns: iterable of string patterns. May include wildcards as '*'.
+        :param case_insensitive: boolean, if 'True' will treat the patterns and checked strings as case-insensitive.
+        :param prefix_suffix: boolean, check the description in 'match_pattern_against_string' function.
+        """
+
+        self.patterns: tuple = tuple(patterns)
+        self.case_insensitive: bool = case_insensitive
+        self.prefix_suffix: bool = prefix_suffix
+
+        if self.patterns:
+            # The escaped patterns don't contain groups of their own, so the number of the group that matched
+            # is the index of the pattern + 1.
+            combined_regex: str = '|'.join(
+                f'({_convert_wildcard_pattern_to_regex(pattern, prefix_suffix)})' for pattern in self.patterns)
+            self.regex: Union[re.Pattern, None] = re.compile(
+                combined_regex, re.IGNORECASE if case_insensitive else 0)
+        else:
+            self.regex = None
+
+    def match(self, check_string: str) -> bool:
+        """
+        Check if any pattern matches the string.
+
+        :param check_string: string, to check the patterns against.
+        :return: boolean.
+        """
+
+        if self.regex is None:
+            return False
+
+        return self.regex.search(check_string) is not None
+
+    def get_matched_pattern(self, check_string: str) -> Union[str, None]:
+        """
+        Get the first pattern (by the order in the patterns list) that matches the string.
+
+        :param check_string: string, to check the patterns against.
+        :return: string of the pattern or None if nothing matched.
+        """
+
+        if self.regex is None:
+            return None
+
+        # 'search' returns the leftmost match, which is not necessarily the first pattern in the list,
+        # so if there is a match, the patterns are checked by order with their own compiled regexes.
+        if self.regex.search(check_string) is None:
+            return None
+
+        for pattern in self.patterns:
+            if compile_patterns((pattern,), self.case_insensitive, self.prefix_suffix).match(check_string):
+                return pattern
+
+        return None
+
+    def filter(self, list_of_strings: Iterable[str]) -> list:
+        """
+        Get only the strings that match any of the patterns.
+
+        :param list_of_strings: iterable of strings.
+        :return: list of strings.
+        """
 
-    # Perform the search and return the result.
-    return bool(regex_pattern.search(check_string))
+        if self.regex is None:
+            return list()
+
+        search = self.regex.search
+        return [check_string for check_string in list_of_strings if search(check_string) is not None]
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_patterns_cached(patterns: tuple, case_insensitive: bool, prefix_suffix: bool) -> PatternSet:
+    return PatternSet(patterns, case_insensitive=case_insensitive, prefix_suffix=prefix_suffix)
+
+
+def compile_patterns(
+        patterns: Iterable[str],
+        case_insensitive: bool = False,
+        prefix_suffix: bool = False
+) -> PatternSet:
+    """
+    Get 'PatternSet' of the patterns. Instances are cached by the patterns and the switches, so it is cheap to call
+    this function with the same patterns again.
+
+    :param patterns: iterable of string patterns. May include wildcards as '*'.
+    :param case_insensitive: boolean, if 'True' will treat the patterns and checked strings as case-insensitive.
+    :param prefix_suffix: boolean, check the description in 'match_pattern_against_string' function.
+    :return: PatternSet.
+    """
+
+    return _compile_patterns_cached(tuple(patterns), bool(case_insensitive), bool(prefix_suffix))
 
 
 def match_list_of_patterns_against_string(
@@ -301,14 +422,12 @@ def match_list_of_patterns_against_string(
     :return: boolean.
 
     Check for all the examples the 'match_pattern_against_string' function.
+    If you check many strings against the same patterns, it is faster to use 'compile_patterns' once and call
+    'match' of the result in the loop.
     """
 
-    for pattern in patterns:
-        if match_pattern_against_string(
-                pattern, check_string, case_insensitive=case_insensitive, prefix_suffix=prefix_suffix):
-            return True
-
-    return False
+    return compile_patterns(patterns, case_insensitive=case_insensitive, prefix_suffix=prefix_suffix).match(
+        check_string)
 
 
 def match_pattern_against_list_of_strings(pattern: str, list_of_strings: list) -> list:
@@ -498,43 +617,140 @@ def convert_string_to_colon_separated(string: str, number_of_characters: int = 2
     return ':'.join([string[i:i+number_of_characters] for i in range(0, len(string), number_of_characters)])
 
 
+def _copy_file_ownership(source_file_path: str, destination_file_path: str) -> None:
+    """
+    Copy the owner and group of the source file to the destination file.
+    Nothing is done on systems without 'os.chown' or if the current user isn't permitted to change the owner.
+
+    :param source_file_path: string, path to the file to take the owner and group from.
+    :param destination_file_path: string, path to the file to set the owner and group on.
+    :return: None.
+    """
+
+    if not hasattr(os, 'chown'):
+        return
+
+    source_stat = os.stat(source_file_path)
+    try:
+        os.chown(destination_file_path, source_stat.st_uid, source_stat.st_gid)
+    except PermissionError:
+        pass
+
+
 def replace_string_in_file(
         file_path: str,
-        old_string: str,
+        old_string: str = None,
         new_string: str = None,
         find_only: bool = False,
-        print_kwargs: dict = None
+        print_kwargs: dict = None,
+        replacements: list[tuple[str, Union[str, None]]] = None,
+        chunk_size: int = REPLACE_IN_FILE_CHUNK_SIZE
 ) -> list[int]:
     """
     Function replaces 'old_string' with 'new_string' in the file.
+    The file is streamed in chunks of 'chunk_size' characters, so the memory usage doesn't depend on the file size.
+    Matches that cross chunk boundaries (and lines) are handled. The result is written to a temp file in the same
+    directory, that replaces the original file only after it was fully written. The mode and, where permitted, the
+    owner and group of the original file are kept. If nothing was found, the original file is not rewritten.
+
     :param file_path: string, path to the file.
     :param old_string: string, to replace.
     :param new_string: string, to replace with.
     :param find_only: boolean, if 'True' will only find the 'old_string' and return line numbers where it was found.
+        The file is not written in this case.
     :param print_kwargs: dict, the print_api arguments.
-    :return: list of integers, line numbers where the 'old_string' was found.
-    """
-
-    if not find_only and new_string is None:
+    :param replacements: list of tuples (old_string, new_string), to apply in one pass instead of
+        'old_string' and 'new_string'. At each position of the file the longest matching 'old_string' is replaced,
+        replaced text is not checked again by other replacements.
+        Example: [('http://', 'https://'), ('localhost', '127.0.0.1')]
+        In 'find_only' mode the 'new_string' can be None.
+    :param chunk_size: integer, number of characters to read from the file at a time.
+    :return: list of integers, line numbers where the 'old_string' (any of them) was found. The line of a match is
+        the line where the match starts.
+    """
+
+    if replacements is None:
+        if not old_string:
+            raise ValueError("The 'old_string' string must be provided if 'replacements' is not provided.")
+        replacements = [(old_string, new_string)]
+    elif old_string is not None:
+        raise ValueError("Provide either 'old_string' and 'new_string' or 'replacements', not both.")
+
+    if any(not replacement_old for replacement_old, _ in replacements):
+        raise ValueError("The 'old_string' can't be empty.")
+    if not find_only and any(replacement_new is None for _, replacement_new in replacements):
         raise ValueError("The 'new_string' string must be provided if 'find_only' is False.")
 
-    changed_lines = []
-
-    # Read the file content
-    with open(file_path, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
+    replacements_dict: dict = dict(replacements)
+    # Longest first, so on the same position the longest old string is matched.
+    old_strings: list = sorted(replacements_dict, key=len, reverse=True)
+    regex = re.compile('|'.join(re.escape(replacement_old) for replacement_old in old_strings))
+    # A match that starts less than this from the end of the buffer, may be cut by the chunk boundary.
+    max_old_length: int = len(old_strings[0])
 
-    # Search for the old string and either replace or just track line numbers
-    for index, line in enumerate(lines, start=1):
-        if old_string in line:
-            changed_lines.append(index)
-            if not find_only:
-                lines[index - 1] = line.replace(old_string, new_string)
+    changed_lines: list = []
+    # Number of new lines in the text before the current buffer.
+    buffer_line: int = 1
 
-    # If not in find-only mode, overwrite the file with the replaced content
+    output_file = None
+    temp_file_path: Union[str, None] = None
     if not find_only:
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.writelines(lines)
+        temp_file_path = f'{file_path}.{os.getpid()}.tmp'
+        # 'newline' is empty so the line endings are kept as is.
+        output_file = open(temp_file_path, 'w', encoding='utf-8', newline='')
+
+    try:
+        with open(file_path, 'r', encoding='utf-8', newline='') as input_file:
+            buffer: str = str()
+            end_of_file: bool = False
+            while not end_of_file:
+                chunk: str = input_file.read(chunk_size)
+                end_of_file = not chunk
+                buffer += chunk
+
+                # Only matches that start before this limit are final, all the old strings fit in the buffer there.
+                if end_of_file:
+                    safe_limit: int = len(buffer)
+                else:
+                    safe_limit = max(len(buffer) - max_old_length + 1, 0)
+
+                output_parts: list = []
+                # The position in the buffer up to which the text was written / counted.
+                cursor: int = 0
+                for match in regex.finditer(buffer):
+                    if match.start() >= safe_limit:
+                        break
+
+                    match_line: int = buffer_line + buffer.count('\n', cursor, match.start())
+                    if not changed_lines or changed_lines[-1] != match_line:
+                        changed_lines.append(match_line)
+
+                    if output_file:
+                        output_parts.append(buffer[cursor:match.start()])
+                        output_parts.append(replacements_dict[match.group()])
+
+                    buffer_line = match_line + buffer.count('\n', match.start(), match.end())
+                    cursor = match.end()
+
+                consumed: int = max(cursor, safe_limit)
+                buffer_line += buffer.count('\n', cursor, consumed)
+                if output_file:
+                    output_parts.append(buffer[cursor:consumed])
+                    output_file.write(''.join(output_parts))
+                buffer = buffer[consumed:]
+
+        if output_file:
+            output_file.close()
+            # If nothing was replaced, the original file is left untouched, the temp file is removed below.
+            if changed_lines:
+                shutil.copymode(file_path, temp_file_path)
+                _copy_file_ownership(file_path, temp_file_path)
+                os.replace(temp_file_path, file_path)
+    finally:
+        if output_file:
+            output_file.close()
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
 
     # Output the relevant line numbers
     print_api.print_api(f"Target string found on the following lines: {changed_lines}", **(print_kwargs or {}))
@@ -1,14 +1,278 @@
 import datetime
+import os
 from pathlib import Path
-from typing import Union, Literal
+from typing import Union, Literal, Callable
 import json
 import queue
+import threading
+import time
+import weakref
 
 from . import filesystem, timer
 from .file_io import file_io, jsons
 from .print_api import print_api
 from .basics import list_of_dicts, dicts
 
+JOURNAL_FILE_SUFFIX: str = '.journal'
+
+
+class IndexedStateStore:
+    """
+    Hashed in-memory index of entries with an append-only journal file and periodic snapshot compaction.
+    Used by 'DiffChecker' for 'hit_statistics' and 'new_objects' operation types, so each event costs O(1)
+    (dict lookup + one appended journal line) instead of sorting and rewriting the whole input file.
+
+    On disk there are 2 files:
+        <snapshot_file_path>: the full content in the same json format that was used before (dict or list of dicts),
+            rewritten only on compaction.
+        <snapshot_file_path>.journal: json lines of '[key, value]', appended on each change since last compaction.
+            The value is the absolute one (not a delta), so replaying the journal over a newer snapshot is safe.
+
+    The sorted view is built only when it is read (compaction, 'get_sorted_view').
+    """
+
+    def __init__(
+            self,
+            snapshot_file_path: str = None,
+            snapshot_type: Literal['dict', 'list'] = 'dict',
+            sort_function: Callable[[Union[dict, list]], Union[dict, list]] = None,
+            compaction_events: int = 1000,
+            compaction_seconds: float = 60
+    ):
+        """
+        :param snapshot_file_path: string, full path to the snapshot json file. If not specified, the store is
+            in memory only.
+        :param snapshot_type: string, the format of the snapshot file.
+            'dict': key -> value dictionary, example: {'<entry json string>': <count>}.
+            'list': list of dicts, the key of each entry is computed with 'get_entry_key'.
+        :param sort_function: callable, gets the dict/list and returns the sorted dict/list.
+            Applied only when the sorted view is read. If not specified, the insertion order is used.
+        :param compaction_events: integer, number of journal records after which the snapshot is rewritten.
+        :param compaction_seconds: float, seconds since the last compaction after which the snapshot is rewritten
+            on next change.
+        """
+
+        if snapshot_type not in ['dict', 'list']:
+            raise ValueError("[snapshot_type] must be 'dict' or 'list'.")
+
+        self.snapshot_file_path: str = snapshot_file_path
+        self.snapshot_type: str = snapshot_type
+        self.sort_function = sort_function
+        self.compaction_events: int = compaction_events
+        self.compaction_seconds: float = compaction_seconds
+
+        if snapshot_file_path:
+            self.journal_file_path: Union[str, None] = snapshot_file_path + JOURNAL_FILE_SUFFIX
+        else:
+            self.journal_file_path = None
+
+        # The index: key -> value.
+        self.index: dict = dict()
+
+        self._journal_file_object = None
+        self._journal_records: int = 0
+        self._last_compaction_time: float = time.monotonic()
+        self._sorted_view_cache = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def get_entry_key(entry: any) -> str:
+        """
+        Get the hashable key of an entry. Dict key order doesn't matter.
+
+        :param entry: any json serializable object.
+        :return: string.
+        """
+
+        return json.dumps(entry, sort_keys=True)
+
+    def load(self) -> None:
+        """
+        Load the snapshot file and replay the journal on top of it.
+        If neither exist, the store will be empty.
+        """
+
+        with self._lock:
+            self.index = dict()
+            self._sorted_view_cache = None
+
+            if not self.snapshot_file_path:
+                return
+
+            self._close_journal()
+
+            try:
+                with open(self.snapshot_file_path, 'r') as snapshot_file:
+                    snapshot_content = json.load(snapshot_file)
+            except FileNotFoundError:
+                snapshot_content = None
+
+            if snapshot_content:
+                if self.snapshot_type == 'dict':
+                    self.index = dict(snapshot_content)
+                else:
+                    for entry in snapshot_content:
+                        self.index[self.get_entry_key(entry)] = entry
+
+            self._journal_records = 0
+            try:
+                with open(self.journal_file_path, 'r') as journal_file:
+                    for line in journal_file:
+                        # The last line can be partial if the process was killed in the middle of the write.
+                        try:
+                            key, value = json.loads(line)
+                        except ValueError:
+                            continue
+                        self.index[key] = value
+                        self._journal_records += 1
+            except FileNotFoundError:
+                pass
+
+    def get(self, key: str, default: any = None) -> any:
+        return self.index.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def set(self, key: str, value: any) -> None:
+        """
+        Set the value of a key and append the change to the journal.
+
+        :param key: string, the key.
+        :param value: any json serializable object.
+        """
+
+        with self._lock:
+            self.index[key] = value
+            self._sorted_view_cache = None
+            self._append_to_journal(key, value)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Increment a counter value of a key. If the key doesn't exist, it will be created.
+
+        :param key: string, the key.
+        :param amount: integer, the amount to add.
+        :return: integer, the new counter value.
+        """
+
+        with self._lock:
+            value = self.index.get(key, 0) + amount
+            self.set(key, value)
+            return value
+
+    def add_entry(self, entry: any) -> bool:
+        """
+        Add an entry for the 'list' snapshot type.
+
+        :param entry: any json serializable object.
+        :return: boolean, True if the entry was added, False if it already existed.
+        """
+
+        key = self.get_entry_key(entry)
+        with self._lock:
+            if key in self.index:
+                return False
+            self.set(key, entry)
+            return True
+
+    def contains_entry(self, entry: any) -> bool:
+        return self.get_entry_key(entry) in self.index
+
+    def get_sorted_view(self) -> Union[dict, list]:
+        """
+        Get the content in the snapshot format, sorted with 'sort_function'.
+        The view is cached until the next change.
+
+        :return: dict or list.
+        """
+
+        with self._lock:
+            if self._sorted_view_cache is None:
+                if self.snapshot_type == 'dict':
+                    view = dict(self.index)
+                else:
+                    view = list(self.index.values())
+
+                if self.sort_function:
+                    view = self.sort_function(view)
+
+                self._sorted_view_cache = view
+
+            return self._sorted_view_cache
+
+    def compact(self) -> None:
+        """
+        Write the sorted view to the snapshot file and truncate the journal.
+        The snapshot is written to a temp file and then renamed, so the snapshot file is never partial.
+        """
+
+        if not self.snapshot_file_path:
+            return
+
+        with self._lock:
+            temp_file_path = self.snapshot_file_path + '.tmp'
+            with open(temp_file_path, 'w') as temp_file:
+                json.dump(self.get_sorted_view(), temp_file, indent=2)
+            os.replace(temp_file_path, self.snapshot_file_path)
+
+            # Only after the snapshot is in place the journal can be truncated.
+            self._close_journal()
+            with open(self.journal_file_path, 'w'):
+                pass
+
+            self._journal_records = 0
+            self._last_compaction_time = time.monotonic()
+
+    def reset(self) -> None:
+        """
+        Clear the in memory index and truncate the journal. The snapshot file is not touched, so it can be
+        rotated / backed up before calling this.
+        """
+
+        with self._lock:
+            self.index = dict()
+            self._sorted_view_cache = None
+
+            if self.snapshot_file_path:
+                self._close_journal()
+                with open(self.journal_file_path, 'w'):
+                    pass
+                self._journal_records = 0
+
+    def close(self) -> None:
+        """
+        Compact the store and close the journal file.
+        """
+
+        with self._lock:
+            if self.snapshot_file_path and self._journal_records:
+                self.compact()
+            self._close_journal()
+
+    def _append_to_journal(self, key: str, value: any) -> None:
+        if not self.snapshot_file_path:
+            return
+
+        if self._journal_file_object is None:
+            self._journal_file_object = open(self.journal_file_path, 'a')
+
+        self._journal_file_object.write(json.dumps([key, value]) + '\n')
+        self._journal_file_object.flush()
+        self._journal_records += 1
+
+        if (self._journal_records >= self.compaction_events or
+                time.monotonic() - self._last_compaction_time >= self.compaction_seconds):
+            self.compact()
+
+    def _close_journal(self) -> None:
+        if self._journal_file_object is not None:
+            self._journal_file_object.close()
+            self._journal_file_object = None
+
 
 class DiffChecker:
     """
@@ -42,7 +306,9 @@ class DiffChecker:
                 Literal['midnight'],
                 None] = None,
             hit_statistics_enable_queue: bool = False,
-            new_objects_hours_then_difference: float = None
+            new_objects_hours_then_difference: float = None,
+            state_store_compaction_events: int = 1000,
+            state_store_compaction_seconds: float = 60
 
     ):
         """
@@ -119,6 +385,12 @@ class DiffChecker:
             After the specified amount of hours, new objects will not be added to the input file list, so each new
             object will be outputted from the function. This is useful for checking new objects that are not
             supposed to be in the list of objects, but you want to know about them.
+        :param state_store_compaction_events: integer, only for 'hit_statistics' and 'new_objects' operation types.
+            The content of these types is kept in 'IndexedStateStore': each event is appended to
+            '<input_file_path>.journal' and the input file itself is rewritten (sorted) only after this number of
+            journal records.
+        :param state_store_compaction_seconds: float, only for 'hit_statistics' and 'new_objects' operation types.
+            The input file is also rewritten on the next event after this number of seconds since the last rewrite.
 
         --------------------------------------------------
 
@@ -198,6 +470,8 @@ class DiffChecker:
         self.hit_statistics_input_file_rotation_cycle_hours = hit_statistics_input_file_rotation_cycle_hours
         self.hit_statistics_enable_queue = hit_statistics_enable_queue
         self.new_objects_hours_then_difference: float = new_objects_hours_then_difference
+        self.state_store_compaction_events: int = state_store_compaction_events
+        self.state_store_compaction_seconds: float = state_store_compaction_seconds
 
         # Previous content.
         self.previous_content: Union['list', 'str', None] = None
@@ -208,6 +482,11 @@ class DiffChecker:
         self.previous_day = None
         self.new_objects_seconds_then_difference: Union[float, None] = None
         self.timer = None
+        self.state_store: Union[IndexedStateStore, None] = None
+        # Closes the state store on 'close()', garbage collection or interpreter exit, whichever comes first.
+        self._state_store_finalizer: Union[weakref.finalize, None] = None
+        # The state store is loaded once, unless 'input_file_write_only' is False.
+        self._is_state_store_loaded: bool = False
 
     def initiate_before_action(self):
         """
@@ -264,6 +543,46 @@ class DiffChecker:
             self.timer = timer.Timer()
             self.timer.start()
 
+        if self.operation_type in ['hit_statistics', 'new_objects']:
+            if self.operation_type == 'hit_statistics':
+                snapshot_type = 'dict'
+                sort_function = self._sort_hit_statistics
+            else:
+                snapshot_type = 'list'
+                sort_function = None
+
+            # The previous store is closed, so its journal is compacted to the input file.
+            self.close()
+            self.state_store = IndexedStateStore(
+                snapshot_file_path=self.input_file_path,
+                snapshot_type=snapshot_type,
+                sort_function=sort_function,
+                compaction_events=self.state_store_compaction_events,
+                compaction_seconds=self.state_store_compaction_seconds
+            )
+            self._state_store_finalizer = weakref.finalize(self, self.state_store.close)
+            self._is_state_store_loaded = False
+        else:
+            self.close()
+            self.state_store = None
+
+    def close(self):
+        """
+        Write the current state to the input file and close the journal.
+        Relevant only for 'hit_statistics' and 'new_objects' operation types.
+        It is also called on garbage collection of the instance and on interpreter exit, so the journal events
+        since the last compaction get to the input file, but the monitor should call it on its shutdown.
+        """
+
+        if self._state_store_finalizer is not None:
+            self._state_store_finalizer()
+            self._state_store_finalizer = None
+
+    @staticmethod
+    def _sort_hit_statistics(statistics: dict) -> dict:
+        # Sort the dictionary by count of entries.
+        return dicts.sort_by_values(statistics, reverse=True)
+
     def check_string(self, print_kwargs: dict = None):
         """
         The function will check file content for change by hashing it and comparing the hash.
@@ -272,6 +591,11 @@ class DiffChecker:
         if not isinstance(self.check_object, str):
             raise TypeError(f"[check_object] must be string, not {type(self.check_object)}.")
 
+        if self.state_store is not None:
+            raise ValueError(
+                f"[check_string] can't be used with [{self.operation_type}] operation type, the state is stored "
+                f"as json. Use [check_list_of_dicts].")
+
         self.save_as = 'txt'
 
         # Each function need to initialize the object content to the proper type it will use.
@@ -305,9 +629,12 @@ class DiffChecker:
         if not self.operation_type:
             raise ValueError("[operation_type] must be specified.")
 
+        if self.state_store is not None:
+            self._load_state_store(print_kwargs=print_kwargs)
+
         # If 'input_file_path' was specified, this means that the input file will be created for storing
         # content of the function to compare.
-        if self.input_file_path:
+        if self.input_file_path and self.state_store is None:
             # If 'previous_content' is not yet probed, meaning that this is the first cycle and since 'use_input_file'
             # was set 'True', we will read the input file to get the previously probed content.
             # Also, if the user specified 'input_file_write_only=False' that he doesn't want to only write the
@@ -326,11 +653,11 @@ class DiffChecker:
                     if not self.input_file_write_only:
                         self.previous_content = list()
 
-            # get the content of current function.
-            if isinstance(self.check_object, list):
-                current_content = list(self.check_object)
-            else:
-                current_content = self.check_object
+        # get the content of current function.
+        if isinstance(self.check_object, list):
+            current_content = list(self.check_object)
+        else:
+            current_content = self.check_object
 
         # If known content differs from just taken content.
         result = None
@@ -351,6 +678,26 @@ class DiffChecker:
         if self.operation_type == 'single_object':
             return self._singular_object_handling(current_content, result, message, print_kwargs=print_kwargs)
 
+    def _load_state_store(self, print_kwargs: dict = None):
+        # Same as the input file reading, the store is read on the first cycle, or on each cycle if
+        # 'input_file_write_only' is False. An empty store is not read again on each cycle.
+        if self._is_state_store_loaded and self.input_file_write_only:
+            return
+
+        if self.input_file_path and not Path(self.input_file_path).exists() and \
+                not Path(self.state_store.journal_file_path).exists():
+            message = f"Input File [{Path(self.input_file_path).name}] doesn't exist - Will create new one."
+            print_api(message, color='yellow', **(print_kwargs or {}))
+
+        self.state_store.load()
+        self._is_state_store_loaded = True
+
+        if self.operation_type == 'hit_statistics':
+            # The dict of the store is used directly, so there is no copy on each event.
+            self.previous_content = self.state_store.index
+        else:
+            self.previous_content = list(self.state_store.index.values())
+
     def _no_diffcheck_handling(self, current_content, result, message, print_kwargs: dict = None):
         # if not self.previous_content:
         #     self.previous_content = []
@@ -383,19 +730,17 @@ class DiffChecker:
             current_date = datetime.datetime.now().strftime('%d')
             # If current date is different from previous date it means it is a new day, rotate the file.
             if current_date != self.previous_day:
-                input_file_statistics = None
-                try:
-                    # Read the latest statistics from the input file.
-                    input_file_statistics = jsons.read_json_file(self.input_file_path)
-                # Basically, this means that the input statistics file doesn't exist yet, and no events hit
-                # yet and new day has come, so it doesn't matter, since there are no statistics to rotate the file.
-                except FileNotFoundError:
-                    pass
+                # The latest statistics are in the store. If it is empty, no events hit yet and new day has come,
+                # so it doesn't matter, since there are no statistics to rotate the file.
+                input_file_statistics = self.state_store.get_sorted_view()
 
                 if input_file_statistics:
-                    # Rename the file.
-                    filesystem.backup_file(
-                        self.input_file_path, str(Path(self.input_file_path).parent), timestamp_as_prefix=False)
+                    if self.input_file_path:
+                        # Write the full statistics to the input file before the rotation.
+                        self.state_store.compact()
+                        # Rename the file.
+                        filesystem.backup_file(
+                            self.input_file_path, str(Path(self.input_file_path).parent), timestamp_as_prefix=False)
                     # Update the previous date.
                     self.previous_day = current_date
 
@@ -404,47 +749,34 @@ class DiffChecker:
                     if self.statistics_queue:
                         self.statistics_queue.put((input_file_statistics, previous_day_date_object))
 
-                    self.previous_content = {}
+                    self.state_store.reset()
+                    self.previous_content = self.state_store.index
         else:
             raise NotImplementedError("This feature is not implemented yet.")
 
         # Convert the dictionary entry to string, since we will use it as a key in the dictionary.
         current_entry = json.dumps(current_content[0])
 
-        if not self.previous_content:
-            self.previous_content = {}
-
-        if not self.previous_content.get(current_entry):
-            self.previous_content[current_entry] = 1
-        else:
-            self.previous_content[current_entry] += 1
+        # The store appends the new count to the journal, the sorted input file is written only on compaction.
+        count: int = self.state_store.increment(current_entry)
 
         result = {
             'object': self.check_object_display_name,
             'entry': current_entry,
-            'count': self.previous_content[current_entry]
+            'count': count
         }
 
         message = f"Object: {result['object']} | Entry: {result['entry']} | Count: {result['count']}"
 
-        # Sort the dictionary by count of entries.
-        self.previous_content = dicts.sort_by_values(self.previous_content, reverse=True)
-
-        # If 'input_file_path' was specified by the user, it means that we will use the input file to save
-        # our known content there for next iterations to compare.
-        if self.input_file_path:
-            if self.save_as == 'txt':
-                # noinspection PyTypeChecker
-                file_io.write_file(self.previous_content, self.input_file_path, stdout=False, **(print_kwargs or {}))
-            elif self.save_as == 'json':
-                jsons.write_json_file(
-                    self.previous_content, self.input_file_path, use_default_indent=True, stdout=False,
-                    **(print_kwargs or {}))
-
         return result, message
 
     def _aggregation_handling(self, current_content, result, message, sort_by_keys, print_kwargs: dict = None):
-        if current_content[0] not in self.previous_content:
+        if sort_by_keys and not self.state_store.sort_function:
+            # Sort list of dicts by specified list of keys, only when the sorted view is written / read.
+            self.state_store.sort_function = lambda content: list_of_dicts.sort_by_keys(
+                content, sort_by_keys, case_insensitive=True)
+
+        if not self.state_store.contains_entry(current_content[0]):
             # If known content is not empty (if it is, it means it is the first iteration, and we don't have the input
             # file, so we don't need to update the 'result', since there is nothing to compare yet).
             if self.previous_content or (not self.previous_content and self.return_first_cycle):
@@ -465,22 +797,10 @@ class DiffChecker:
                 result['time_passed'] = False
 
                 # Make known content the current, since it is updated.
-                self.previous_content.extend(current_content)
-
-                # Sort list of dicts by specified list of keys.
-                if sort_by_keys:
-                    self.previous_content = list_of_dicts.sort_by_keys(
-                        self.previous_content, sort_by_keys, case_insensitive=True)
-
-                # If 'input_file_path' was specified by the user, it means that we will use the input file to save
-                # our known content there for next iterations to compare.
-                if self.input_file_path:
-                    if self.save_as == 'txt':
-                        # noinspection PyTypeChecker
-                        file_io.write_file(self.previous_content, self.input_file_path, **(print_kwargs or {}))
-                    elif self.save_as == 'json':
-                        jsons.write_json_file(
-                            self.previous_content, self.input_file_path, use_default_indent=True, **(print_kwargs or {}))
+                # The store appends new entries to the journal, the sorted input file is written only on compaction.
+                for entry in current_content:
+                    if self.state_store.add_entry(entry):
+                        self.previous_content.append(entry)
             else:
                 result['time_passed'] = True
                 # We will stop the timer, since the time has passed, the 'measure' method will return the last measure
@@ -1,6 +1,7 @@
 import csv
 import io
-from typing import Tuple, List
+import itertools
+from typing import Tuple, List, Iterable
 
 from . import file_io
 
@@ -140,6 +141,53 @@ def write_list_to_csv(
             writer.writerows(content_list)
 
 
+def write_rows_to_csv_streaming(
+        rows: Iterable,
+        file_path: str,
+        mode: str = 'w',
+        encoding: str = None,
+        chunk_size: int = 10000
+) -> int:
+    """
+    Same as 'write_list_to_csv', but the rows can be any iterable (generator), they are consumed and written
+    in chunks, so the whole content is never in memory.
+
+    :param rows: iterable of dicts with same keys (the keys of the first row are the header) or of lists.
+    :param file_path: Full file path to CSV file.
+    :param mode: String, file writing mode. Default is 'w'.
+    :param encoding: String, encoding of the file. Default is 'None'.
+    :param chunk_size: integer, number of rows to write in each 'writerows' call.
+    :return: integer, number of rows written, without the header.
+    """
+
+    rows_iterator = iter(rows)
+    first_row = next(rows_iterator, None)
+
+    rows_count: int = 0
+    with open(file_path, mode=mode, newline='', encoding=encoding) as csv_file:
+        if first_row is None:
+            return rows_count
+
+        if isinstance(first_row, dict):
+            writer = csv.DictWriter(
+                csv_file, fieldnames=first_row.keys(), delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            writer.writeheader()
+        else:
+            writer = csv.writer(csv_file)
+
+        writer.writerow(first_row)
+        rows_count += 1
+
+        while True:
+            chunk: list = list(itertools.islice(rows_iterator, chunk_size))
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            rows_count += len(chunk)
+
+    return rows_count
+
+
 def get_header(file_path: str, print_kwargs: dict = None) -> list:
     """
     Function to get header from CSV file.
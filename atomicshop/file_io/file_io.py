@@ -13,15 +13,43 @@ def get_write_file_mode_string_from_overwrite_bool(overwrite: bool) -> str:
         return 'x'
 
 
+def _is_stdout_enabled(kwargs: dict) -> bool:
+    # Regular (not error) messages of 'print_api' are printed only with 'stdout', so there is no need to format them.
+    return kwargs.get('stdout', True)
+
+
+def _add_raw_function(wrapper, function_name, combine_args):
+    def raw(file_object, **kwargs):
+        """
+        Execute the decorated function on an already open file object, without opening the file and without
+        printing. For hot paths that keep the file open between the calls.
+
+        :param file_object: file object, opened with the mode and encoding that the function expects.
+        :param kwargs: the arguments of the function, without the 'file_object'. The 'file_path' is optional.
+        :return: the result of the function.
+        """
+
+        kwargs.setdefault('file_path', getattr(file_object, 'name', None))
+        _, kwargs = combine_args(**kwargs)
+        kwargs['file_object'] = file_object
+        return function_name(**kwargs)
+
+    wrapper.raw = raw
+    return wrapper
+
+
 def write_file_decorator(function_name):
+    # The signature and defaults of the function are resolved once here and not on each call.
+    combine_args = inspect_wrapper.get_default_args_combiner(function_name)
+
     @functools.wraps(function_name)
     def wrapper_write_file_decorator(*args, **kwargs):
         # Put 'args' into 'kwargs' with appropriate key.
         # args, kwargs = put_args_to_kwargs(function_name, *args, **kwargs)
-        args, kwargs = inspect_wrapper.get_target_function_default_args_and_combine_with_current(
-            function_name, *args, **kwargs)
+        args, kwargs = combine_args(*args, **kwargs)
 
-        print_api.print_api(message=f"Writing file: {kwargs['file_path']}", **kwargs)
+        if _is_stdout_enabled(kwargs):
+            print_api.print_api(message=f"Writing file: {kwargs['file_path']}", **kwargs)
 
         enable_long_file_path = kwargs.get('enable_long_file_path', False)
         if enable_long_file_path and os.name == 'nt':
@@ -45,21 +73,24 @@ def write_file_decorator(function_name):
                       f"File exists, you should enable force/overwrite mode."
             print_api.print_api(message, error_type=True, logger_method='critical', **kwargs)
 
-    return wrapper_write_file_decorator
+    return _add_raw_function(wrapper_write_file_decorator, function_name, combine_args)
 
 
 def read_file_decorator(function_name):
+    # The signature and defaults of the function are resolved once here and not on each call.
+    combine_args = inspect_wrapper.get_default_args_combiner(function_name)
+
     @functools.wraps(function_name)
     def wrapper_read_file_decorator(*args, **kwargs):
         # Put 'args' into 'kwargs' with appropriate key.
         # args, kwargs = put_args_to_kwargs(function_name, *args, **kwargs)
-        args, kwargs = inspect_wrapper.get_target_function_default_args_and_combine_with_current(
-            function_name, *args, **kwargs)
+        args, kwargs = combine_args(*args, **kwargs)
 
         continue_loop: bool = True
         while continue_loop:
             try:
-                print_api.print_api(message=f"Reading file: {kwargs['file_path']}", **kwargs)
+                if _is_stdout_enabled(kwargs):
+                    print_api.print_api(message=f"Reading file: {kwargs['file_path']}", **kwargs)
                 with open(kwargs['file_path'], kwargs['file_mode'], encoding=kwargs['encoding']) as input_file:
                     # Pass the 'output_file' object to kwargs that will pass the object to the executing function.
                     kwargs['file_object'] = input_file
@@ -82,7 +113,7 @@ def read_file_decorator(function_name):
                     print_api.print_api(message, merror_type=True, logger_method='critical', **kwargs)
                     continue_loop = False
 
-    return wrapper_read_file_decorator
+    return _add_raw_function(wrapper_read_file_decorator, function_name, combine_args)
 
 
 @write_file_decorator
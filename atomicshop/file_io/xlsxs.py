@@ -1,8 +1,18 @@
+from typing import Iterable, Union
+import itertools
+
 import pandas
+from openpyxl import Workbook
 
 from .file_io import write_file_decorator
 
 
+# Maximum number of rows in one Excel sheet.
+XLSX_MAX_ROWS_PER_SHEET: int = 1048576
+# Maximum length of Excel sheet name.
+XLSX_MAX_SHEET_NAME_LENGTH: int = 31
+
+
 @write_file_decorator
 def write_xlsx(
         spread_sheets: dict,
@@ -56,3 +66,112 @@ def write_xlsx(
     #
     # # Save the file.
     # writer.save()
+
+
+def _convert_cell_value(value):
+    """
+    openpyxl can't write non-scalar cells, these are written as their string, like 'pandas' does in 'write_xlsx'.
+
+    :param value: the cell value.
+    :return: the value that can be written to the cell.
+    """
+
+    if isinstance(value, (list, tuple, dict, set)):
+        return str(value)
+    return value
+
+
+def iterate_rows_from_columns(sheet_data: dict) -> Iterable[dict]:
+    """
+    Iterate over the rows of a columns dict, as it is used in 'write_xlsx' spreadsheets, without building
+    a data frame.
+
+    :param sheet_data: dict, the keys are the column names and the values are the lists of the column values.
+        Example:
+            {
+                'col1': [1, 2, 3],
+                'col2': [4, 5, 6]
+            }
+    :return: iterator of dicts, each dict is a row. If the columns are not the same length, the missing
+        values are None.
+    """
+
+    column_names: list = list(sheet_data.keys())
+    for row_values in itertools.zip_longest(*sheet_data.values()):
+        yield dict(zip(column_names, row_values))
+
+
+def write_xlsx_streaming(
+        spread_sheets: dict[str, Iterable[Union[dict, list]]],
+        file_path: str,
+        max_rows_per_sheet: int = XLSX_MAX_ROWS_PER_SHEET
+) -> list[str]:
+    """
+    Write rows to xlsx file in constant memory, with the write-only mode of openpyxl.
+    Unlike 'write_xlsx', the data isn't converted to data frames, the rows are consumed from the iterators one by one
+    and written directly to the sheet.
+    If a sheet reaches the 'max_rows_per_sheet', the rest of the rows continue in a new sheet with the same header,
+    named with a suffix: 'sheet1', 'sheet1_2', 'sheet1_3'...
+
+    :param spread_sheets: dict. The keys are the names of the sheets and the values are iterables (lists,
+        generators) of rows.
+        Each row can be a dict, then the keys of the first row are the header of the sheet.
+        Or a list of values, then the rows are written as is, without a header.
+        Cells that are lists, tuples, dicts or sets are written as strings, same as in 'write_xlsx'.
+
+        Example:
+            spread_sheets = {
+                'deviations': (deviation for deviation in deviation_list),
+                'statistics': iterate_rows_from_columns({'col1': [1, 2, 3], 'col2': [4, 5, 6]})
+            }
+    :param file_path: string, full path to the file to write.
+    :param max_rows_per_sheet: integer, maximum number of rows in each sheet, including the header row.
+    :return: list of strings, the names of the sheets that were written.
+    """
+
+    if max_rows_per_sheet < 2:
+        raise ValueError('max_rows_per_sheet must be at least 2, header and one row.')
+
+    workbook = Workbook(write_only=True)
+    written_sheet_names: list = []
+
+    def create_sheet(base_sheet_name: str, part_number: int):
+        if part_number == 1:
+            sheet_name: str = base_sheet_name[:XLSX_MAX_SHEET_NAME_LENGTH]
+        else:
+            suffix: str = f'_{part_number}'
+            sheet_name = base_sheet_name[:XLSX_MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix
+
+        written_sheet_names.append(sheet_name)
+        return workbook.create_sheet(title=sheet_name)
+
+    for base_sheet_name, rows in spread_sheets.items():
+        part_number: int = 1
+        worksheet = create_sheet(base_sheet_name, part_number)
+        header: Union[list, None] = None
+        sheet_rows_count: int = 0
+
+        for row in rows:
+            if isinstance(row, dict):
+                if header is None:
+                    header = list(row.keys())
+                    worksheet.append(header)
+                    sheet_rows_count += 1
+                row_values: list = [_convert_cell_value(row.get(column_name)) for column_name in header]
+            else:
+                row_values = [_convert_cell_value(value) for value in row]
+
+            if sheet_rows_count >= max_rows_per_sheet:
+                part_number += 1
+                worksheet = create_sheet(base_sheet_name, part_number)
+                sheet_rows_count = 0
+                if header is not None:
+                    worksheet.append(header)
+                    sheet_rows_count += 1
+
+            worksheet.append(row_values)
+            sheet_rows_count += 1
+
+    workbook.save(file_path)
+
+    return written_sheet_names
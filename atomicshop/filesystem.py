@@ -985,7 +985,7 @@ def get_paths_from_directory(
         file, against the main path to directory that was passed to the parent function.
         """
 
-        if strings.match_pattern_against_string(file_name_check_pattern, file_or_directory):
+        if file_name_pattern_set.match(file_or_directory):
             file_or_dir_path: str = os.path.join(dir_path, file_or_directory)
 
             if simple_list:
@@ -1050,6 +1050,8 @@ def get_paths_from_directory(
     # === Function main ================
     # Define locals.
     object_list: list = list()
+    # Compile the pattern once for all the walked names.
+    file_name_pattern_set: strings.PatternSet = strings.compile_patterns([file_name_check_pattern])
 
     # "Walk" over all the directories and subdirectories - make list of full file paths inside the directory
     # recursively.
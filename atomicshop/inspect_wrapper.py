@@ -1,4 +1,11 @@
 import inspect
+import functools
+from typing import Union
+
+
+@functools.lru_cache(maxsize=None)
+def _get_cached_signature(function_name) -> inspect.Signature:
+    return inspect.signature(function_name)
 
 
 def get_target_function_default_args_and_combine_with_current(function_name, *args, **kwargs):
@@ -19,7 +26,8 @@ def get_target_function_default_args_and_combine_with_current(function_name, *ar
 
     # Fix:
     # Get default arguments signature from passed function.
-    default_signature = inspect.signature(function_name)
+    # The signature is computed once for each function, since 'inspect.signature' is slow.
+    default_signature = _get_cached_signature(function_name)
     # Get current arguments that were passed to the decorator.
     bound = default_signature.bind(*args, **kwargs)
     # Apply the default arguments that are set in the function.
@@ -44,6 +52,79 @@ def get_target_function_default_args_and_combine_with_current(function_name, *ar
     return args, kwargs
 
 
+def get_default_args_combiner(function_name):
+    """
+    Precompiled version of 'get_target_function_default_args_and_combine_with_current' for decorators.
+    The signature and the defaults of the function are resolved once, when the decorator is applied, and not on
+    each call with 'inspect.signature().bind().apply_defaults()'.
+
+    Usage:
+        def some_decorator(function_name):
+            combine_args = get_default_args_combiner(function_name)
+
+            @functools.wraps(function_name)
+            def wrapper(*args, **kwargs):
+                args, kwargs = combine_args(*args, **kwargs)
+                return function_name(**kwargs)
+
+            return wrapper
+
+    :param function_name: the target function.
+    :return: function, same arguments and result as
+        'get_target_function_default_args_and_combine_with_current' without the 'function_name'.
+    """
+
+    signature = _get_cached_signature(function_name)
+
+    # Only simple signatures are precompiled, the rest go to the regular 'bind' path.
+    positional_names: list = []
+    required_names: list = []
+    defaults: dict = {}
+    # Without '**kwargs' in the target function, keyword arguments that aren't in the signature are an error.
+    known_names: Union[set, None] = set()
+    for parameter in signature.parameters.values():
+        if parameter.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.VAR_POSITIONAL):
+            return functools.partial(get_target_function_default_args_and_combine_with_current, function_name)
+        if parameter.kind == inspect.Parameter.VAR_KEYWORD:
+            known_names = None
+            continue
+        if known_names is not None:
+            known_names.add(parameter.name)
+
+        if parameter.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
+            positional_names.append(parameter.name)
+        if parameter.default is inspect.Parameter.empty:
+            required_names.append(parameter.name)
+        else:
+            defaults[parameter.name] = parameter.default
+
+    def combine_args(*args, **kwargs) -> tuple[tuple, dict]:
+        if len(args) > len(positional_names):
+            raise TypeError(
+                f'{function_name.__name__}() takes {len(positional_names)} positional arguments '
+                f'but {len(args)} were given')
+
+        if known_names is not None:
+            for name in kwargs:
+                if name not in known_names:
+                    raise TypeError(f"{function_name.__name__}() got an unexpected keyword argument '{name}'")
+
+        combined_kwargs: dict = dict(defaults)
+        for name, value in zip(positional_names, args):
+            if name in kwargs:
+                raise TypeError(f"{function_name.__name__}() got multiple values for argument '{name}'")
+            combined_kwargs[name] = value
+        combined_kwargs.update(kwargs)
+
+        for name in required_names:
+            if name not in combined_kwargs:
+                raise TypeError(f"{function_name.__name__}() missing a required argument: '{name}'")
+
+        return (), combined_kwargs
+
+    return combine_args
+
+
 def get_api_commands_list() -> list:
     return ['logger', 'logger_method', 'stdout', 'stderr', 'exit_on_error']
 
@@ -82,6 +82,8 @@ class TCPServer:
     is_enabled: bool
     no_engines_usage_to_listen_addresses_enable: bool
     no_engines_listening_address_list: list[str]
+    # Domains / wildcard patterns that are relayed to the service without interception.
+    passthrough_domains: list[str]
 
     # Convertable variables.
     no_engines_usage_to_listen_addresses: dict
@@ -95,6 +97,9 @@ class LogRec:
     store_logs_for_x_days: int
     record_json: bool
     record_pcap: bool
+    network_log_level: str
+    network_log_sample_rate: float
+    archive_format: str
 
     recordings_directory_name: str = 'recs'
 
@@ -130,18 +130,17 @@ def thread_worker_main(
 
             auto_parsed = request_http_parsed
             network_logger.info(
-                f"HTTP Request Parsed: Method: {request_http_parsed.command} | Path: {request_http_parsed.path}")
+                "HTTP Request Parsed: Method: %s | Path: %s", request_http_parsed.command, request_http_parsed.path)
             http_path_queue.put(request_http_parsed.path)
-            network_logger.info(f"HTTP Request Parsed: Putting PATH to queue.")
+            network_logger.info("HTTP Request Parsed: Putting PATH to queue.")
 
             is_http_request_a_websocket(auto_parsed, client_message)
         elif is_http_response:
             auto_parsed = response_http_parsed
-            network_logger.info(
-                f"HTTP Response Parsed: Status: {response_http_parsed.code}")
+            network_logger.info("HTTP Response Parsed: Status: %s", response_http_parsed.code)
 
             auto_parsed.path = http_path_queue.get()
-            network_logger.info(f"HTTP Response Parsed: Got PATH from queue: [{auto_parsed.path}]")
+            network_logger.info("HTTP Response Parsed: Got PATH from queue: [%s]", auto_parsed.path)
         elif protocol == 'Websocket':
             client_message.protocol2 = 'Frame'
             auto_parsed = parse_websocket(raw_bytes)
@@ -167,7 +166,7 @@ def thread_worker_main(
                     if protocol3:
                         client_message.protocol3 = protocol3
 
-                    network_logger.info(f'Protocol upgraded to Websocket')
+                    network_logger.info('Protocol upgraded to Websocket')
 
     def parse_websocket(raw_bytes):
         try:
@@ -203,9 +202,10 @@ def thread_worker_main(
             client_socket.close()
 
             if send_connection_reset:
-                network_logger.info(f"Closed client socket [{client_ip}:{source_port}] with TCP RST flag (Sent ConnectionResetError)...")
+                network_logger.info(
+                    "Closed client socket [%s:%s] with TCP RST flag (Sent ConnectionResetError)...", client_ip, source_port)
             else:
-                network_logger.info(f"Closed client socket [{client_ip}:{source_port}]...")
+                network_logger.info("Closed client socket [%s:%s]...", client_ip, source_port)
 
         network_logger.info("Thread Finished. Will continue listening on the Main thread")
 
@@ -428,7 +428,7 @@ def thread_worker_main(
 
         client_receive_count += 1
 
-        network_logger.info(f"Initializing Receiver for Client cycle: {str(client_receive_count)}")
+        network_logger.info("Initializing Receiver for Client cycle: %d", client_receive_count)
         received_raw_data, is_socket_closed, error_message = receiver.Receiver(
             ssl_socket=receiving_socket, logger=network_logger).receive()
         client_message.timestamp = datetime.now()
@@ -509,7 +509,7 @@ def thread_worker_main(
 
         client_receive_count += 1
 
-        network_logger.info(f"Initializing Receiver for Client cycle: {str(client_receive_count)}")
+        network_logger.info("Initializing Receiver for Client cycle: %d", client_receive_count)
 
         # Getting message from the client over the socket using specific class.
         received_raw_data, is_socket_closed, error_on_receive = receiver.Receiver(
@@ -578,7 +578,7 @@ def thread_worker_main(
 
         server_receive_count += 1
 
-        network_logger.info(f"Initializing Receiver for Service cycle: {str(server_receive_count)}")
+        network_logger.info("Initializing Receiver for Service cycle: %d", server_receive_count)
 
         # Getting message from the client over the socket using specific class.
         received_raw_data, is_socket_closed, error_on_receive = receiver.Receiver(
@@ -748,7 +748,12 @@ def thread_worker_main(
 
     # ================================================================================================================
     # This is the start of the thread_worker_main function
-    network_logger = loggingw.get_logger_with_level(config_static.MainConfig.LOGGER_NAME)
+    # Connection scoped logger: the child loggers are resolved once for the connection, and below the gating level
+    # the messages are not formatted at all. Errors are always logged.
+    network_logger = loggingw.ConnectionLogger(
+        loggingw.get_logger_with_level(config_static.MainConfig.LOGGER_NAME),
+        logging_level=config_static.LogRec.network_log_level,
+        sample_rate=config_static.LogRec.network_log_sample_rate)
 
     # Only protocols that are encrypted with TLS have the server name attribute.
     if is_tls:
@@ -797,11 +802,9 @@ def thread_worker_main(
             responder.add_args(engine=engine)
             break
 
-    network_logger.info(f"Assigned Modules for [{server_name}]: "
-        f"{parser.__name__}, "
-        f"{requester.__class__.__name__}, "
-        f"{responder.__class__.__name__}, "
-        f"{recorder.__class__.__name__}")
+    network_logger.info(
+        "Assigned Modules for [%s]: %s, %s, %s, %s", server_name, parser.__name__, requester.__class__.__name__,
+        responder.__class__.__name__, recorder.__class__.__name__)
 
     # Initializing the client message object with current thread's data.
     # This is needed only to skip error alerts after 'try'.
@@ -836,8 +839,8 @@ def thread_worker_main(
             # If not in offline mode, we will get the ip from the socket that will connect later to the service.
             server_ip = ""
 
-        network_logger.info(f"Thread Created - Client [{client_ip}:{source_port}] | "
-                            f"Destination service: [{server_name}:{destination_port}]")
+        network_logger.info("Thread Created - Client [%s:%s] | Destination service: [%s:%d]",
+                            client_ip, source_port, server_name, destination_port)
 
         origin_service_client_instance = None
         client_receive_count: int = 0
@@ -11,7 +11,7 @@ from .... import filesystem
 from ....file_io import jsons
 from ....print_api import print_api
 
-PCAP_QUEUE = None  # multiprocessing.Queue, set by _create_tcp_server_process
+PCAP_QUEUE = None  # multiprocesses.SharedMemoryPayloadQueue, set by _create_tcp_server_process, None after stop
 
 
 # The class that is responsible for Recording Requests / Responses.
@@ -150,7 +150,9 @@ def save_message_worker(
             logger.info(f"Recorded to file: {record_file_path}")
 
         # Write pcap if enabled — send data to the pcap writer process via queue.
-        if config_static.LogRec.record_pcap and PCAP_QUEUE is not None:
+        # The queue is read once, since it is set to None when the TCP server process stops.
+        pcap_queue = PCAP_QUEUE
+        if config_static.LogRec.record_pcap and pcap_queue is not None:
             if class_client_message.action == "client_receive":
                 raw_bytes = class_client_message.request_raw_bytes
                 source_ip = class_client_message.client_ip
@@ -169,7 +171,7 @@ def save_message_worker(
                 raw_bytes = None
 
             if raw_bytes is not None:
-                PCAP_QUEUE.put({
+                pcap_queue.put({
                     'engine_dir': original_file_directory,
                     'source_ip': source_ip,
                     'dest_ip': dest_ip,
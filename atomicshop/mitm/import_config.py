@@ -6,6 +6,7 @@ from ..print_api import print_api
 from .. import config_init, filesystem, dns
 from ..permissions import permissions
 from ..wrappers.socketw import socket_base
+from ..wrappers.loggingw import loggingw
 from ..basics import booleans
 
 from . import config_static, initialize_engines
@@ -46,12 +47,17 @@ def import_config_files(
 
     config_static.TCPServer.is_enabled = bool(config_toml['tcp']['enable'])
     config_static.TCPServer.no_engines_usage_to_listen_addresses = config_toml['tcp']['no_engines_usage_to_listen_addresses']
+    config_static.TCPServer.passthrough_domains = config_toml['tcp'].get('passthrough_domains', list())
 
     config_static.LogRec.logs_path = config_toml['logrec']['logs_path']
     config_static.LogRec.enable_request_response_recordings_in_logs = bool(config_toml['logrec']['enable_request_response_recordings_in_logs'])
     config_static.LogRec.store_logs_for_x_days = config_toml['logrec']['store_logs_for_x_days']
     config_static.LogRec.record_json = bool(config_toml['logrec'].get('record_json', 1))
     config_static.LogRec.record_pcap = bool(config_toml['logrec'].get('record_pcap', 0))
+    config_static.LogRec.network_log_level = config_toml['logrec'].get('network_log_level', 'DEBUG')
+    # Checked and converted to float in 'check_config'.
+    config_static.LogRec.network_log_sample_rate = config_toml['logrec'].get('network_log_sample_rate', 1.0)
+    config_static.LogRec.archive_format = config_toml['logrec'].get('archive_format', 'zip')
 
     config_static.Certificates.install_ca_certificate_to_root_store = bool(config_toml['certificates']['install_ca_certificate_to_root_store'])
     config_static.Certificates.uninstall_unused_ca_certificates_with_mitm_ca_name = bool(config_toml['certificates']['uninstall_unused_ca_certificates_with_mitm_ca_name'])
@@ -196,6 +202,27 @@ def check_config() -> int:
         print_api("Both DNS and TCP servers in config ini file, nothing to run. Exiting...", color='red')
         return 1
 
+    if config_static.LogRec.archive_format not in ['zip', 'recs']:
+        print_api(
+            f"[logrec] archive_format must be 'zip' or 'recs', not [{config_static.LogRec.archive_format}]. Exiting...",
+            color='red')
+        return 1
+
+    try:
+        loggingw.get_logging_level_number(config_static.LogRec.network_log_level)
+    except ValueError as e:
+        print_api(f"[logrec] network_log_level: {e} Exiting...", color='red')
+        return 1
+
+    network_log_sample_rate = config_static.LogRec.network_log_sample_rate
+    if (isinstance(network_log_sample_rate, bool) or not isinstance(network_log_sample_rate, (int, float)) or
+            not 0 <= network_log_sample_rate <= 1):
+        print_api(
+            f"[logrec] network_log_sample_rate must be a number from 0 to 1, not [{network_log_sample_rate!r}]. "
+            f"Exiting...", color='red')
+        return 1
+    config_static.LogRec.network_log_sample_rate = float(network_log_sample_rate)
+
     if not config_static.MainConfig.is_localhost and not is_admin:
         # If we're not in localhost mode, this means we need to set virtual IPv4 addresses, which requires admin rights.
         message = "In order to run the server in non-localhost mode, administrative rights are required.\nExiting..."
@@ -90,7 +90,18 @@ EXCEPTIONS_CSV_LOGGER_QUEUE: multiprocessing.Queue = multiprocessing.Queue()
 # Create finalization queue for the rec archiving process.
 FINALIZE_RECS_ARCHIVE_QUEUE: multiprocessing.Queue = multiprocessing.Queue()
 
-PCAP_WRITER_QUEUE: multiprocessing.Queue = None  # Created only if record_pcap is enabled
+# Created only if record_pcap is enabled. The payloads go through shared memory, only descriptors through the queue.
+PCAP_WRITER_QUEUE: multiprocesses.SharedMemoryPayloadQueue = None
+PCAP_WRITER_PROCESS: multiprocessing.Process = None
+# Seconds to wait for the pcap writer to write the queued packets on exit.
+PCAP_WRITER_STOP_TIMEOUT_SECONDS: float = 10.0
+# The TCP server processes, the producers of the pcap writer queue.
+TCP_SERVER_PROCESSES: list[multiprocessing.Process] = list()
+# Set on exit, the TCP server processes return by themselves, so their queues are flushed.
+# noinspection PyTypeHints
+TCP_SERVER_STOP_EVENT: multiprocessing.Event = multiprocessing.Event()
+# Seconds to wait for the TCP server processes to stop by the stop event on exit, before they are terminated.
+TCP_SERVER_STOP_TIMEOUT_SECONDS: float = 10.0
 
 # Request queue to the SSH broker; created when the broker is needed (global
 # get_process_name on, or any engine's per-engine override turns it on).
@@ -142,7 +153,26 @@ def exit_cleanup():
 
     # Send stop signal to pcap writer process before terminating children.
     if PCAP_WRITER_QUEUE is not None:
+        # The pcap writer removes the shared memory rings of the recorders when it stops, so the TCP server processes
+        # that write to the rings are stopped first.
+        # They are stopped by the stop event and not terminated, since a process that is terminated in the middle
+        # of a queue write can leave the queue pipe locked or corrupted, and the stop signal would not get through.
+        # A process that returns by itself flushes its queues on exit.
+        TCP_SERVER_STOP_EVENT.set()
+        stop_deadline: float = time.monotonic() + TCP_SERVER_STOP_TIMEOUT_SECONDS
+        for process in TCP_SERVER_PROCESSES:
+            process.join(timeout=max(0.0, stop_deadline - time.monotonic()))
+        for process in TCP_SERVER_PROCESSES:
+            if process.is_alive():
+                print_api.print_api(
+                    f'TCP server process [{process.name}] did not stop in time, terminating.', color='yellow')
+                process.terminate()
+                process.join()
+
         PCAP_WRITER_QUEUE.put(None)
+        # Let the writer get to the stop signal and close the files before the children are terminated.
+        if PCAP_WRITER_PROCESS is not None:
+            PCAP_WRITER_PROCESS.join(timeout=PCAP_WRITER_STOP_TIMEOUT_SECONDS)
 
     # Send stop sentinel to the SSH broker before terminating children.
     if SSH_REQUEST_QUEUE is not None:
@@ -568,7 +598,8 @@ def mitm_server(config_file_path: str, script_version: str) -> int:
             config_static.LogRec.recordings_path,
             logging_queue=NETWORK_LOGGER_QUEUE,
             logger_name=network_logger_name,
-            finalize_output_queue=FINALIZE_RECS_ARCHIVE_QUEUE
+            finalize_output_queue=FINALIZE_RECS_ARCHIVE_QUEUE,
+            archive_format=config_static.LogRec.archive_format
         )
 
         archiver_result = FINALIZE_RECS_ARCHIVE_QUEUE.get()
@@ -648,10 +679,11 @@ def mitm_server(config_file_path: str, script_version: str) -> int:
                 listening_interfaces.append(current_interface_dict)
 
         # Start pcap writer process if recording pcap is enabled.
-        global PCAP_WRITER_QUEUE
+        global PCAP_WRITER_QUEUE, PCAP_WRITER_PROCESS
         if config_static.LogRec.record_pcap:
             from . import pcap_worker
-            PCAP_WRITER_QUEUE = multiprocessing.Queue()
+            PCAP_WRITER_QUEUE = multiprocesses.SharedMemoryPayloadQueue(
+                multiprocessing.Queue(), payload_key='raw_bytes')
             pcap_process = multiprocessing.Process(
                 target=pcap_worker.pcap_writer_worker,
                 args=(PCAP_WRITER_QUEUE, NETWORK_LOGGER_QUEUE, network_logger_name,
@@ -660,6 +692,7 @@ def mitm_server(config_file_path: str, script_version: str) -> int:
                 daemon=True
             )
             pcap_process.start()
+            PCAP_WRITER_PROCESS = pcap_process
             multiprocess_list.append(pcap_process)
 
         # Start the SSH broker process if process-name attribution is enabled.
@@ -770,6 +803,7 @@ def mitm_server(config_file_path: str, script_version: str) -> int:
                     skip_extension_id_list=config_static.SkipExtensions.SKIP_EXTENSION_ID_LIST,
                     enable_sslkeylogfile_env_to_client_ssl_context=config_static.Certificates.enable_sslkeylogfile_env_to_client_ssl_context,
                     sslkeylog_file_path=config_static.Certificates.sslkeylog_file_path,
+                    passthrough_domain_list=config_static.TCPServer.passthrough_domains,
                     print_kwargs=dict(stdout=False)
                 )
 
@@ -794,11 +828,13 @@ def mitm_server(config_file_path: str, script_version: str) -> int:
                     PCAP_WRITER_QUEUE,
                     ssh_request_queue,
                     ssh_response_queue,
-                    worker_id
+                    worker_id,
+                    TCP_SERVER_STOP_EVENT
                 ),
                 daemon=True
             )
             tcp_process.start()
+            TCP_SERVER_PROCESSES.append(tcp_process)
             multiprocess_list.append(tcp_process)
 
         # Compress recordings each day in a separate process.
@@ -878,10 +914,11 @@ def _create_tcp_server_process(
         network_logger_name: str,
         network_logger_queue: multiprocessing.Queue,
         is_tcp_process_ready: multiprocessing.Event,
-        pcap_writer_queue: multiprocessing.Queue = None,
+        pcap_writer_queue: multiprocesses.SharedMemoryPayloadQueue = None,
         ssh_request_queue: multiprocessing.Queue = None,
         ssh_response_queue: multiprocessing.Queue = None,
-        worker_id: int = None
+        worker_id: int = None,
+        stop_event: multiprocessing.Event = None
 ):
     # Load config_static per process, since it is not shared between processes.
     config_static.load_config(config_file_path, print_kwargs=dict(stdout=False))
@@ -949,8 +986,15 @@ def _create_tcp_server_process(
     is_tcp_process_ready.set()
 
     try:
+        # Keep the process alive, since the listening socket is in an infinite loop.
+        # On the stop event the function returns, and the process exits normally, the queues are flushed on exit.
         while True:
-            time.sleep(1)  # Keep the process alive, since the listening socket is in an infinite loop.
+            if stop_event is None:
+                time.sleep(1)
+            elif stop_event.wait(1):
+                # No new packets are queued to the pcap writer, so only the already queued ones are flushed on exit.
+                recorder___parent.PCAP_QUEUE = None
+                return
     except KeyboardInterrupt:
         sys.exit(0)
 
@@ -1077,7 +1121,8 @@ def _loop_at_midnight_recs_archive(network_logger_name):
                     config_static.LogRec.recordings_path,
                     logging_queue=NETWORK_LOGGER_QUEUE,
                     logger_name=network_logger_name,
-                    finalize_output_queue=FINALIZE_RECS_ARCHIVE_QUEUE
+                    finalize_output_queue=FINALIZE_RECS_ARCHIVE_QUEUE,
+                    archive_format=config_static.LogRec.archive_format
                 )
 
                 archiver_result = FINALIZE_RECS_ARCHIVE_QUEUE.get()
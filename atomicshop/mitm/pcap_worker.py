@@ -1,12 +1,265 @@
 import os
+import sys
+import time
+import queue
+import socket
+import struct
 import multiprocessing
+from array import array
 from datetime import datetime
+from typing import Union
 
 from . import recs_files
+from ..basics import multiprocesses
+
+
+# pcapng block types and constants.
+# https://www.ietf.org/archive/id/draft-ietf-opsawg-pcapng-02.html
+PCAPNG_SECTION_HEADER_BLOCK: int = 0x0A0D0D0A
+PCAPNG_INTERFACE_DESCRIPTION_BLOCK: int = 0x00000001
+PCAPNG_ENHANCED_PACKET_BLOCK: int = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC: int = 0x1A2B3C4D
+PCAPNG_OPTION_END: int = 0
+PCAPNG_OPTION_COMMENT: int = 1
+# Same link type that scapy uses for IP packets, the packets start with the IPv4 header.
+LINKTYPE_IPV4: int = 228
+
+# Max payload per packet: 65000 bytes.
+# Keeps each packet under both the IP/TCP 16-bit field limit (65535)
+# and Wireshark's pcapng cap_len limit (262144).
+MAX_CHUNK: int = 65000
+
+# Buffered data is written to the file after this time, even if the queue is not empty.
+FLUSH_INTERVAL_SECONDS: float = 1.0
+# TCP streams that didn't have packets for this time are removed from the sequence tracking.
+STREAM_IDLE_TIMEOUT_SECONDS: float = 600.0
+FILE_BUFFER_SIZE: int = 1024 * 1024
+
+_SECTION_HEADER_STRUCT = struct.Struct('<IIIHHqI')
+_INTERFACE_DESCRIPTION_STRUCT = struct.Struct('<IIHHII')
+_ENHANCED_PACKET_HEADER_STRUCT = struct.Struct('<IIIIIII')
+_OPTION_HEADER_STRUCT = struct.Struct('<HH')
+_BLOCK_TRAILER_STRUCT = struct.Struct('<I')
+_IPV4_HEADER_STRUCT = struct.Struct('!BBHHHBBH4s4s')
+_TCP_HEADER_STRUCT = struct.Struct('!HHIIHHHH')
+
+_IPV4_HEADER_LENGTH: int = _IPV4_HEADER_STRUCT.size
+_TCP_HEADER_LENGTH: int = _TCP_HEADER_STRUCT.size
+# Data offset 5 (20 bytes, no options), flags PSH + ACK.
+_TCP_OFFSET_AND_FLAGS: int = (5 << 12) | 0x18
+_TCP_WINDOW: int = 65535
+_IP_FLAG_DONT_FRAGMENT: int = 0x4000
+_IP_TTL: int = 64
+_IP_PROTOCOL_TCP: int = 6
+
+
+def _padding(length: int) -> bytes:
+    return b'\x00' * (-length % 4)
+
+
+def _ones_complement_sum(data: bytes) -> int:
+    # Summing 16-bit words with 'array' runs in C. The words are in native byte order, and the one's complement sum
+    # is byte order independent, so the folded result is swapped to network order at the end.
+    if len(data) % 2:
+        data += b'\x00'
+    total: int = sum(array('H', data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    if sys.byteorder == 'little':
+        total = ((total & 0xFF) << 8) | (total >> 8)
+    return total
+
+
+def _finish_checksum(total: int) -> int:
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+class PcapngWriter:
+    """
+    Minimal pcapng writer of IPv4 packets, with a comment on each packet.
+    Blocks are packed with 'struct' into a buffered file, call 'flush' to write the buffered blocks to the disk.
+    Each writer starts a new section (Section Header Block + Interface Description Block), so appending to an existing
+    pcapng file keeps it valid, Wireshark reads all the sections of the file.
+    """
+
+    def __init__(self, file_path: str, buffer_size: int = FILE_BUFFER_SIZE):
+        """
+        :param file_path: string, full path to the pcapng file. If the file exists, new section is appended to it.
+        :param buffer_size: integer, size of the file write buffer.
+        """
+
+        self.file_path: str = file_path
+        self._file_object = open(file_path, 'ab', buffer_size)
+
+        # Both blocks have no options, the structs include the trailing block length.
+        section_header_length: int = _SECTION_HEADER_STRUCT.size
+        interface_description_length: int = _INTERFACE_DESCRIPTION_STRUCT.size
+        self._file_object.write(
+            _SECTION_HEADER_STRUCT.pack(
+                PCAPNG_SECTION_HEADER_BLOCK, section_header_length, PCAPNG_BYTE_ORDER_MAGIC, 1, 0, -1,
+                section_header_length) +
+            _INTERFACE_DESCRIPTION_STRUCT.pack(
+                PCAPNG_INTERFACE_DESCRIPTION_BLOCK, interface_description_length, LINKTYPE_IPV4, 0, 0,
+                interface_description_length)
+        )
+
+    def write_packet(self, packet_bytes: bytes, timestamp: float, comment: bytes = None):
+        """
+        Write Enhanced Packet Block.
+
+        :param packet_bytes: bytes, the packet, starting with the IPv4 header.
+        :param timestamp: float, seconds since the epoch.
+        :param comment: bytes, the comment of the packet. None for no comment.
+        """
+
+        options: bytes = b''
+        if comment:
+            options = (
+                _OPTION_HEADER_STRUCT.pack(PCAPNG_OPTION_COMMENT, len(comment)) + comment + _padding(len(comment)) +
+                _OPTION_HEADER_STRUCT.pack(PCAPNG_OPTION_END, 0)
+            )
+
+        packet_length: int = len(packet_bytes)
+        block_length: int = (
+            _ENHANCED_PACKET_HEADER_STRUCT.size + packet_length + (-packet_length % 4) + len(options) +
+            _BLOCK_TRAILER_STRUCT.size)
+        # Default interface timestamp resolution is microseconds.
+        timestamp_microseconds: int = int(timestamp * 1_000_000)
+
+        write = self._file_object.write
+        write(_ENHANCED_PACKET_HEADER_STRUCT.pack(
+            PCAPNG_ENHANCED_PACKET_BLOCK, block_length, 0,
+            timestamp_microseconds >> 32, timestamp_microseconds & 0xFFFFFFFF, packet_length, packet_length))
+        write(packet_bytes)
+        write(_padding(packet_length) + options + _BLOCK_TRAILER_STRUCT.pack(block_length))
+
+    def flush(self):
+        self._file_object.flush()
+
+    def close(self):
+        self._file_object.close()
+
+
+class TcpStreamsPacketBuilder:
+    """
+    Build IPv4/TCP packets of the recorded payloads, with sequence numbers tracking per connection direction,
+    so Wireshark sees coherent TCP streams.
+    The addresses part of the headers and the checksums of the constant fields are computed once per direction.
+    """
+
+    def __init__(self, idle_timeout_seconds: float = STREAM_IDLE_TIMEOUT_SECONDS):
+        """
+        :param idle_timeout_seconds: float, streams without packets for this time are removed by
+            'expire_idle_streams'. The next packet of removed stream starts the sequence numbers again.
+        """
+
+        self.idle_timeout_seconds: float = idle_timeout_seconds
+
+        # Key: frozenset({(ip1, port1), (ip2, port2)})
+        # Value: {'seq': {(ip, port): seq_counter, ...}, 'last_seen': float}  — one seq counter per direction
+        self._streams: dict = {}
+        # Key: (source_ip, source_port, dest_ip, dest_port)
+        # Value: (ip addresses bytes, ip header partial sum, tcp pseudo header partial sum)
+        self._directions: dict = {}
+        self._ip_identification: int = 0
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def build_packets(
+            self,
+            source_ip: str,
+            source_port: int,
+            dest_ip: str,
+            dest_port: int,
+            payload: bytes,
+            max_chunk: int = MAX_CHUNK
+    ) -> list[bytes]:
+        """
+        Build the packets of the payload, split to chunks of 'max_chunk' bytes.
+
+        :return: list of bytes, the packets starting with the IPv4 header.
+        """
+
+        source_endpoint: tuple = (source_ip, source_port)
+        dest_endpoint: tuple = (dest_ip, dest_port)
+        connection_key = frozenset({source_endpoint, dest_endpoint})
+        stream = self._streams.get(connection_key)
+        if stream is None:
+            stream = {'seq': {source_endpoint: 1, dest_endpoint: 1}, 'last_seen': 0.0}
+            self._streams[connection_key] = stream
+        stream['last_seen'] = time.monotonic()
+        sequences: dict = stream['seq']
+
+        direction_key: tuple = (source_ip, source_port, dest_ip, dest_port)
+        direction = self._directions.get(direction_key)
+        if direction is None:
+            addresses: bytes = socket.inet_aton(source_ip) + socket.inet_aton(dest_ip)
+            addresses_sum: int = _ones_complement_sum(addresses)
+            ip_partial_sum: int = (
+                addresses_sum + (0x4500 + _IP_FLAG_DONT_FRAGMENT + ((_IP_TTL << 8) | _IP_PROTOCOL_TCP)))
+            tcp_partial_sum: int = addresses_sum + _IP_PROTOCOL_TCP + source_port + dest_port + \
+                _TCP_OFFSET_AND_FLAGS + _TCP_WINDOW
+            direction = (addresses, ip_partial_sum, tcp_partial_sum)
+            self._directions[direction_key] = direction
+        addresses, ip_partial_sum, tcp_partial_sum = direction
+
+        payload_view = memoryview(payload)
+        packets: list = []
+        for chunk_start in range(0, len(payload), max_chunk):
+            chunk = payload_view[chunk_start:chunk_start + max_chunk]
+            chunk_length: int = len(chunk)
+            sequence: int = sequences[source_endpoint] & 0xFFFFFFFF
+            acknowledgment: int = sequences[dest_endpoint] & 0xFFFFFFFF
+
+            total_length: int = _IPV4_HEADER_LENGTH + _TCP_HEADER_LENGTH + chunk_length
+            self._ip_identification = (self._ip_identification + 1) & 0xFFFF
+            ip_checksum: int = _finish_checksum(ip_partial_sum + total_length + self._ip_identification)
+
+            tcp_length: int = _TCP_HEADER_LENGTH + chunk_length
+            tcp_checksum: int = _finish_checksum(
+                tcp_partial_sum + tcp_length +
+                (sequence >> 16) + (sequence & 0xFFFF) + (acknowledgment >> 16) + (acknowledgment & 0xFFFF) +
+                _ones_complement_sum(bytes(chunk)))
+
+            packets.append(
+                _IPV4_HEADER_STRUCT.pack(
+                    0x45, 0, total_length, self._ip_identification, _IP_FLAG_DONT_FRAGMENT, _IP_TTL,
+                    _IP_PROTOCOL_TCP, ip_checksum, addresses[:4], addresses[4:]) +
+                _TCP_HEADER_STRUCT.pack(
+                    source_port, dest_port, sequence, acknowledgment, _TCP_OFFSET_AND_FLAGS, _TCP_WINDOW,
+                    tcp_checksum, 0) +
+                chunk
+            )
+            sequences[source_endpoint] += chunk_length
+
+        return packets
+
+    def expire_idle_streams(self) -> int:
+        """
+        Remove the streams that were idle more than 'idle_timeout_seconds'.
+
+        :return: integer, number of removed streams.
+        """
+
+        expire_before: float = time.monotonic() - self.idle_timeout_seconds
+        expired_keys: list = [key for key, stream in self._streams.items() if stream['last_seen'] < expire_before]
+        for key in expired_keys:
+            endpoints: list = list(key)
+            if len(endpoints) == 1:
+                endpoints.append(endpoints[0])
+            (first_ip, first_port), (second_ip, second_port) = endpoints
+            self._directions.pop((first_ip, first_port, second_ip, second_port), None)
+            self._directions.pop((second_ip, second_port, first_ip, first_port), None)
+            del self._streams[key]
+
+        return len(expired_keys)
 
 
 def pcap_writer_worker(
-        pcap_queue: multiprocessing.Queue,
+        pcap_queue: Union[multiprocesses.SharedMemoryPayloadQueue, multiprocessing.Queue],
         logging_queue: multiprocessing.Queue,
         logger_name: str,
         recordings_path: str
@@ -14,6 +267,11 @@ def pcap_writer_worker(
     """
     Multiprocessing worker that receives pcap data from a queue and writes
     to per-engine daily pcapng files with thread_id comments.
+    With 'multiprocesses.SharedMemoryPayloadQueue' the 'raw_bytes' are read from the shared memory of the recorders.
+    The packets are written to buffered files, that are flushed when the queue is idle or every
+    'FLUSH_INTERVAL_SECONDS'.
+    Send the 'None' stop signal only after all the processes that put to the queue stopped, since the shared memory
+    rings are removed when the worker stops.
     """
     from ..wrappers.loggingw import loggingw
 
@@ -25,25 +283,25 @@ def pcap_writer_worker(
     )
     logger = loggingw.get_logger_with_level(f'{logger_name}.pcap_writer')
 
-    # Suppress scapy import warning.
-    import logging as _logging
-    _logging.getLogger("scapy.loading").setLevel(_logging.ERROR)
-    from scapy.layers.inet import IP, TCP
-    from scapy.packet import Raw
-    from scapy.utils import PcapNgWriter
-    from scapy.config import conf
-
-    # {engine_dir: {'writer': PcapNgWriter, 'date': str, 'path': str}}
+    # {engine_dir: {'writer': PcapngWriter, 'date': str, 'path': str}}
     writers: dict = {}
+    packet_builder = TcpStreamsPacketBuilder()
+    last_flush_time: float = time.monotonic()
 
-    # Per-connection TCP sequence tracking so Wireshark sees coherent streams.
-    # Key: frozenset({(ip1, port1), (ip2, port2)})
-    # Value: {(ip, port): seq_counter, ...}  — one seq counter per direction
-    tcp_streams: dict = {}
+    def flush_writers():
+        nonlocal last_flush_time
+        for info in writers.values():
+            info['writer'].flush()
+        packet_builder.expire_idle_streams()
+        last_flush_time = time.monotonic()
 
     try:
         while True:
-            msg = pcap_queue.get()
+            try:
+                msg = pcap_queue.get(timeout=FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                flush_writers()
+                continue
 
             # None = stop signal
             if msg is None:
@@ -58,58 +316,25 @@ def pcap_writer_worker(
                 if writer_info is not None:
                     writer_info['writer'].close()
                 pcap_file_path = f'{engine_dir}{os.sep}{current_date}.pcapng'
-                append = os.path.exists(pcap_file_path) and os.path.getsize(pcap_file_path) > 0
-                # PcapNgWriter always opens in "wb" (truncating). When appending,
-                # construct on devnull to avoid destroying the existing file.
-                writer = PcapNgWriter(os.devnull if append else pcap_file_path)
-                if append:
-                    writer.f.close()
-                    writer.f = open(pcap_file_path, "ab", 4096)
-                    writer.header_present = True
-                    # write_header() won't run (header_present=True), so set linktype
-                    # manually — scapy's write() needs it.
-                    writer.linktype = conf.l2types.layer2num[IP]
-                writer.sync = True
-                writer_info = {'writer': writer, 'date': current_date, 'path': pcap_file_path}
+                writer_info = {'writer': PcapngWriter(pcap_file_path), 'date': current_date, 'path': pcap_file_path}
                 writers[engine_dir] = writer_info
 
-            # Max payload per packet: 65000 bytes.
-            # Keeps each packet under both the IP/TCP 16-bit field limit (65535)
-            # and Wireshark's pcapng cap_len limit (262144).
-            MAX_CHUNK = 65000
-
-            raw_bytes = msg['raw_bytes']
-            chunks = [raw_bytes[i:i + MAX_CHUNK] for i in range(0, len(raw_bytes), MAX_CHUNK)]
-            total_chunks = len(chunks)
-
-            # Look up or initialize TCP stream state for this connection.
-            src_ep = (msg['source_ip'], msg['source_port'])
-            dst_ep = (msg['dest_ip'], msg['dest_port'])
-            conn_key = frozenset({src_ep, dst_ep})
-            if conn_key not in tcp_streams:
-                tcp_streams[conn_key] = {src_ep: 1, dst_ep: 1}
-            stream = tcp_streams[conn_key]
-
-            for chunk_idx, chunk in enumerate(chunks):
-                current_seq = stream[src_ep]
-                current_ack = stream[dst_ep]
-                packet = IP(
-                    src=msg['source_ip'], dst=msg['dest_ip']
-                ) / TCP(
-                    sport=msg['source_port'], dport=msg['dest_port'],
-                    seq=current_seq, ack=current_ack, flags='PA'
-                ) / Raw(load=chunk)
-                packet.time = msg['timestamp']
-
-                comment = f"thread_id={msg['thread_id']}"
-                if msg.get('process_name'):
-                    comment += f" | process_cmdline={msg['process_name']}"
+            packets: list = packet_builder.build_packets(
+                msg['source_ip'], msg['source_port'], msg['dest_ip'], msg['dest_port'], msg['raw_bytes'])
+            total_chunks = len(packets)
+
+            comment_base = f"thread_id={msg['thread_id']}"
+            if msg.get('process_name'):
+                comment_base += f" | process_cmdline={msg['process_name']}"
+
+            for chunk_idx, packet in enumerate(packets):
+                comment = comment_base
                 if total_chunks > 1:
                     comment += f" | chunk={chunk_idx + 1}/{total_chunks}"
-                packet.comments = [comment.encode()]
+                writer_info['writer'].write_packet(packet, msg['timestamp'], comment.encode())
 
-                writer_info['writer'].write(packet)
-                stream[src_ep] += len(chunk)
+            if time.monotonic() - last_flush_time >= FLUSH_INTERVAL_SECONDS:
+                flush_writers()
 
             logger.info(f"Appended to pcap file: {writer_info['path']}")
     except KeyboardInterrupt:
@@ -121,3 +346,8 @@ def pcap_writer_worker(
             info['writer'].close()
         except Exception:
             pass
+
+    # The stop signal is sent only after the TCP server processes (the producers) were stopped, see
+    # 'mitm_main.exit_cleanup', so the shared memory rings of the recorders can be removed.
+    if isinstance(pcap_queue, multiprocesses.SharedMemoryPayloadQueue):
+        pcap_queue.close()
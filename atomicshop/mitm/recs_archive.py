@@ -0,0 +1,365 @@
+"""
+Seekable archive format for the recording files.
+Instead of a zip of the recording json files, each message of the recordings is a record. The records are written in
+zlib compressed chunks, that are compressed in parallel, and an index of all the records (with the time, engine,
+host and thread id of each) is written at the end of the archive. Reading one record decompresses only its chunk.
+
+Archive layout:
+    ARCHIVE_MAGIC
+    chunk 0 (zlib compressed json lines of the records)
+    chunk 1
+    ...
+    index (zlib compressed json: {'chunks': [...], 'records': [...]})
+    footer (index offset, index size, ARCHIVE_MAGIC)
+"""
+
+import os
+import json
+import zlib
+import struct
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Iterable, Generator
+
+
+ARCHIVE_EXTENSION: str = '.recs'
+ARCHIVE_MAGIC: bytes = b'ATRECS01'
+# Size of the uncompressed records in each chunk. Smaller chunks are faster to read a single record from,
+# larger chunks compress better.
+DEFAULT_CHUNK_SIZE: int = 1024 * 1024
+DEFAULT_COMPRESSION_LEVEL: int = 6
+# Same as 'message.ClientMessage.__iter__' timestamp format.
+RECORD_TIMESTAMP_FORMAT: str = '%Y-%m-%d-%H:%M:%S.%f'
+
+_FOOTER_STRUCT = struct.Struct('<QQ8s')
+
+# Positions of the fields in each record entry of the index.
+_RECORD_CHUNK: int = 0
+_RECORD_OFFSET: int = 1
+_RECORD_LENGTH: int = 2
+_RECORD_TIMESTAMP: int = 3
+_RECORD_ENGINE: int = 4
+_RECORD_HOST: int = 5
+_RECORD_THREAD_ID: int = 6
+_RECORD_FILE: int = 7
+
+
+def _get_record_timestamp(record: dict) -> Union[float, None]:
+    try:
+        return datetime.datetime.strptime(record['timestamp'], RECORD_TIMESTAMP_FORMAT).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _iterate_file_records(file_path: str) -> Generator[dict, None, None]:
+    # Recording files are json lists of messages, any other json content is stored as one record.
+    with open(file_path, 'r') as file_object:
+        content = json.load(file_object)
+
+    if isinstance(content, list):
+        yield from content
+    else:
+        yield content
+
+
+def write_archive(
+        file_paths: Iterable[str],
+        archive_path: str,
+        names_root_directory: str,
+        engine_name: str = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        max_workers: int = None
+) -> int:
+    """
+    Write the recording json files to a seekable archive.
+    The chunks are compressed in a thread pool ('zlib' releases the GIL while compressing), and written in order.
+
+    :param file_paths: iterable of strings, full paths of the recording json files.
+    :param archive_path: string, full path of the archive to write.
+    :param names_root_directory: string, the name of each file in the archive is its path relative to this directory.
+    :param engine_name: string, the engine of the records that don't have the 'engine_name' key.
+        If None, the name of the directory of the file is used, same as the recordings directory structure.
+    :param chunk_size: integer, size of the uncompressed records in each chunk.
+    :param compression_level: integer, zlib compression level 1-9.
+    :param max_workers: integer, number of compression threads. None is the number of CPUs.
+    :return: integer, number of records written.
+    """
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    chunks_table: list = []
+    records_index: list = []
+    # The futures of the chunks that weren't written yet, bounded to keep the memory bounded.
+    pending_chunks: list = []
+    chunk_buffer: bytearray = bytearray()
+
+    temp_archive_path: str = f'{archive_path}.{os.getpid()}.tmp'
+    with open(temp_archive_path, 'wb') as archive_file, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        archive_file.write(ARCHIVE_MAGIC)
+
+        def write_oldest_pending_chunk():
+            uncompressed_size, future = pending_chunks.pop(0)
+            compressed_chunk: bytes = future.result()
+            chunks_table.append([archive_file.tell(), len(compressed_chunk), uncompressed_size])
+            archive_file.write(compressed_chunk)
+
+        def submit_chunk():
+            nonlocal chunk_buffer
+            pending_chunks.append(
+                (len(chunk_buffer), executor.submit(zlib.compress, bytes(chunk_buffer), compression_level)))
+            chunk_buffer = bytearray()
+            if len(pending_chunks) > max_workers * 2:
+                write_oldest_pending_chunk()
+
+        for file_path in file_paths:
+            file_name: str = os.path.relpath(file_path, names_root_directory)
+            if engine_name is None:
+                file_engine_name: str = os.path.basename(os.path.dirname(os.path.abspath(file_path)))
+            else:
+                file_engine_name = engine_name
+
+            for record in _iterate_file_records(file_path):
+                record_bytes: bytes = json.dumps(record).encode() + b'\n'
+
+                if isinstance(record, dict):
+                    engine: str = record.get('engine_name') or file_engine_name
+                    host: Union[str, None] = record.get('server_name')
+                    thread_id = record.get('thread_id')
+                else:
+                    engine, host, thread_id = file_engine_name, None, None
+
+                # The chunk number is the number of chunks that were submitted before.
+                records_index.append([
+                    len(chunks_table) + len(pending_chunks), len(chunk_buffer), len(record_bytes),
+                    _get_record_timestamp(record) if isinstance(record, dict) else None,
+                    engine, host, thread_id, file_name
+                ])
+                chunk_buffer += record_bytes
+
+                if len(chunk_buffer) >= chunk_size:
+                    submit_chunk()
+
+        if chunk_buffer:
+            submit_chunk()
+        while pending_chunks:
+            write_oldest_pending_chunk()
+
+        index_bytes: bytes = zlib.compress(
+            json.dumps({'chunks': chunks_table, 'records': records_index}).encode(), compression_level)
+        index_offset: int = archive_file.tell()
+        archive_file.write(index_bytes)
+        archive_file.write(_FOOTER_STRUCT.pack(index_offset, len(index_bytes), ARCHIVE_MAGIC))
+
+    os.replace(temp_archive_path, archive_path)
+
+    return len(records_index)
+
+
+def archive_directory(
+        directory_path: str,
+        include_root_directory: bool = True,
+        max_workers: int = None
+) -> str:
+    """
+    Archive all the recording json files of the directory to '<directory_path>.recs'.
+    Same as 'recs_files.archive', but with the seekable archive format.
+
+    :param directory_path: string, full path to the directory.
+    :param include_root_directory: boolean, if True, the names of the files in the archive include the name of the
+        directory.
+    :param max_workers: integer, number of compression threads. None is the number of CPUs.
+    :return: string, full path to the archive.
+    """
+
+    file_paths: list = []
+    for root, _, files in os.walk(directory_path):
+        for file in sorted(files):
+            file_paths.append(os.path.join(root, file))
+
+    if include_root_directory:
+        names_root_directory: str = os.path.dirname(directory_path)
+    else:
+        names_root_directory = directory_path
+
+    archive_path: str = directory_path + ARCHIVE_EXTENSION
+    write_archive(
+        file_paths, archive_path, names_root_directory,
+        engine_name=os.path.basename(os.path.dirname(directory_path)), max_workers=max_workers)
+
+    return archive_path
+
+
+class RecsArchiveReader:
+    """
+    Random access reader of the archives of 'write_archive'.
+    Only the index is read on open, each record read decompresses only its chunk. The last decompressed chunk is
+    cached, so reading records of the same chunk one after another is fast.
+
+    Usage:
+        with RecsArchiveReader('/recs/engine/2025-01-01.recs') as reader:
+            record_ids: list = reader.find(host='example.com', thread_id=1234)
+            for record in reader.iterate_records(record_ids):
+                print(record)
+    """
+
+    def __init__(self, archive_path: str):
+        """
+        :param archive_path: string, full path to the archive.
+        """
+
+        self.archive_path: str = archive_path
+        self._file_object = open(archive_path, 'rb')
+        self._lock = threading.Lock()
+        self._cached_chunk_id: Union[int, None] = None
+        self._cached_chunk: bytes = b''
+
+        try:
+            if self._file_object.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                raise ValueError(f'Not a recordings archive: {archive_path}')
+
+            self._file_object.seek(-_FOOTER_STRUCT.size, os.SEEK_END)
+            index_offset, index_size, footer_magic = _FOOTER_STRUCT.unpack(self._file_object.read(_FOOTER_STRUCT.size))
+            if footer_magic != ARCHIVE_MAGIC:
+                raise ValueError(f'Recordings archive is not complete: {archive_path}')
+
+            self._file_object.seek(index_offset)
+            index: dict = json.loads(zlib.decompress(self._file_object.read(index_size)))
+        except Exception:
+            self._file_object.close()
+            raise
+
+        self._chunks: list = index['chunks']
+        self._records: list = index['records']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def close(self):
+        self._file_object.close()
+
+    def get_record_info(self, record_id: int) -> dict:
+        """
+        Get the index entry of the record, without reading the record.
+
+        :param record_id: integer, the number of the record in the archive.
+        :return: dict with the keys: 'timestamp' (float, seconds since the epoch), 'engine', 'host', 'thread_id',
+            'file' (the name of the original recording file).
+        """
+
+        record_entry: list = self._records[record_id]
+        return {
+            'timestamp': record_entry[_RECORD_TIMESTAMP],
+            'engine': record_entry[_RECORD_ENGINE],
+            'host': record_entry[_RECORD_HOST],
+            'thread_id': record_entry[_RECORD_THREAD_ID],
+            'file': record_entry[_RECORD_FILE]
+        }
+
+    def find(
+            self,
+            engine: str = None,
+            host: str = None,
+            thread_id=None,
+            file_name: str = None,
+            time_from: datetime.datetime = None,
+            time_to: datetime.datetime = None
+    ) -> list[int]:
+        """
+        Find records by the index, without reading the records. Only the specified filters are checked.
+
+        :param engine: string, the engine name.
+        :param host: string, the server name of the message.
+        :param thread_id: the thread id of the message.
+        :param file_name: string, the name of the original recording file in the archive.
+        :param time_from: datetime, the records from this time, including.
+        :param time_to: datetime, the records until this time, including.
+        :return: list of integers, the record ids.
+        """
+
+        timestamp_from: Union[float, None] = time_from.timestamp() if time_from else None
+        timestamp_to: Union[float, None] = time_to.timestamp() if time_to else None
+
+        record_ids: list = []
+        for record_id, record_entry in enumerate(self._records):
+            if engine is not None and record_entry[_RECORD_ENGINE] != engine:
+                continue
+            if host is not None and record_entry[_RECORD_HOST] != host:
+                continue
+            if thread_id is not None and record_entry[_RECORD_THREAD_ID] != thread_id:
+                continue
+            if file_name is not None and record_entry[_RECORD_FILE] != file_name:
+                continue
+            if timestamp_from is not None or timestamp_to is not None:
+                record_timestamp = record_entry[_RECORD_TIMESTAMP]
+                if record_timestamp is None:
+                    continue
+                if timestamp_from is not None and record_timestamp < timestamp_from:
+                    continue
+                if timestamp_to is not None and record_timestamp > timestamp_to:
+                    continue
+            record_ids.append(record_id)
+
+        return record_ids
+
+    def read_record(self, record_id: int) -> dict:
+        """
+        Read one record.
+
+        :param record_id: integer, the number of the record in the archive.
+        :return: dict, the recorded message.
+        """
+
+        record_entry: list = self._records[record_id]
+        chunk: bytes = self._get_chunk(record_entry[_RECORD_CHUNK])
+        record_offset: int = record_entry[_RECORD_OFFSET]
+        return json.loads(chunk[record_offset:record_offset + record_entry[_RECORD_LENGTH]])
+
+    def iterate_records(self, record_ids: Iterable[int] = None) -> Generator[dict, None, None]:
+        """
+        Read records one by one.
+
+        :param record_ids: iterable of integers, the record ids. If None, all the records by their order.
+        :return: generator of dicts.
+        """
+
+        if record_ids is None:
+            record_ids = range(len(self._records))
+
+        for record_id in record_ids:
+            yield self.read_record(record_id)
+
+    def read_file(self, file_name: str) -> list[dict]:
+        """
+        Get the content of an original recording file.
+
+        :param file_name: string, the name of the file in the archive.
+        :return: list of dicts, the messages of the file.
+        """
+
+        return list(self.iterate_records(self.find(file_name=file_name)))
+
+    def get_file_names(self) -> list[str]:
+        """
+        :return: list of strings, the names of the original recording files in the archive.
+        """
+
+        return list(dict.fromkeys(record_entry[_RECORD_FILE] for record_entry in self._records))
+
+    def _get_chunk(self, chunk_id: int) -> bytes:
+        with self._lock:
+            if chunk_id != self._cached_chunk_id:
+                chunk_offset, compressed_size, _ = self._chunks[chunk_id]
+                self._file_object.seek(chunk_offset)
+                self._cached_chunk = zlib.decompress(self._file_object.read(compressed_size))
+                self._cached_chunk_id = chunk_id
+
+            return self._cached_chunk
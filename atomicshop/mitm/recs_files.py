@@ -7,6 +7,7 @@ import shutil
 
 from .. import filesystem, print_api
 from .. wrappers.loggingw import consts, loggingw
+from . import recs_archive
 
 
 REC_FILE_DATE_TIME_MILLISECONDS_FORMAT: str = f'{consts.DEFAULT_ROTATING_SUFFIXES_FROM_WHEN["S"]}_%f'
@@ -17,6 +18,7 @@ REC_FILE_DATE_FORMAT: str = REC_FILE_DATE_TIME_FORMAT.split('_')[0]
 def archive(
         directory_path: str,
         include_root_directory: bool = True,
+        archive_format: str = 'zip'
 ) -> str:
     """
     Function archives the directory.
@@ -25,9 +27,18 @@ def archive(
         'True': The root directory will be included in the archive.
         'False': The root directory will not be included in the archive.
         True is usually the case in most archiving utilities.
+    :param archive_format: string, the format of the archive.
+        'zip': Regular zip archive of the files.
+        'recs': Seekable archive with an index of the recorded messages, see 'recs_archive' module.
+            Single messages can be read with 'recs_archive.RecsArchiveReader' without extracting the archive.
     :return: string, full path to the archived file.
     """
 
+    if archive_format == 'recs':
+        return recs_archive.archive_directory(directory_path, include_root_directory=include_root_directory)
+    elif archive_format != 'zip':
+        raise ValueError(f"Unsupported archive format: {archive_format}")
+
     # This is commonly used and supported by most ZIP utilities.
     compression_method = zipfile.ZIP_DEFLATED
 
@@ -52,7 +63,8 @@ def recs_archiver(
         recs_directory: str,
         logging_queue: multiprocessing.Queue,
         logger_name: str,
-        finalize_output_queue: multiprocessing.Queue
+        finalize_output_queue: multiprocessing.Queue,
+        archive_format: str = 'zip'
 ) -> list | None:
     """
     Find recs files in a directory for each day.
@@ -63,6 +75,7 @@ def recs_archiver(
     :param logger_name: The name of the logger to use for logging.
         This is the base name that '.rec_packer' will be added to it.
     :param finalize_output_queue: output queue for results/exceptions.
+    :param archive_format: string, 'zip' or 'recs'. Check 'archive' function for details.
     """
 
     logger_name = f"{logger_name}.rec_packer"
@@ -132,7 +145,8 @@ def recs_archiver(
                     files_to_archive: list = filesystem.get_paths_from_directory(
                         directory_path=archive_directory.path, get_file=True, recursive=False)
                     total_archived_files += len(files_to_archive)
-                    archived_file: str = archive(archive_directory.path, include_root_directory=True)
+                    archived_file: str = archive(
+                        archive_directory.path, include_root_directory=True, archive_format=archive_format)
                     # Remove the original directory after archiving.
                     shutil.rmtree(archive_directory.path, ignore_errors=True)
                     archived_files.append(archived_file)
@@ -166,7 +180,8 @@ def recs_archiver_in_process(
         recs_directory: str,
         logging_queue: multiprocessing.Queue,
         logger_name: str,
-        finalize_output_queue: multiprocessing.Queue
+        finalize_output_queue: multiprocessing.Queue,
+        archive_format: str = 'zip'
 ) -> multiprocessing.Process:
     """
     Archive recs files in a directory for each day in a separate process.
@@ -175,9 +190,11 @@ def recs_archiver_in_process(
     :param logging_queue: The queue for logging messages.
     :param logger_name: The name of the logger to use for logging.
     :param finalize_output_queue: output queue for results/exceptions.
+    :param archive_format: string, 'zip' or 'recs'. Check 'archive' function for details.
     """
 
     process = multiprocessing.Process(
-        target=recs_archiver, args=(recs_directory, logging_queue, logger_name, finalize_output_queue))
+        target=recs_archiver,
+        args=(recs_directory, logging_queue, logger_name, finalize_output_queue, archive_format))
     process.start()
     return process
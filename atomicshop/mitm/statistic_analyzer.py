@@ -333,13 +333,16 @@ def analyze(main_file_path: str):
                 for day_number, counter in days.items():
                     combined_sorted_stats[f'daily_{feature_name}']['Day' + str(day_number)].append(counter)
 
-    try:
-        xlsxs.write_xlsx(combined_sorted_stats, file_path=summary_path)
-    except FileNotFoundError:
-        directory_path = filesystem.get_file_directory(summary_path)
+    # The rows are consumed while writing, so the directory should exist before.
+    directory_path = filesystem.get_file_directory(summary_path)
+    if directory_path and not os.path.isdir(directory_path):
         print_api(f'Directory does not exist, creating it: {directory_path}')
         filesystem.create_directory(directory_path)
-        xlsxs.write_xlsx(combined_sorted_stats, file_path=summary_path)
+
+    xlsxs.write_xlsx_streaming(
+        {sheet_name: xlsxs.iterate_rows_from_columns(sheet_data)
+         for sheet_name, sheet_data in combined_sorted_stats.items()},
+        file_path=summary_path)
 
     return
 
@@ -362,7 +365,9 @@ def deviation_calculator_by_moving_average(
         convert_sizes_lists_and_ma_data_to_string: bool = False,
         skip_total_count_less_than: int = None,
         filter_csv_file_path: str = None,
-        print_kwargs: dict = None
+        print_kwargs: dict = None,
+        engine: Literal['pandas', 'python'] = 'python',
+        processes: int = 1
 ) -> tuple[
         Union[list, None],
         list
@@ -420,6 +425,11 @@ def deviation_calculator_by_moving_average(
     :param filter_csv_file_path: string, if specified, the CSV file at this path will be used to filter
         the hosts or URLs to analyze.
     :param print_kwargs: dict, additional keyword arguments to pass to the print_api function.
+    :param engine: string, 'pandas' or 'python'. Check the 'moving_average_helper.calculate_moving_average' function.
+        Both engines return the same deviations.
+    :param processes: integer, number of processes to read and aggregate the daily statistics files with.
+        Check the 'moving_average_helper.calculate_moving_average' function.
+        The deviations are the same for any number of processes.
 
     -----------------------------
     :return: tuple:
@@ -446,7 +456,8 @@ def deviation_calculator_by_moving_average(
     """
 
     def convert_data_value_to_string(value_key: str, list_index: int) -> None:
-        deviation_list[list_index]['data'][value_key] = json.dumps(deviation_list[list_index]['data'][value_key])
+        if value_key in deviation_list[list_index]['data']:
+            deviation_list[list_index]['data'][value_key] = json.dumps(deviation_list[list_index]['data'][value_key])
 
     def convert_value_to_string(value_key: str, list_index: int) -> None:
         if value_key in deviation_list[list_index]:
@@ -482,7 +493,9 @@ def deviation_calculator_by_moving_average(
         get_deviation_for_date,
         skip_total_count_less_than,
         filter_csv_file_path,
-        print_kwargs=print_kwargs
+        print_kwargs=print_kwargs,
+        engine=engine,
+        processes=processes
     )
 
     if deviation_list:
@@ -505,7 +518,8 @@ def deviation_calculator_by_moving_average(
             print_api(f'Deviation Found, saving to file: {output_file_path}', color='blue')
 
             if output_file_type == 'csv':
-                csvs.write_list_to_csv(deviation_list, output_file_path)
+                # The rows are written in chunks straight from the returned list, without building another copy.
+                csvs.write_rows_to_csv_streaming(deviation_list, output_file_path)
             elif output_file_type == 'json':
                 jsons.write_json_file(deviation_list, output_file_path, use_default_indent=True)
 
@@ -544,6 +558,9 @@ def deviation_calculator_by_moving_average_main():
         parser.add_argument(
             '-slt', '--skip-total-count-less-than', type=int, required=False,
             help='An integer to skip the deviation calculation if the total count is less than this number.')
+        parser.add_argument(
+            '-j', '--processes', type=int, required=False, default=1,
+            help='(OPTIONAL) Number of processes to read the daily statistics files with. 0 for the number of CPUs.')
 
         return parser.parse_args()
 
@@ -585,7 +602,8 @@ def deviation_calculator_by_moving_average_main():
         output_file_path=args.output_file,
         output_file_type=args.output_type,
         convert_sizes_lists_and_ma_data_to_string=convert_sizes_lists_and_ma_data_to_string,
-        skip_total_count_less_than=args.skip_total_count_less_than
+        skip_total_count_less_than=args.skip_total_count_less_than,
+        processes=args.processes
     )
 
     return 0
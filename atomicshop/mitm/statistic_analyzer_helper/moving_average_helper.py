@@ -1,8 +1,15 @@
 import statistics
+import os
+import copy
+import re
 from pathlib import Path
 from typing import Literal, Iterable, Dict, Any
 import datetime
 import fnmatch
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+import pandas
 
 from ...print_api import print_api
 from ...wrappers.loggingw import reading, consts
@@ -59,6 +66,90 @@ def match_filter(line: Dict[str, Any], filter_settings: Iterable[Dict[str, Any]]
     return False
 
 
+# Fields of the filter rule that are matched as exact strings.
+_FILTER_EXACT_FIELDS: tuple = ('dest_port', 'command', 'status_code', 'request_size_bytes', 'response_size_bytes')
+
+
+def _compile_fnmatch_pattern(pattern: str) -> re.Pattern:
+    # Same as 'fnmatch.fnmatch', the pattern and the checked name should be 'os.path.normcase'-ed.
+    return re.compile(fnmatch.translate(os.path.normcase(pattern)))
+
+
+def compile_filter_rules(filter_settings: Iterable[Dict[str, Any]]) -> list[dict]:
+    """
+    Precompile the filter rules for 'match_filter_compiled', so the values are normalized and the wildcards
+    of 'host' and 'path' are compiled once and not for each line.
+
+    :param filter_settings: list of dicts, the filter rules. Check 'match_filter'.
+    :return: list of dicts, the compiled rules.
+    """
+
+    compiled_rules: list = []
+    for rule in filter_settings:
+        exact: list = []
+        for field in _FILTER_EXACT_FIELDS:
+            value = rule.get(field)
+            # Empty rule value is a wildcard, so it is not checked at all.
+            if value is not None and str(value).strip() != "":
+                exact.append((field, str(value).strip()))
+
+        host = rule.get("host")
+        if host is not None and str(host).strip() != "":
+            host_regex = _compile_fnmatch_pattern(str(host).strip().lower())
+        else:
+            host_regex = None
+
+        path = rule.get("path")
+        if path is not None and str(path).strip() != "":
+            path_regex = _compile_fnmatch_pattern(str(path).strip())
+        else:
+            path_regex = None
+
+        compiled_rules.append({'exact': exact, 'host': host_regex, 'path': path_regex})
+
+    return compiled_rules
+
+
+def match_filter_compiled(line: Dict[str, Any], compiled_rules: list[dict]) -> bool:
+    """
+    Same as 'match_filter', but with the rules from 'compile_filter_rules'.
+
+    :param line: dict, the line of the 'statistics.csv' file.
+    :param compiled_rules: list of dicts, the result of 'compile_filter_rules'.
+    :return: boolean, True if the line matches any rule (should be removed).
+    """
+
+    def norm(v) -> str:
+        return "" if v is None else str(v).strip()
+
+    for rule in compiled_rules:
+        if any(norm(line.get(field)) != value for field, value in rule['exact']):
+            continue
+        if rule['host'] and not rule['host'].match(os.path.normcase(norm(line.get("host")).lower())):
+            continue
+        if rule['path'] and not rule['path'].match(os.path.normcase(norm(line.get("path")))):
+            continue
+        return True
+
+    return False
+
+
+def compile_aggregation_rules(aggregation_rules: list[dict]) -> list[tuple[str, re.Pattern]]:
+    """
+    Precompile the aggregation rules for 'get_aggregation_key'.
+
+    :param aggregation_rules: list of dict, custom aggregation rules. Check 'get_data_dict_from_statistics_content'.
+    :return: list of tuples (rule line, compiled pattern of the rule line).
+    """
+
+    compiled_rules: list = []
+    for rule in aggregation_rules or []:
+        rule_line: str = rule['host'] + rule['path']
+        compiled_rules.append((rule_line, _compile_fnmatch_pattern(rule_line)))
+
+    return compiled_rules
+
+
 def calculate_moving_average(
         file_path: str = None,
         statistics_content: dict = None,
@@ -70,7 +161,9 @@ def calculate_moving_average(
         get_deviation_for_date: str = None,
         skip_total_count_less_than: int = None,
         filter_csv_file_path: str = None,
-        print_kwargs: dict = None
+        print_kwargs: dict = None,
+        engine: Literal['pandas', 'python'] = 'python',
+        processes: int = 1
 ) -> tuple[list, list]:
     """
     This function calculates the moving average of the daily statistics.
@@ -93,9 +186,25 @@ def calculate_moving_average(
         If provided, The options in the rules will be removed from the statistics content before calculating the moving average.
         And the second list in the tuple will contain only the entries that were removed by the filter.
     :param print_kwargs: dict, the print_api arguments.
+    :param engine: string, the engine that computes the daily statistics and the moving averages.
+        'python': the original pure python implementation, each window is rebuilt and averaged host by host.
+        'pandas': the sizes of each day are grouped with pandas, and the moving means and medians of all the
+            hosts and days are computed with numpy over day x host matrices.
+            The result is the same as 'python', check 'compare_engines'.
+    :param processes: integer, number of processes to ingest the daily files with, only with 'file_path'.
+        1: the files are read to 'statistics_content' and processed one by one in the current process.
+        More than 1: each daily file is read, filtered and aggregated in a process pool, only the daily statistics
+            and the removed lines return to the current process. Check 'get_all_files_statistics_sharded'.
+        0 or None: the number of CPUs.
     :return: tuple[list, list], the first list is the deviation list, the second list is the removed entries by filter.
     """
 
+    if engine not in ['pandas', 'python']:
+        raise ValueError(f'Invalid engine: {engine}')
+
+    if not processes:
+        processes = os.cpu_count()
+
     if not file_path and not statistics_content:
         raise ValueError('Either file_path or statistics_content must be provided.')
     if file_path and statistics_content:
@@ -104,6 +213,25 @@ def calculate_moving_average(
     if get_deviation_for_last_day_only and get_deviation_for_date:
         raise ValueError('Only one of get_deviation_for_last_day_only or get_deviation_for_date can be set.')
 
+    # Get the filter settings csv.
+    if filter_csv_file_path:
+        filter_settings, _ = csvs.read_csv_to_list_of_dicts_by_header(filter_csv_file_path, **(print_kwargs or {}))
+    else:
+        filter_settings = []
+
+    if not statistics_content and processes > 1:
+        statistics_content, removed_content = get_all_files_statistics_sharded(
+            file_path=file_path, moving_average_window_days=moving_average_window_days,
+            aggregate_by_type=aggregate_by_type, aggregation_rules=aggregation_rules,
+            filter_settings=filter_settings,
+            get_deviation_for_last_day_only=get_deviation_for_last_day_only,
+            get_deviation_for_date=get_deviation_for_date,
+            engine=engine, processes=processes)
+
+        return _calculate_moving_average_from_statistics_daily(
+            statistics_content, moving_average_window_days, top_bottom_deviation_percentage,
+            skip_total_count_less_than, engine), removed_content
+
     if not statistics_content:
         statistics_content: dict = get_all_files_content(
             file_path=file_path, moving_average_window_days=moving_average_window_days,
@@ -111,15 +239,10 @@ def calculate_moving_average(
             get_deviation_for_date=get_deviation_for_date,
             print_kwargs=print_kwargs)
 
-    # Get the filter settings csv.
-    if filter_csv_file_path:
-        filter_settings, _ = csvs.read_csv_to_list_of_dicts_by_header(filter_csv_file_path, **(print_kwargs or {}))
-    else:
-        filter_settings = []
-
     # Apply the filter to the statistics content.
     removed_content: list = []
     if filter_settings:
+        compiled_filter_rules: list = compile_filter_rules(filter_settings)
         for date_string, day_dict in statistics_content.items():
             filtered_content: list = []
             for line in day_dict['content']:
@@ -128,7 +251,7 @@ def calculate_moving_average(
                     filtered_content.append(line)
                     continue
 
-                remove_line = match_filter(line, filter_settings)
+                remove_line = match_filter_compiled(line, compiled_filter_rules)
 
                 if remove_line:
                     removed_content.append(line)
@@ -141,13 +264,82 @@ def calculate_moving_average(
         day_dict['content_no_useless'] = get_content_without_useless(day_dict['content'])
 
         # Get the data dictionary from the statistics content.
-        day_dict['statistics_daily'] = compute_statistics_from_content(
-            day_dict['content_no_useless'], aggregate_by_type, aggregation_rules)
+        if engine == 'pandas':
+            day_dict['statistics_daily'] = compute_statistics_from_content_vectorized(
+                day_dict['content_no_useless'], aggregate_by_type, aggregation_rules)
+        else:
+            day_dict['statistics_daily'] = compute_statistics_from_content(
+                day_dict['content_no_useless'], aggregate_by_type, aggregation_rules)
 
-    moving_average_dict: dict = compute_moving_averages_from_average_statistics(
-        statistics_content,
-        moving_average_window_days
-    )
+    deviation_list: list = _calculate_moving_average_from_statistics_daily(
+        statistics_content, moving_average_window_days, top_bottom_deviation_percentage,
+        skip_total_count_less_than, engine)
+
+    return deviation_list, removed_content
+
+
+def compare_engines(
+        file_path: str = None,
+        statistics_content: dict = None,
+        **kwargs
+) -> list[str]:
+    """
+    Run 'calculate_moving_average' with the 'python' and the 'pandas' engines on the same input and compare the
+    results, including the types of the values (integer or float).
+
+    :param file_path: string, the path to the 'statistics.csv' file. Check 'calculate_moving_average'.
+    :param statistics_content: dict, the statistics content dictionary. It is copied for each engine, since
+        'calculate_moving_average' changes it.
+    :param kwargs: the rest of the 'calculate_moving_average' arguments, except 'engine'.
+    :return: list of strings, the differences. Empty list if the results are the same.
+    """
+
+    results: dict = {}
+    for engine in ['python', 'pandas']:
+        results[engine] = calculate_moving_average(
+            file_path=file_path, statistics_content=copy.deepcopy(statistics_content), engine=engine, **kwargs)
+
+    differences: list = []
+    _collect_differences(results['python'], results['pandas'], 'result', differences)
+    return differences
+
+
+def _collect_differences(python_value, pandas_value, path: str, differences: list):
+    if type(python_value) is not type(pandas_value):
+        differences.append(
+            f'{path}: type [{type(python_value).__name__}] != [{type(pandas_value).__name__}]')
+    elif isinstance(python_value, dict):
+        if python_value.keys() != pandas_value.keys():
+            differences.append(f'{path}: keys {sorted(python_value.keys() ^ pandas_value.keys())} differ')
+        for key in python_value.keys() & pandas_value.keys():
+            _collect_differences(python_value[key], pandas_value[key], f'{path}[{key!r}]', differences)
+    elif isinstance(python_value, (list, tuple)):
+        if len(python_value) != len(pandas_value):
+            differences.append(f'{path}: length [{len(python_value)}] != [{len(pandas_value)}]')
+        for index, (python_item, pandas_item) in enumerate(zip(python_value, pandas_value)):
+            _collect_differences(python_item, pandas_item, f'{path}[{index}]', differences)
+    elif python_value != pandas_value:
+        differences.append(f'{path}: [{python_value!r}] != [{pandas_value!r}]')
+
+
+def _calculate_moving_average_from_statistics_daily(
+        statistics_content: dict,
+        moving_average_window_days: int,
+        top_bottom_deviation_percentage: float,
+        skip_total_count_less_than: int,
+        engine: Literal['pandas', 'python']
+) -> list:
+    # Each day in 'statistics_content' must already have its 'statistics_daily'.
+    if engine == 'pandas':
+        moving_average_dict: dict = compute_moving_averages_vectorized(
+            statistics_content,
+            moving_average_window_days
+        )
+    else:
+        moving_average_dict: dict = compute_moving_averages_from_average_statistics(
+            statistics_content,
+            moving_average_window_days
+        )
 
     # Add the moving average to the statistics content.
     for day, day_dict in statistics_content.items():
@@ -160,7 +352,7 @@ def calculate_moving_average(
     deviation_list: list = find_deviation_from_moving_average(
         statistics_content, top_bottom_deviation_percentage, skip_total_count_less_than)
 
-    return deviation_list, removed_content
+    return deviation_list
 
 
 def get_all_files_content(
@@ -194,6 +386,43 @@ def get_all_files_content(
     :return:
     """
 
+    logs_paths: list[filesystem.AtomicPath] = get_statistics_logs_paths(
+        file_path=file_path, moving_average_window_days=moving_average_window_days,
+        get_deviation_for_last_day_only=get_deviation_for_last_day_only,
+        get_deviation_for_date=get_deviation_for_date)
+
+    statistics_content: dict = {}
+    # Read each file to its day.
+    for log_atomic_path in logs_paths:
+        date_string: str = log_atomic_path.datetime_string
+        statistics_content[date_string] = {}
+
+        statistics_content[date_string]['file'] = log_atomic_path
+
+        log_file_content, log_file_header = (
+            csvs.read_csv_to_list_of_dicts_by_header(log_atomic_path.path, **(print_kwargs or {})))
+        statistics_content[date_string]['content'] = log_file_content
+        statistics_content[date_string]['header'] = log_file_header
+
+    return statistics_content
+
+
+def get_statistics_logs_paths(
+        file_path: str,
+        moving_average_window_days: int,
+        get_deviation_for_last_day_only: bool = False,
+        get_deviation_for_date: str = None
+) -> list[filesystem.AtomicPath]:
+    """
+    Get the daily rotated 'statistics.csv' files that are needed for the MA analysis, sorted by date.
+
+    :param file_path: string, the path to the 'statistics.csv' file.
+    :param moving_average_window_days: integer, the window size for the moving average.
+    :param get_deviation_for_last_day_only: bool, check the 'get_all_files_content' function.
+    :param get_deviation_for_date: str, check the 'get_all_files_content' function.
+    :return: list of AtomicPath objects.
+    """
+
     if get_deviation_for_last_day_only and get_deviation_for_date:
         raise ValueError('Only one of get_deviation_for_last_day_only or get_deviation_for_date can be set.')
 
@@ -234,20 +463,107 @@ def get_all_files_content(
         start_index: int = max(0, date_index - moving_average_window_days)
         logs_paths = logs_paths[start_index:date_index + 1]
 
-    statistics_content: dict = {}
-    # Read each file to its day.
-    for log_atomic_path in logs_paths:
-        date_string: str = log_atomic_path.datetime_string
-        statistics_content[date_string] = {}
+    return logs_paths
 
-        statistics_content[date_string]['file'] = log_atomic_path
 
-        log_file_content, log_file_header = (
-            csvs.read_csv_to_list_of_dicts_by_header(log_atomic_path.path, **(print_kwargs or {})))
-        statistics_content[date_string]['content'] = log_file_content
-        statistics_content[date_string]['header'] = log_file_header
+def _ingest_statistics_day_file_worker(
+        day_file_path: str,
+        aggregate_by_type: Literal['host', 'url'],
+        compiled_aggregation_rules: list,
+        compiled_filter_rules: list,
+        engine: Literal['pandas', 'python']
+) -> tuple[list, dict, list]:
+    # Runs in the process pool, so only the compact daily statistics return to the parent, not the content.
+    log_file_content, log_file_header = csvs.read_csv_to_list_of_dicts_by_header(
+        day_file_path, stdout=False)
 
-    return statistics_content
+    removed_content: list = []
+    if compiled_filter_rules:
+        filtered_content: list = []
+        for line in log_file_content:
+            if line['host'] != 'host' and match_filter_compiled(line, compiled_filter_rules):
+                removed_content.append(line)
+            else:
+                filtered_content.append(line)
+        log_file_content = filtered_content
+
+    content_no_useless: list = get_content_without_useless(log_file_content)
+    del log_file_content
+
+    if engine == 'pandas':
+        statistics_daily: dict = compute_statistics_from_content_vectorized(
+            content_no_useless, aggregate_by_type, compiled_aggregation_rules=compiled_aggregation_rules)
+    else:
+        statistics_daily = get_data_dict_from_statistics_content(
+            content_no_useless, aggregate_by_type, compiled_aggregation_rules=compiled_aggregation_rules)
+        compute_statistics_from_data_dict(statistics_daily)
+
+    # The raw sizes are returned too, they are part of the deviations 'data', same as with one process.
+    return log_file_header, statistics_daily, removed_content
+
+
+def get_all_files_statistics_sharded(
+        file_path: str,
+        moving_average_window_days: int,
+        aggregate_by_type: Literal['host', 'url'],
+        aggregation_rules: list[dict] = None,
+        filter_settings: list[dict] = None,
+        get_deviation_for_last_day_only: bool = False,
+        get_deviation_for_date: str = None,
+        engine: Literal['pandas', 'python'] = 'python',
+        processes: int = None
+) -> tuple[dict, list]:
+    """
+    Same as 'get_all_files_content' with the filter and the daily statistics computation of 'calculate_moving_average',
+    but each daily file is parsed, filtered and aggregated in a process pool. The days are independent until the
+    moving average step, so only the compact daily statistics return to the current process.
+    The aggregation and filter rules are compiled once here.
+
+    :param file_path: string, the path to the 'statistics.csv' file.
+    :param moving_average_window_days: integer, the window size for the moving average.
+    :param aggregate_by_type: string, 'host' or 'url'. Check 'calculate_moving_average'.
+    :param aggregation_rules: list of dict, custom aggregation rules. Check 'calculate_moving_average'.
+    :param filter_settings: list of dicts, the filter rules. Check 'match_filter'.
+    :param get_deviation_for_last_day_only: bool, check the 'get_all_files_content' function.
+    :param get_deviation_for_date: str, check the 'get_all_files_content' function.
+    :param engine: string, 'pandas' or 'python'. Check 'calculate_moving_average'.
+    :param processes: integer, number of processes. None - the number of CPUs.
+    :return: tuple:
+        dict, same as 'get_all_files_content', but each day has 'file', 'header' and 'statistics_daily' keys
+            without the 'content'. The daily statistics are the same as with one process.
+        list, the lines that were removed by the filter, by the order of the days.
+    """
+
+    logs_paths: list[filesystem.AtomicPath] = get_statistics_logs_paths(
+        file_path=file_path, moving_average_window_days=moving_average_window_days,
+        get_deviation_for_last_day_only=get_deviation_for_last_day_only,
+        get_deviation_for_date=get_deviation_for_date)
+
+    compiled_aggregation_rules: list = compile_aggregation_rules(aggregation_rules)
+    compiled_filter_rules: list = compile_filter_rules(filter_settings or [])
+
+    statistics_content: dict = {}
+    removed_content: list = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # 'map' returns the results by the order of the days.
+        days_results = executor.map(
+            _ingest_statistics_day_file_worker,
+            [log_atomic_path.path for log_atomic_path in logs_paths],
+            [aggregate_by_type] * len(logs_paths),
+            [compiled_aggregation_rules] * len(logs_paths),
+            [compiled_filter_rules] * len(logs_paths),
+            [engine] * len(logs_paths))
+
+        for log_atomic_path, (log_file_header, statistics_daily, day_removed_content) in zip(
+                logs_paths, days_results):
+            statistics_content[log_atomic_path.datetime_string] = {
+                'file': log_atomic_path,
+                'header': log_file_header,
+                'statistics_daily': statistics_daily
+            }
+            removed_content.extend(day_removed_content)
+
+    return statistics_content, removed_content
 
 
 def get_content_without_useless(content: list) -> list:
@@ -269,10 +585,63 @@ def get_content_without_useless(content: list) -> list:
     return traffic_statistics_without_errors
 
 
+def get_aggregation_key(
+        line: dict,
+        aggregate_by_type: Literal['host', 'url'],
+        aggregation_rules: list[dict] = None,
+        compiled_aggregation_rules: list[tuple[str, re.Pattern]] = None
+) -> str:
+    """
+    This function gets the key that the 'statistics.csv' line is aggregated by.
+
+    :param line: dict, the line of the 'statistics.csv' file.
+    :param aggregate_by_type:
+        string, the type to calculate the moving average by. Can be 'host' or 'url'.
+    :param aggregation_rules: list of dict, custom aggregation rules. Check 'get_data_dict_from_statistics_content'.
+    :param compiled_aggregation_rules: the result of 'compile_aggregation_rules', used instead of 'aggregation_rules'.
+    :return: string, the host or the URL without parameters.
+    """
+
+    if isinstance(aggregate_by_type, str) and aggregate_by_type == 'host':
+        type_to_check: str = line['host']
+    elif isinstance(aggregate_by_type, str) and aggregate_by_type == 'url':
+        # Combine host and path to URL.
+        type_to_check: str = line['host'] + line['path']
+        # Remove the parameters from the URL.
+        url_parsed = urls.url_parser(type_to_check)
+
+        if url_parsed['file'] and Path(url_parsed['file']).suffix in ['.gz', '.gzip', '.zip']:
+            type_to_check = '/'.join(url_parsed['directories'][:-1])
+        else:
+            type_to_check = url_parsed['path']
+
+        # Remove the last slash from the URL.
+        type_to_check = type_to_check.removesuffix('/')
+
+        if compiled_aggregation_rules:
+            normalized_type_to_check: str = os.path.normcase(type_to_check)
+            for rule_line, rule_regex in compiled_aggregation_rules:
+                if rule_regex.match(normalized_type_to_check):
+                    type_to_check = rule_line
+                    break
+        elif aggregation_rules:
+            for rule in aggregation_rules:
+                rule_line: str = rule['host'] + rule['path']
+
+                if fnmatch.fnmatch(type_to_check, rule_line):
+                    type_to_check = rule_line
+                    break
+    else:
+        raise ValueError(f'Invalid aggregate_by_type: {aggregate_by_type}')
+
+    return type_to_check
+
+
 def get_data_dict_from_statistics_content(
         content: list,
         aggregate_by_type: Literal['host', 'url'],
         aggregation_rules: list[dict] = None,
+        compiled_aggregation_rules: list[tuple[str, re.Pattern]] = None
 ) -> dict:
     """
     This function gets the data dictionary from the 'statistics.csv' file content.
@@ -283,36 +652,17 @@ def get_data_dict_from_statistics_content(
     :param aggregation_rules: list of dict, custom aggregation rules. Each dict should contain:
         'host': str, the domain to match.
         'path': str, the path to match. Can contain wildcards, currently implemented only wildcard in the end of the path.
+    :param compiled_aggregation_rules: the result of 'compile_aggregation_rules', used instead of 'aggregation_rules'.
     :return: dict, the data dictionary.
     """
 
+    if compiled_aggregation_rules is None:
+        compiled_aggregation_rules = compile_aggregation_rules(aggregation_rules)
+
     hosts_requests_responses: dict = {}
     for line in content:
-        if isinstance(aggregate_by_type, str) and aggregate_by_type == 'host':
-            type_to_check: str = line['host']
-        elif isinstance(aggregate_by_type, str) and aggregate_by_type == 'url':
-            # Combine host and path to URL.
-            type_to_check: str = line['host'] + line['path']
-            # Remove the parameters from the URL.
-            url_parsed = urls.url_parser(type_to_check)
-
-            if url_parsed['file'] and Path(url_parsed['file']).suffix in ['.gz', '.gzip', '.zip']:
-                type_to_check = '/'.join(url_parsed['directories'][:-1])
-            else:
-                type_to_check = url_parsed['path']
-
-            # Remove the last slash from the URL.
-            type_to_check = type_to_check.removesuffix('/')
-
-            if aggregation_rules:
-                for rule in aggregation_rules:
-                    rule_line: str = rule['host'] + rule['path']
-
-                    if fnmatch.fnmatch(type_to_check, rule_line):
-                        type_to_check = rule_line
-                        break
-        else:
-            raise ValueError(f'Invalid aggregate_by_type: {aggregate_by_type}')
+        type_to_check: str = get_aggregation_key(
+            line, aggregate_by_type, compiled_aggregation_rules=compiled_aggregation_rules)
 
         # If subdomain is not in the dictionary, add it.
         if type_to_check not in hosts_requests_responses:
@@ -383,6 +733,266 @@ def compute_statistics_from_content(
     return requests_responses
 
 
+def _mean_of_integers(total: int, count: int) -> int | float:
+    # Same as 'statistics.mean' of integers: integer if the mean is whole, otherwise the correctly rounded float.
+    if count == 0:
+        return 0
+    if total % count == 0:
+        return total // count
+    return total / count
+
+
+def _median_of_integers(median: float, count: int) -> int | float:
+    # Same as 'statistics.median' of integers: the middle integer for odd count, float for even count.
+    if count == 0:
+        return 0
+    if count % 2:
+        return int(median)
+    return float(median)
+
+
+def compute_statistics_from_content_vectorized(
+        content: list,
+        aggregate_by_type: Literal['host', 'url'],
+        aggregation_rules: list[dict] = None,
+        compiled_aggregation_rules: list[tuple[str, re.Pattern]] = None
+) -> dict:
+    """
+    Same result as 'compute_statistics_from_content', but the counts, sums and medians of all the hosts are
+    computed by one pandas groupby.
+
+    :param content: list, the content list.
+    :param aggregate_by_type:
+        string, the type to calculate the moving average by. Can be 'host' or 'url'.
+    :param aggregation_rules: list of dict, custom aggregation rules. Check 'get_data_dict_from_statistics_content'.
+    :param compiled_aggregation_rules: the result of 'compile_aggregation_rules', used instead of 'aggregation_rules'.
+    :return: dict, the statistics dictionary.
+    """
+
+    if not content:
+        return {}
+
+    if compiled_aggregation_rules is None:
+        compiled_aggregation_rules = compile_aggregation_rules(aggregation_rules)
+
+    # The same host and path repeat a lot during the day, so the URL parsing is done once for each of them.
+    keys_cache: dict = {}
+    keys: list = []
+    request_sizes: list = []
+    response_sizes: list = []
+    statistics_daily: dict = {}
+    for line in content:
+        host_path: tuple = (line['host'], line['path'])
+        key = keys_cache.get(host_path)
+        if key is None:
+            key = get_aggregation_key(
+                line, aggregate_by_type, compiled_aggregation_rules=compiled_aggregation_rules)
+            keys_cache[host_path] = key
+        keys.append(key)
+
+        host_dict = statistics_daily.get(key)
+        if host_dict is None:
+            host_dict = statistics_daily[key] = {
+                'request_sizes': [],
+                'response_sizes': []
+            }
+
+        # Empty strings are missing sizes, anything else that is not an integer raises 'ValueError' as before.
+        try:
+            request_size_bytes = line['request_size_bytes']
+            response_size_bytes = line['response_size_bytes']
+            request_size = int(request_size_bytes) if request_size_bytes != '' else None
+            response_size = int(response_size_bytes) if response_size_bytes != '' else None
+        except ValueError as e:
+            print_api(line, color='yellow')
+            raise e
+
+        request_sizes.append(request_size)
+        response_sizes.append(response_size)
+        if request_size is not None:
+            host_dict['request_sizes'].append(request_size)
+        if response_size is not None:
+            host_dict['response_sizes'].append(response_size)
+
+    day_data_frame = pandas.DataFrame({
+        'key': keys,
+        'request_size': pandas.Series(request_sizes, dtype='float64'),
+        'response_size': pandas.Series(response_sizes, dtype='float64'),
+    })
+
+    # 'count', 'sum' and 'median' skip the missing sizes, same as the lists that get only the non-empty sizes.
+    grouped = day_data_frame.groupby('key', sort=False).agg(
+        count_requests=('request_size', 'count'),
+        count_responses=('response_size', 'count'),
+        sum_request_size=('request_size', 'sum'),
+        sum_response_size=('response_size', 'sum'),
+        median_request_size=('request_size', 'median'),
+        median_response_size=('response_size', 'median'),
+    )
+
+    # 'tolist' converts the numpy types to python types, so the result is json serializable.
+    for key, count_requests, count_responses, sum_request_size, sum_response_size, median_request_size, \
+            median_response_size in zip(
+                grouped.index.tolist(), grouped['count_requests'].tolist(), grouped['count_responses'].tolist(),
+                grouped['sum_request_size'].tolist(), grouped['sum_response_size'].tolist(),
+                grouped['median_request_size'].tolist(), grouped['median_response_size'].tolist()):
+        # The types are the same as 'statistics.mean' and 'statistics.median' return for the lists.
+        statistics_daily[key].update({
+            'count_requests': count_requests,
+            'count_responses': count_responses,
+            'avg_request_size': _mean_of_integers(int(sum_request_size), count_requests),
+            'median_request_size': _median_of_integers(median_request_size, count_requests),
+            'avg_response_size': _mean_of_integers(int(sum_response_size), count_responses),
+            'median_response_size': _median_of_integers(median_response_size, count_responses)
+        })
+
+    return statistics_daily
+
+
+def _mean_of_float_windows(windows: numpy.ndarray, counts: numpy.ndarray) -> numpy.ndarray:
+    """
+    Same as 'statistics.mean' of the floats of each row, the missing values are NaN.
+    'statistics.mean' sums exactly and rounds once, a float sum rounds at each addition and the last digits can
+    differ. So the sum is kept as a sum and its rounding error (TwoSum), and the quotient is corrected by the exact
+    remainder (Dekker product), all vectorized over the rows.
+
+    :param windows: 2D array, each row is a window, NaN is a missing value.
+    :param counts: 1D array, the number of values that are not NaN in each row, at least 1.
+    :return: 1D array of the means.
+    """
+
+    values = numpy.nan_to_num(windows, nan=0.0)
+    total = numpy.zeros(values.shape[0])
+    total_error = numpy.zeros(values.shape[0])
+    for column_index in range(values.shape[1]):
+        value = values[:, column_index]
+        new_total = total + value
+        virtual_value = new_total - total
+        total_error += (total - (new_total - virtual_value)) + (value - virtual_value)
+        total = new_total
+
+    counts = counts.astype(numpy.float64)
+    quotient = total / counts
+    product = quotient * counts
+    # Split the quotient to 26 bit halves, so each half multiplied by the count is exact.
+    split = quotient * 134217729.0
+    quotient_high = split - (split - quotient)
+    quotient_low = quotient - quotient_high
+    product_error = (quotient_high * counts - product) + quotient_low * counts
+    remainder = ((total - product) - product_error) + total_error
+    return quotient + remainder / counts
+
+
+# Daily statistics key -> moving average list key.
+_MOVING_AVERAGE_LISTS: list[tuple[str, str]] = [
+    ('count_requests', 'all_request_counts'),
+    ('count_responses', 'all_response_counts'),
+    ('avg_request_size', 'avg_request_sizes'),
+    ('avg_response_size', 'avg_response_sizes'),
+    ('median_request_size', 'median_request_sizes'),
+    ('median_response_size', 'median_response_sizes'),
+]
+
+
+def compute_moving_averages_vectorized(
+        average_statistics_dict: dict,
+        moving_average_window_days: int
+) -> dict:
+    """
+    Same result as 'compute_moving_averages_from_average_statistics', but each metric is laid out once as a
+    day x host matrix (missing host in a day is NaN), and the sums, counts and medians of all the windows of all
+    the hosts are computed at once with numpy over the sliding windows of the matrices.
+    Like the original, the days where the host is missing are not part of its window.
+    The results are converted to the same types that 'statistics.mean' and 'statistics.median' return for the
+    window lists: the means and medians of the counts are integers when they are whole (and odd count for the
+    median), the means and medians of the sizes are floats, the means are rounded once from the exact sum like in
+    'statistics.mean', check '_mean_of_float_windows'.
+
+    :param average_statistics_dict: dict, the average statistics dictionary.
+    :param moving_average_window_days: integer, the window size for the moving average.
+    :return: dict, the moving averages' dictionary.
+    """
+
+    days: list = list(average_statistics_dict.keys())
+    if len(days) < moving_average_window_days:
+        return {}
+
+    # Hosts by the order of their first appearance.
+    hosts: dict = {}
+    for day_dict in average_statistics_dict.values():
+        for host in day_dict['statistics_daily']:
+            hosts.setdefault(host, len(hosts))
+
+    hosts_list: list = list(hosts)
+    window_days: list = days[moving_average_window_days - 1:]
+    if not hosts_list:
+        return {day: {} for day in window_days}
+
+    # metric -> day x host matrix.
+    matrices: dict = {}
+    for statistics_key, _ in _MOVING_AVERAGE_LISTS:
+        matrix = numpy.full((len(days), len(hosts_list)), numpy.nan)
+        for day_index, day_dict in enumerate(average_statistics_dict.values()):
+            for host, host_dict in day_dict['statistics_daily'].items():
+                matrix[day_index, hosts[host]] = float(host_dict[statistics_key])
+        matrices[statistics_key] = matrix
+
+    # window x host x day-in-window views, without copying the matrices.
+    present_windows = numpy.lib.stride_tricks.sliding_window_view(
+        ~numpy.isnan(matrices['count_requests']), moving_average_window_days, axis=0)
+    present_counts = present_windows.sum(axis=2)
+    # The (window, host) pairs where the host has at least one day in the window, in window and host order.
+    window_indexes, host_indexes = numpy.nonzero(present_counts)
+    pairs_present = present_windows[window_indexes, host_indexes]
+    pairs_counts = present_counts[window_indexes, host_indexes]
+    pairs_counts_list: list = pairs_counts.tolist()
+    # The values of each pair start at this offset of the flat values of the present days.
+    pairs_offsets: list = numpy.concatenate(([0], numpy.cumsum(pairs_counts))).tolist()
+
+    # Result key -> list of the values for each (window, host) pair.
+    pairs_results: dict = {}
+    for statistics_key, list_key in _MOVING_AVERAGE_LISTS:
+        windows = numpy.lib.stride_tricks.sliding_window_view(
+            matrices[statistics_key], moving_average_window_days, axis=0)[window_indexes, host_indexes]
+        medians: list = numpy.nanmedian(windows, axis=1).tolist()
+
+        if statistics_key.startswith('count_'):
+            flat_values: list = windows[pairs_present].astype(numpy.int64).tolist()
+            # The counts are integers, their float sums are exact.
+            sums: list = numpy.nansum(windows, axis=1).astype(numpy.int64).tolist()
+            means: list = [_mean_of_integers(total, count) for total, count in zip(sums, pairs_counts_list)]
+            medians = [_median_of_integers(median, count) for median, count in zip(medians, pairs_counts_list)]
+        else:
+            flat_values = windows[pairs_present].tolist()
+            means = _mean_of_float_windows(windows, pairs_counts).tolist()
+
+        pairs_results[list_key] = [
+            flat_values[pairs_offsets[pair_index]:pairs_offsets[pair_index + 1]]
+            for pair_index in range(len(pairs_counts_list))]
+        pairs_results[f'{statistics_key}_mean'] = means
+        pairs_results[f'{statistics_key}_median'] = medians
+
+    # The keys of the result dict of 'compute_moving_averages_from_window_lists' -> key in 'pairs_results'.
+    result_keys: list = [
+        ('ma_request_count', 'count_requests_mean'),
+        ('ma_response_count', 'count_responses_mean'),
+        ('ma_request_size', 'avg_request_size_mean'),
+        ('ma_response_size', 'avg_response_size_mean'),
+        ('mm_request_count', 'count_requests_median'),
+        ('mm_response_count', 'count_responses_median'),
+        ('mm_request_size', 'median_request_size_median'),
+        ('mm_response_size', 'median_response_size_median')
+    ] + [(list_key, list_key) for _, list_key in _MOVING_AVERAGE_LISTS]
+    results_columns: list = [(result_key, pairs_results[pairs_key]) for result_key, pairs_key in result_keys]
+
+    moving_average: dict = {day: {} for day in window_days}
+    for pair_index, (window_index, host_index) in enumerate(zip(window_indexes.tolist(), host_indexes.tolist())):
+        moving_average[window_days[window_index]][hosts_list[host_index]] = {
+            result_key: column[pair_index] for result_key, column in results_columns}
+
+    return moving_average
+
+
 def compute_moving_averages_from_average_statistics(
         average_statistics_dict: dict,
         moving_average_window_days: int
@@ -446,35 +1056,38 @@ def compute_average_for_current_day_from_past_x_days(
     # Compute the moving average.
     moving_average_results: dict = {}
     for host, host_dict in moving_average.items():
-        ma_request_count = statistics.mean(host_dict['all_request_counts'])
-        ma_response_count = statistics.mean(host_dict['all_response_counts'])
-        ma_request_size = statistics.mean(host_dict['avg_request_sizes'])
-        ma_response_size = statistics.mean(host_dict['avg_response_sizes'])
-        mm_request_count = statistics.median(host_dict['all_request_counts'])
-        mm_response_count = statistics.median(host_dict['all_response_counts'])
-        mm_request_size = statistics.median(host_dict['median_request_sizes'])
-        mm_response_size = statistics.median(host_dict['median_response_sizes'])
-
-        moving_average_results[host] = {
-            'ma_request_count': ma_request_count,
-            'ma_response_count': ma_response_count,
-            'ma_request_size': ma_request_size,
-            'ma_response_size': ma_response_size,
-            'mm_request_count': mm_request_count,
-            'mm_response_count': mm_response_count,
-            'mm_request_size': mm_request_size,
-            'mm_response_size': mm_response_size,
-            'all_request_counts': host_dict['all_request_counts'],
-            'all_response_counts': host_dict['all_response_counts'],
-            'avg_request_sizes': host_dict['avg_request_sizes'],
-            'avg_response_sizes': host_dict['avg_response_sizes'],
-            'median_request_sizes': host_dict['median_request_sizes'],
-            'median_response_sizes': host_dict['median_response_sizes']
-        }
+        moving_average_results[host] = compute_moving_averages_from_window_lists(host_dict)
 
     return moving_average_results
 
 
+def compute_moving_averages_from_window_lists(window_lists: dict) -> dict:
+    """
+    This function computes the moving averages and medians of one host from the lists of its window days.
+
+    :param window_lists: dict, the lists of the window days: 'all_request_counts', 'all_response_counts',
+        'avg_request_sizes', 'avg_response_sizes', 'median_request_sizes', 'median_response_sizes'.
+    :return: dict, the moving averages and medians with the window lists.
+    """
+
+    return {
+        'ma_request_count': statistics.mean(window_lists['all_request_counts']),
+        'ma_response_count': statistics.mean(window_lists['all_response_counts']),
+        'ma_request_size': statistics.mean(window_lists['avg_request_sizes']),
+        'ma_response_size': statistics.mean(window_lists['avg_response_sizes']),
+        'mm_request_count': statistics.median(window_lists['all_request_counts']),
+        'mm_response_count': statistics.median(window_lists['all_response_counts']),
+        'mm_request_size': statistics.median(window_lists['median_request_sizes']),
+        'mm_response_size': statistics.median(window_lists['median_response_sizes']),
+        'all_request_counts': window_lists['all_request_counts'],
+        'all_response_counts': window_lists['all_response_counts'],
+        'avg_request_sizes': window_lists['avg_request_sizes'],
+        'avg_response_sizes': window_lists['avg_response_sizes'],
+        'median_request_sizes': window_lists['median_request_sizes'],
+        'median_response_sizes': window_lists['median_response_sizes']
+    }
+
+
 def find_deviation_from_moving_average(
         statistics_content: dict,
         top_bottom_deviation_percentage: float,
@@ -17,6 +17,13 @@ FILE__URL__DEFAULT_SETTINGS = {
     'store_original_object': False
 }
 
+FILE__DEFAULT_SETTINGS = {
+    'store_original_object': False,
+    'change_detection': 'stat',                            # 'stat', 'inotify', 'auto' or 'hash'.
+    'inotify_timeout_seconds': None                         # None - 'inotify' waits forever, 'auto' waits
+                                                            # 'file.AUTO_INOTIFY_TIMEOUT_SECONDS'.
+}
+
 
 class ChangeMonitor:
     """
@@ -61,7 +68,20 @@ class ChangeMonitor:
                 'url_playwright_jpeg': download using 'playwright' library to JPEG file.
         :param object_type_settings: dict, specific settings for the object type.
             'dns': Check the default settings example in 'DNS__DEFAULT_SETTINGS'.
-            'file': Check the default settings example in 'FILE__URL__DEFAULT_SETTINGS'.
+            'file': Check the default settings example in 'FILE__DEFAULT_SETTINGS'.
+                'change_detection':
+                    'inotify': (Linux only) 'check_cycle' blocks until the kernel reports a close after write,
+                        replace or delete of the file (or 'inotify_timeout_seconds' passes), then works as 'stat'.
+                        Files that are written without closing (logs) should use 'inotify_timeout_seconds'.
+                        All the file monitors in the process share one inotify descriptor and thread.
+                    'stat': the file is copied and rehashed only if its (size, mtime_ns, inode) changed since
+                        the last cycle.
+                    'hash': the file is copied and rehashed on every cycle.
+                    'auto': 'inotify' if available, otherwise 'stat'. Without 'inotify_timeout_seconds' each cycle
+                        waits at most 'file.AUTO_INOTIFY_TIMEOUT_SECONDS', so files that are written without
+                        closing are still checked.
+                    The default is 'stat', settings without 'change_detection' keep the per cycle checks.
+                    If the inotify watch can't be added (the directory was removed), the check falls back to 'stat'.
             'url_*': Check the default settings example in 'FILE__URL__DEFAULT_SETTINGS'.
         :param check_object: The object to check if changed.
             'dns': empty.
@@ -114,7 +134,7 @@ class ChangeMonitor:
     def _setup_check(self):
         if self.object_type == 'file':
             if not self.object_type_settings:
-                self.object_type_settings = FILE__URL__DEFAULT_SETTINGS
+                self.object_type_settings = FILE__DEFAULT_SETTINGS
 
             self.checks_instance = file.FileCheck(self)
         elif self.object_type.startswith('url_'):
@@ -144,3 +164,12 @@ class ChangeMonitor:
         return_list = self.checks_instance.execute_cycle(print_kwargs=print_kwargs)
 
         return return_list
+
+    def close(self):
+        """
+        Write the state of the check to its input files. Call it when the monitor stops, since the 'dns' state
+        changes get to the input files in batches.
+        :return: None
+        """
+
+        self.checks_instance.close()
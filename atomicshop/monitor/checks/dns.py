@@ -80,6 +80,16 @@ class DnsCheck:
         # Start DNS monitoring.
         self.fetch_engine.start()
 
+    def close(self):
+        """
+        Write the state of the check to its input files, call on shutdown of the monitor.
+        """
+
+        if self.diff_checker_aggregation:
+            self.diff_checker_aggregation.close()
+        if self.diff_checker_statistics:
+            self.diff_checker_statistics.close()
+
     def execute_cycle(self, print_kwargs: dict = None) -> list:
         """
         This function executes the cycle of the change monitor: dns.
@@ -1,10 +1,16 @@
+import os
 from pathlib import Path
+from typing import Union
 
 from ... import filesystem, hashing
 from ... import diff_check
 from ...print_api import print_api
+from ...wrappers.ctyping import inotify_linux
 
 
+# The longest wait of a cycle for the inotify change in 'auto' mode, when 'inotify_timeout_seconds' isn't set.
+AUTO_INOTIFY_TIMEOUT_SECONDS: float = 60.0
+
 class FileCheck:
     """
     Class for file monitoring.
@@ -13,6 +19,9 @@ class FileCheck:
         self.diff_checker = None
         self.change_monitor_instance = None
         self.store_original_file_path = None
+        self.file_watcher: Union[inotify_linux.InotifyFileWatcher, None] = None
+        self.last_file_signature: Union[tuple, None] = None
+        self.first_cycle: bool = True
 
         if not change_monitor_instance.input_file_name:
             change_monitor_instance.input_file_name = Path(change_monitor_instance.check_object).name
@@ -38,6 +47,47 @@ class FileCheck:
         self.diff_checker.initiate_before_action()
         self.change_monitor_instance = change_monitor_instance
 
+        self.change_detection: str = change_monitor_instance.object_type_settings.get('change_detection', 'stat')
+        self.inotify_timeout_seconds: Union[float, None] = (
+            change_monitor_instance.object_type_settings.get('inotify_timeout_seconds', None))
+
+        if self.change_detection not in ['auto', 'inotify', 'stat', 'hash']:
+            raise ValueError(
+                f"ERROR: [change_detection] must be 'auto', 'inotify', 'stat' or 'hash', "
+                f"not [{self.change_detection}].")
+
+        if self.change_detection == 'auto':
+            if inotify_linux.is_inotify_available():
+                self.change_detection = 'inotify'
+                if self.inotify_timeout_seconds is None:
+                    self.inotify_timeout_seconds = AUTO_INOTIFY_TIMEOUT_SECONDS
+            else:
+                self.change_detection = 'stat'
+
+        if self.change_detection == 'inotify':
+            self.file_watcher = inotify_linux.get_shared_file_watcher()
+            try:
+                self.file_watcher.add_file(change_monitor_instance.check_object)
+            except OSError as e:
+                self._fall_back_to_stat(e)
+
+    def close(self):
+        """
+        Write the state of the check to its input files and stop watching the file, call on shutdown of the monitor.
+        """
+
+        self.diff_checker.close()
+        if self.file_watcher:
+            self.file_watcher.remove_file(self.change_monitor_instance.check_object)
+            self.file_watcher = None
+
+    def _fall_back_to_stat(self, exception_object: OSError, print_kwargs: dict = None):
+        print_api(
+            f"Couldn't watch [{self.change_monitor_instance.check_object}] with inotify, "
+            f"falling back to 'stat': {exception_object}", color='yellow', **(print_kwargs or {}))
+        self.file_watcher = None
+        self.change_detection = 'stat'
+
     def execute_cycle(self, print_kwargs: dict = None):
         """
         This function executes the cycle of the change monitor: hash.
@@ -48,6 +98,16 @@ class FileCheck:
 
         return_list = list()
 
+        # The first cycle always reads the file, next cycles sleep until the kernel reports a change.
+        if self.file_watcher and not self.first_cycle:
+            try:
+                self.file_watcher.wait_for_change(
+                    self.change_monitor_instance.check_object, timeout=self.inotify_timeout_seconds)
+            except OSError as e:
+                # The kernel dropped the watch (the directory was removed) and it can't be added again.
+                self._fall_back_to_stat(e, print_kwargs=print_kwargs)
+        self.first_cycle = False
+
         self._get_hash()
 
         # Check if the object was updated.
@@ -65,7 +125,19 @@ class FileCheck:
 
         return return_list
 
+    def _get_file_signature(self) -> tuple:
+        stat_result = os.stat(self.change_monitor_instance.check_object)
+        return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+
     def _get_hash(self):
+        # If the file metadata didn't change since the last cycle, the content didn't change either,
+        # so the previous hash in the 'check_object' is used without reading the file.
+        if self.change_detection != 'hash':
+            file_signature: tuple = self._get_file_signature()
+            if file_signature == self.last_file_signature:
+                return
+            self.last_file_signature = file_signature
+
         # Copy the file to the original object directory.
         if self.store_original_file_path:
             filesystem.copy_file(self.change_monitor_instance.check_object, self.store_original_file_path)
@@ -36,6 +36,13 @@ class NetworkCheck:
         )
         self.diff_checker.initiate_before_action()
 
+    def close(self):
+        """
+        Write the state of the check to its input files, call on shutdown of the monitor.
+        """
+
+        self.diff_checker.close()
+
     def execute_cycle(self, print_kwargs: dict = None):
         """
         This function executes the cycle of the change monitor: network.
@@ -12,6 +12,13 @@ class ProcessRunningCheck:
         self.change_monitor_instance = change_monitor_instance
         self.fetch_engine = psutilw.PsutilProcesses()
 
+    def close(self):
+        """
+        The check has no input files, nothing to write on shutdown of the monitor.
+        """
+
+        pass
+
     def execute_cycle(self, print_kwargs: dict = None):
         """
         This function executes the cycle of the change monitor: process_running.
@@ -49,6 +49,13 @@ class UrlCheck:
         self.diff_checker.initiate_before_action()
         self.change_monitor_instance = change_monitor_instance
 
+    def close(self):
+        """
+        Write the state of the check to its input files, call on shutdown of the monitor.
+        """
+
+        self.diff_checker.close()
+
     def execute_cycle(self, print_kwargs: dict = None):
         """
         This function executes the cycle of the change monitor: hash.
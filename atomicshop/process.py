@@ -287,14 +287,17 @@ def get_running_processes_by_cmdline_pattern(
     get_process_list_instance = get_process_list.GetProcessList(get_method='psutil', connect_on_init=True)
     processes = get_process_list_instance.get_processes(as_dict=False)
 
+    # Compile the pattern once for all the processes.
+    pattern_set: strings.PatternSet = strings.compile_patterns(
+        [pattern], case_insensitive=cmdline_case_insensitive, prefix_suffix=prefix_suffix)
+
     # Iterate through all the current process, while fetching executable file 'name' and the command line.
     # Name is always populated, while command line is not.
     matched_cmdlines: list = list()
     for process in processes:
         # Check if command line isn't empty and that string pattern is matched against command line.
         if process['cmdline']:
-            is_pattern_matched = strings.match_pattern_against_string(
-                pattern, process['cmdline'], case_insensitive=cmdline_case_insensitive, prefix_suffix=prefix_suffix)
+            is_pattern_matched = pattern_set.match(process['cmdline'])
             if is_pattern_matched:
                 matched_cmdlines.append(process)
                 # If 'first' was set to 'True' we will stop, since we found the first match.
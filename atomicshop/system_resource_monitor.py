@@ -1,8 +1,221 @@
 from typing import Union
+import math
+import time
+import struct
 import threading
 import multiprocessing.managers
+from multiprocessing import shared_memory
 
 from . import system_resources, print_api
+from .basics import multiprocesses
+
+
+# The fields of each sample in the 'SharedMetricsRing', same keys as the results of
+# 'system_resources.check_system_resources' and the 'timestamp' of the sample.
+SHARED_METRICS_FIELDS: tuple = (
+    'timestamp',
+    'cpu_usage',
+    'memory_usage',
+    'disk_io_write',
+    'disk_io_read',
+    'disk_files_count_read',
+    'disk_files_count_write',
+    'disk_busy_time',
+    'disk_used_percent'
+)
+# Default history size, 5 minutes with the default interval of 1 second.
+SHARED_METRICS_DEFAULT_CAPACITY: int = 300
+
+_SHARED_METRICS_MAGIC: bytes = b'ASRM'
+_SHARED_METRICS_VERSION: int = 1
+# magic, version, capacity, number of samples written.
+_SHARED_METRICS_HEADER_STRUCT = struct.Struct('<4sIIxxxxQ')
+# Each slot: sequence number of the seqlock and the fields. 'None' is stored as NaN.
+_SHARED_METRICS_SEQUENCE_STRUCT = struct.Struct('<Q')
+_SHARED_METRICS_RECORD_STRUCT = struct.Struct(f'<{len(SHARED_METRICS_FIELDS)}d')
+_SHARED_METRICS_SLOT_SIZE: int = _SHARED_METRICS_SEQUENCE_STRUCT.size + _SHARED_METRICS_RECORD_STRUCT.size
+# Number of read retries while the writer is in the middle of the same slot.
+_SHARED_METRICS_READ_RETRIES: int = 1000
+
+
+class SharedMetricsRing:
+    """
+    Fixed layout shared memory ring of the system resources samples.
+    There is one writer (the SystemResourceMonitor) and any number of readers in any process. Reading the latest
+    sample is a direct read from the shared memory, without a manager process and without IPC round-trips.
+    Each slot is protected by a seqlock: the writer makes the sequence number odd before writing the slot and even
+    after, the reader retries if the sequence number was odd or changed during the read.
+    The ring keeps the last 'capacity' samples as history.
+
+    The object can be passed to other processes (pickled), it attaches to the same shared memory by its name.
+
+    Usage:
+        # Parent process.
+        ring = SharedMetricsRing(create=True)
+        multiprocessing.Process(
+            target=system_resource_monitor.start_monitoring, kwargs={'shared_metrics_ring': ring}).start()
+
+        # Any process.
+        latest: dict = ring.read_latest()
+        last_minute: list[dict] = ring.read_history(60)
+
+        # Parent process, at the end.
+        ring.close()
+        ring.unlink()
+    """
+
+    def __init__(
+            self,
+            name: str = None,
+            create: bool = False,
+            capacity: int = SHARED_METRICS_DEFAULT_CAPACITY
+    ):
+        """
+        :param name: string, name of the shared memory block. On 'create', None generates a random name.
+        :param create: bool, True to create the shared memory block, False to attach to an existing one by name.
+        :param capacity: integer, number of samples to keep in the history. Used only on 'create'.
+        """
+
+        if create:
+            if capacity < 1:
+                raise ValueError('capacity must be at least 1.')
+
+            size: int = _SHARED_METRICS_HEADER_STRUCT.size + capacity * _SHARED_METRICS_SLOT_SIZE
+            self._shared_memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._shared_memory.buf[:size] = bytes(size)
+            _SHARED_METRICS_HEADER_STRUCT.pack_into(
+                self._shared_memory.buf, 0, _SHARED_METRICS_MAGIC, _SHARED_METRICS_VERSION, capacity, 0)
+        else:
+            if name is None:
+                raise ValueError('name must be provided to attach to an existing shared metrics ring.')
+            self._shared_memory = multiprocesses.attach_shared_memory(name)
+
+        magic, version, capacity, _ = _SHARED_METRICS_HEADER_STRUCT.unpack_from(self._shared_memory.buf, 0)
+        if magic != _SHARED_METRICS_MAGIC or version != _SHARED_METRICS_VERSION:
+            self._shared_memory.close()
+            raise ValueError(f'Shared memory [{name}] is not a shared metrics ring of version {_SHARED_METRICS_VERSION}.')
+
+        self.name: str = self._shared_memory.name
+        self.capacity: int = capacity
+        self.is_owner: bool = create
+
+    def __reduce__(self):
+        # Other processes attach to the same block by name.
+        return self.__class__, (self.name, False)
+
+    def write(self, results: dict, timestamp: float = None):
+        """
+        Write a sample to the next slot. Only one process should write to the ring.
+
+        :param results: dict, the results of 'system_resources.check_system_resources'. Missing keys and None
+            values are written as NaN.
+        :param timestamp: float, the time of the sample, seconds since the epoch. None for the current time.
+        """
+
+        buffer = self._shared_memory.buf
+        written_count: int = self._get_written_count()
+        slot_offset: int = self._get_slot_offset(written_count)
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        values: list = [timestamp]
+        for field in SHARED_METRICS_FIELDS[1:]:
+            value = results.get(field)
+            values.append(math.nan if value is None else float(value))
+
+        sequence: int = _SHARED_METRICS_SEQUENCE_STRUCT.unpack_from(buffer, slot_offset)[0]
+        # Odd sequence number - the slot is being written.
+        _SHARED_METRICS_SEQUENCE_STRUCT.pack_into(buffer, slot_offset, sequence + 1)
+        _SHARED_METRICS_RECORD_STRUCT.pack_into(
+            buffer, slot_offset + _SHARED_METRICS_SEQUENCE_STRUCT.size, *values)
+        _SHARED_METRICS_SEQUENCE_STRUCT.pack_into(buffer, slot_offset, sequence + 2)
+
+        # Publish the sample only after the slot is complete.
+        self._set_written_count(written_count + 1)
+
+    def read_latest(self) -> Union[dict, None]:
+        """
+        Read the latest sample.
+
+        :return: dict with the 'SHARED_METRICS_FIELDS' keys (NaN values are returned as None),
+            or None if nothing was written yet.
+        """
+
+        written_count: int = self._get_written_count()
+        if written_count == 0:
+            return None
+
+        return self._read_slot(written_count - 1)
+
+    def read_history(self, count: int = None) -> list[dict]:
+        """
+        Read the last samples from the history, from the oldest to the latest.
+
+        :param count: integer, number of samples to read. None to read all the history that is available.
+        :return: list of dicts, same as 'read_latest'.
+        """
+
+        written_count: int = self._get_written_count()
+        available_count: int = min(written_count, self.capacity)
+        if count is None or count > available_count:
+            count = available_count
+
+        history: list = []
+        for sample_index in range(written_count - count, written_count):
+            sample = self._read_slot(sample_index)
+            # The slot was overwritten by a newer sample during the read, it is no longer part of this history.
+            if sample is not None:
+                history.append(sample)
+
+        return history
+
+    def close(self):
+        """
+        Close the access to the shared memory from this process.
+        """
+
+        self._shared_memory.close()
+
+    def unlink(self):
+        """
+        Remove the shared memory block. Should be called once, by the process that created it.
+        """
+
+        self._shared_memory.unlink()
+
+    def _get_written_count(self) -> int:
+        return _SHARED_METRICS_HEADER_STRUCT.unpack_from(self._shared_memory.buf, 0)[3]
+
+    def _set_written_count(self, written_count: int):
+        struct.pack_into('<Q', self._shared_memory.buf, _SHARED_METRICS_HEADER_STRUCT.size - 8, written_count)
+
+    def _get_slot_offset(self, sample_index: int) -> int:
+        return _SHARED_METRICS_HEADER_STRUCT.size + (sample_index % self.capacity) * _SHARED_METRICS_SLOT_SIZE
+
+    def _read_slot(self, sample_index: int) -> Union[dict, None]:
+        buffer = self._shared_memory.buf
+        slot_offset: int = self._get_slot_offset(sample_index)
+        # Each write to the slot adds 2 to its sequence number, the slot is written once each 'capacity' samples.
+        expected_sequence: int = (sample_index // self.capacity + 1) * 2
+
+        for _ in range(_SHARED_METRICS_READ_RETRIES):
+            sequence_before: int = _SHARED_METRICS_SEQUENCE_STRUCT.unpack_from(buffer, slot_offset)[0]
+            if sequence_before % 2:
+                continue
+            values: tuple = _SHARED_METRICS_RECORD_STRUCT.unpack_from(
+                buffer, slot_offset + _SHARED_METRICS_SEQUENCE_STRUCT.size)
+            sequence_after: int = _SHARED_METRICS_SEQUENCE_STRUCT.unpack_from(buffer, slot_offset)[0]
+            if sequence_before != sequence_after:
+                continue
+
+            if sequence_before != expected_sequence:
+                return None
+
+            return {field: (None if math.isnan(value) else value)
+                    for field, value in zip(SHARED_METRICS_FIELDS, values)}
+
+        return None
 
 
 class SystemResourceMonitor:
@@ -20,7 +233,8 @@ class SystemResourceMonitor:
             get_disk_used_percent: bool = True,
             calculate_maximum_changed_disk_io: bool = False,
             queue_list: list = None,
-            manager_dict=None     # multiprocessing.Manager().dict()
+            manager_dict=None,     # multiprocessing.Manager().dict()
+            shared_metrics_ring: SharedMetricsRing = None
     ):
         """
         Initialize the system resource monitor.
@@ -84,6 +298,9 @@ class SystemResourceMonitor:
         :param manager_dict: multiprocessing.Manager().dict(), a dictionary to store the results.
             If you need to use the results of the System Resource Monitor in another process or several processes
             you can pass the manager_dict to store the results.
+        :param shared_metrics_ring: SharedMetricsRing, shared memory ring to write each sample to.
+            Other processes read the latest sample and the history from the shared memory directly,
+            without the IPC round-trips of the manager_dict. Check the 'SharedMetricsRing' class.
         """
         # Store parameters as instance attributes
         self.interval: float = interval
@@ -96,6 +313,7 @@ class SystemResourceMonitor:
         self.calculate_maximum_changed_disk_io: bool = calculate_maximum_changed_disk_io
         self.queue_list: list = queue_list
         self.manager_dict = manager_dict        # multiprocessing.Manager().dict()
+        self.shared_metrics_ring: SharedMetricsRing = shared_metrics_ring
 
         self.maximum_disk_io: dict = {
             'read_bytes_per_sec': 0,
@@ -134,7 +352,7 @@ class SystemResourceMonitor:
             self.thread = threading.Thread(target=self.run_check_system_resources, args=(
                 self.interval, self.get_cpu, self.get_memory, self.get_disk_io_bytes, self.get_disk_files_count,
                 self.get_disk_busy_time, self.get_disk_used_percent, self.calculate_maximum_changed_disk_io,
-                self.maximum_disk_io, self.queue_list, self.manager_dict))
+                self.maximum_disk_io, self.queue_list, self.manager_dict, self.shared_metrics_ring))
             self.thread.daemon = thread_as_daemon
             self.thread.start()
         else:
@@ -143,7 +361,8 @@ class SystemResourceMonitor:
     def run_check_system_resources(
             self,
             interval, get_cpu, get_memory, get_disk_io_bytes, get_disk_files_count, get_disk_busy_time,
-            get_disk_used_percent, calculate_maximum_changed_disk_io, maximum_disk_io, queue_list, manager_dict):
+            get_disk_used_percent, calculate_maximum_changed_disk_io, maximum_disk_io, queue_list, manager_dict,
+            shared_metrics_ring=None):
         """
         Continuously update the system resources in the shared results dictionary.
         This function runs in a separate process.
@@ -178,6 +397,9 @@ class SystemResourceMonitor:
             if manager_dict is not None:
                 manager_dict.update(results)
 
+            if shared_metrics_ring is not None:
+                shared_metrics_ring.write(results)
+
             self.results = results
 
     def get_results(self) -> dict:
@@ -213,6 +435,7 @@ def start_monitoring(
         calculate_maximum_changed_disk_io: bool = False,
         queue_list: list = None,
         manager_dict: multiprocessing.managers.DictProxy = None,      # multiprocessing.Manager().dict()
+        shared_metrics_ring: SharedMetricsRing = None,
         get_results_thread_as_daemon: bool = True,
         print_kwargs: dict = None
 ):
@@ -244,6 +467,8 @@ def start_monitoring(
             multiprocessing.Process(
                 target=system_resource_monitor.start_monitoring, kwargs={'manager_dict': shared_dict}).start()
 
+    :param shared_metrics_ring: SharedMetricsRing, shared memory ring to write each sample to.
+        Check the 'SharedMetricsRing' class.
     :param get_results_thread_as_daemon: bool, set the thread as daemon. If you're running the monitoring process in the
         main process, set it to True. If you're running the monitoring process in a separate process, set it to False.
         In child processes created by multiprocessing.Process, the thread works differently.
@@ -268,7 +493,8 @@ def start_monitoring(
             get_disk_used_percent=get_disk_used_percent,
             calculate_maximum_changed_disk_io=calculate_maximum_changed_disk_io,
             queue_list=queue_list,
-            manager_dict=manager_dict
+            manager_dict=manager_dict,
+            shared_metrics_ring=shared_metrics_ring
         )
         SYSTEM_RESOURCES_MONITOR.start(thread_as_daemon=get_results_thread_as_daemon)
     else:
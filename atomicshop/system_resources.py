@@ -110,13 +110,19 @@ def wait_for_resource_availability(
         class to share the system resources data.
         If this is used, the system resources will be checked before starting each new execution from this
         shared dict instead of performing new checks.
+        Can also be a 'system_resource_monitor.SharedMetricsRing', then the latest sample is read from the shared
+        memory without the IPC round-trip to the manager process.
     :return: None
     """
     while True:
         # Check system resources. If system_monitor_manager_dict is provided, use it.
-        if system_monitor_manager_dict:
-            result = dict(system_monitor_manager_dict)
+        if system_monitor_manager_dict is not None:
+            result = get_shared_monitor_results(system_monitor_manager_dict)
         else:
+            result = {}
+
+        # The monitor can be still before its first check.
+        if result.get('cpu_usage') is None or result.get('memory_usage') is None:
             result = check_system_resources(
                 get_cpu=True,
                 get_memory=True,
@@ -134,6 +140,203 @@ def wait_for_resource_availability(
         time.sleep(wait_time)  # Wait for 'wait_time' seconds before checking again
 
 
+def get_shared_monitor_results(
+        system_monitor_manager_dict: multiprocessing.managers.DictProxy
+) -> dict:
+    """
+    Get the latest results of the system resource monitor that runs in another process.
+
+    :param system_monitor_manager_dict: multiprocessing.managers.DictProxy or
+        system_resource_monitor.SharedMetricsRing, the shared object that the monitor writes to.
+    :return: dict, the latest results. Empty dict if the monitor didn't write anything yet.
+    """
+
+    if isinstance(system_monitor_manager_dict, system_resource_monitor.SharedMetricsRing):
+        return system_monitor_manager_dict.read_latest() or {}
+
+    return dict(system_monitor_manager_dict)
+
+
+class ResourceAdmissionController:
+    """
+    Admission controller for submitting tasks to a pool by the system resources.
+    Instead of sampling the CPU and memory before each submitted task, as 'wait_for_resource_availability' does,
+    the resources are sampled in a background thread on its own cadence, and each sample resizes a budget of tokens.
+    Each in-flight task (or chunk of tasks) holds a token, so the submission waits only when the budget is used up.
+
+    The budget is sized by the headroom (additive increase, multiplicative decrease):
+        If the CPU or memory usage is above the maximum, the budget is halved (down to 0, nothing new is admitted
+        until the usage drops). The next sample is taken only after 'overuse_wait_time'.
+        If both are below, the budget grows by the part of 'max_in_flight' that is proportional to the smallest
+        headroom, at least by 1, up to 'max_in_flight'.
+
+    Usage:
+        controller = ResourceAdmissionController(max_in_flight=16, cpu_percent_max=80, memory_percent_max=80)
+        controller.start()
+
+        for item in items:
+            controller.acquire()
+            pool.apply_async(function, (item,), callback=lambda _: controller.release())
+
+        controller.stop()
+    """
+
+    def __init__(
+            self,
+            max_in_flight: int,
+            cpu_percent_max: int = 80,
+            memory_percent_max: int = 80,
+            sample_interval: float = 0.5,
+            system_monitor_manager_dict: multiprocessing.managers.DictProxy = None,
+            overuse_wait_time: float = None
+    ):
+        """
+        :param max_in_flight: integer, maximum number of tokens, the budget can't grow above it.
+        :param cpu_percent_max: integer, maximum CPU percentage. Above that usage, the budget shrinks.
+        :param memory_percent_max: integer, maximum memory percentage. Above that usage, the budget shrinks.
+        :param sample_interval: float, seconds between the samples of the system resources.
+        :param system_monitor_manager_dict: multiprocessing.managers.DictProxy, shared manager dict for
+            system monitoring. The object is the output of atomicshop.system_resource_monitor.
+            If this is used, the samples are read from this shared dict instead of performing new checks.
+            Can also be a 'system_resource_monitor.SharedMetricsRing'.
+        :param overuse_wait_time: float, seconds to wait before the next sample, after a sample where the CPU or
+            memory usage was above the maximum. Default is None, which is the 'sample_interval'.
+        """
+
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1.')
+
+        self.max_in_flight: int = max_in_flight
+        self.cpu_percent_max: int = cpu_percent_max
+        self.memory_percent_max: int = memory_percent_max
+        self.sample_interval: float = sample_interval
+        self.system_monitor_manager_dict: multiprocessing.managers.DictProxy = system_monitor_manager_dict
+        self.overuse_wait_time: float = sample_interval if overuse_wait_time is None else overuse_wait_time
+
+        self.budget: int = max_in_flight
+        self.in_flight: int = 0
+        self.last_sample: dict = {'cpu_usage': None, 'memory_usage': None}
+
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._sampler_thread = None
+        self._is_throttled: bool = False
+
+    def start(self):
+        """
+        Start the background sampling thread.
+        """
+
+        if self._sampler_thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._sampler_thread = threading.Thread(
+            target=self._sampler_loop, name='ResourceAdmissionController', daemon=True)
+        self._sampler_thread.start()
+
+    def stop(self):
+        """
+        Stop the background sampling thread and release everyone that waits for a token.
+        """
+
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+
+        if self._sampler_thread is not None:
+            self._sampler_thread.join()
+            self._sampler_thread = None
+
+    def acquire(self, tokens: int = 1, timeout: float = None) -> bool:
+        """
+        Block until there is a room in the budget for the tokens.
+        If nothing is in flight, the tokens are admitted even if they are more than the budget allows,
+        as long as the budget isn't 0, so a large chunk can't wait forever.
+
+        :param tokens: integer, number of tokens to take.
+        :param timeout: float, seconds to wait. None to wait until admitted.
+        :return: boolean, True if the tokens were taken, False on timeout or if the controller was stopped.
+        """
+
+        def is_admitted() -> bool:
+            if self._stop_event.is_set():
+                return True
+            if self.in_flight + tokens <= self.budget:
+                return True
+            return self.in_flight == 0 and self.budget > 0
+
+        with self._condition:
+            if not self._condition.wait_for(is_admitted, timeout=timeout) or self._stop_event.is_set():
+                return False
+
+            self.in_flight += tokens
+            return True
+
+    def release(self, tokens: int = 1):
+        """
+        Return the tokens of finished tasks to the budget.
+
+        :param tokens: integer, number of tokens to return.
+        """
+
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - tokens)
+            self._condition.notify_all()
+
+    def update_budget(self, cpu_usage: float, memory_usage: float):
+        """
+        Resize the budget by a sample. Called by the sampling thread, can be called directly if the samples
+        come from elsewhere.
+
+        :param cpu_usage: float, CPU usage percentage.
+        :param memory_usage: float, memory usage percentage.
+        """
+
+        with self._condition:
+            self.last_sample = {'cpu_usage': cpu_usage, 'memory_usage': memory_usage}
+
+            if cpu_usage >= self.cpu_percent_max or memory_usage >= self.memory_percent_max:
+                self.budget //= 2
+
+                if not self._is_throttled:
+                    self._is_throttled = True
+                    print_api.print_api(
+                        f"Waiting for resources to be available... "
+                        f"CPU: {cpu_usage}%, Memory: {memory_usage}%", color='yellow')
+            else:
+                self._is_throttled = False
+
+                headroom: float = min(
+                    (self.cpu_percent_max - cpu_usage) / self.cpu_percent_max,
+                    (self.memory_percent_max - memory_usage) / self.memory_percent_max)
+                increase: int = max(1, int(self.max_in_flight * headroom))
+                self.budget = min(self.max_in_flight, self.budget + increase)
+
+            self._condition.notify_all()
+
+    def _sampler_loop(self):
+        if self.system_monitor_manager_dict is None:
+            # Non-blocking CPU sampling compares to the previous call, this is the first one.
+            cpus.get_cpu_usage(interval=None)
+
+        # Back off after an overused sample, 'stop' still interrupts the wait.
+        while not self._stop_event.wait(self.overuse_wait_time if self._is_throttled else self.sample_interval):
+            if self.system_monitor_manager_dict is not None:
+                result: dict = get_shared_monitor_results(self.system_monitor_manager_dict)
+                # The monitor can be still before its first check.
+                if result.get('cpu_usage') is None or result.get('memory_usage') is None:
+                    continue
+                cpu_usage = result['cpu_usage']
+                memory_usage = result['memory_usage']
+            else:
+                # The usage since the previous sample, without blocking, so 'stop' doesn't wait for the interval.
+                cpu_usage = cpus.get_cpu_usage(interval=None)
+                memory_usage = memories.get_memory_usage()
+
+            self.update_budget(cpu_usage, memory_usage)
+
+
 def _test_disk_speed_with_monitoring(
         file_settings: list[dict],
         remove_file_after_each_copy: bool = False,
@@ -0,0 +1,246 @@
+"""
+Certificate store in one SQLite file, instead of one PEM file per host in a directory.
+The names and expiry times of all the certificates can be preloaded to memory at startup, so checking if a
+certificate exists doesn't touch the disk, and reading one is a single primary key lookup.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+from .. import cryptographyw
+
+
+STORE_FILE_NAME: str = 'certificates.sqlite'
+
+
+def get_certificate_not_after_timestamp(certificate_pem: bytes) -> float | None:
+    """
+    Get the expiry time of the certificate in the PEM, the PEM can also contain the private key.
+
+    :param certificate_pem: bytes, PEM.
+    :return: float, POSIX timestamp of 'not valid after' of the certificate, or None if it couldn't be read.
+    """
+
+    try:
+        certificate = cryptographyw.convert_object_to_x509(certificate_pem)
+    except (ValueError, TypeError):
+        return None
+
+    if certificate is None:
+        return None
+    return certificate.not_valid_after_utc.timestamp()
+
+
+class CertificateStore:
+    """
+    PEM certificates by name in one SQLite file, with in-memory index of names and expiry times.
+    """
+    def __init__(self, database_path: str):
+        """
+        :param database_path: string, full path to the SQLite file. It will be created if it doesn't exist.
+        """
+
+        self.database_path: str = database_path
+        # True if the file didn't exist and was created.
+        self.is_created: bool = not os.path.isfile(database_path)
+
+        database_directory: str = os.path.dirname(database_path)
+        if database_directory:
+            os.makedirs(database_directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database_path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS certificates ('
+            'name TEXT PRIMARY KEY, pem BLOB NOT NULL, not_after REAL, modified REAL NOT NULL) WITHOUT ROWID')
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS certificates_not_after ON certificates (not_after)')
+
+        # Name to 'not_after' of all the certificates in the file, after 'preload()'.
+        self._index: dict[str, float | None] | None = None
+        # Name to PEM, after 'preload(load_pem=True)'.
+        self._pem_cache: dict[str, bytes] | None = None
+
+    def preload(self, load_pem: bool = False):
+        """
+        Load the names and expiry times of all the certificates to memory. After that, names that are not in the
+        index are known not to be in the store without querying the file.
+
+        :param load_pem: boolean, if True, the PEMs are loaded to memory too.
+        :return: None.
+        """
+
+        with self._lock:
+            if load_pem:
+                rows = self._connection.execute('SELECT name, not_after, pem FROM certificates').fetchall()
+                self._pem_cache = {name: pem for name, _, pem in rows}
+            else:
+                rows = self._connection.execute('SELECT name, not_after FROM certificates').fetchall()
+            self._index = {row[0]: row[1] for row in rows}
+
+    def __contains__(self, name: str) -> bool:
+        if self._index is not None:
+            return name in self._index
+        with self._lock:
+            return self._connection.execute(
+                'SELECT 1 FROM certificates WHERE name = ?', (name,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM certificates').fetchone()[0]
+
+    def get(self, name: str) -> bytes:
+        """
+        Get the PEM of the certificate.
+
+        :param name: string, name of the certificate.
+        :return: bytes, PEM, or empty bytes if it is not in the store.
+        """
+
+        if self._pem_cache is not None:
+            return self._pem_cache.get(name, b'')
+        if self._index is not None and name not in self._index:
+            return b''
+
+        with self._lock:
+            row = self._connection.execute('SELECT pem FROM certificates WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else b''
+
+    def set(self, name: str, certificate_pem: bytes):
+        """
+        Add or overwrite the PEM of the certificate.
+
+        :param name: string, name of the certificate.
+        :param certificate_pem: bytes, PEM of the certificate, can also contain the private key.
+        :return: None.
+        """
+
+        self.set_many([(name, certificate_pem)])
+
+    def __setitem__(self, name: str, certificate_pem: bytes):
+        self.set(name, certificate_pem)
+
+    def set_many(self, certificates: list[tuple[str, bytes]]):
+        """
+        Add or overwrite PEMs of several certificates in one transaction.
+
+        :param certificates: list of tuples (name, PEM bytes).
+        :return: None.
+        """
+
+        modified: float = time.time()
+        rows: list = [
+            (name, certificate_pem, get_certificate_not_after_timestamp(certificate_pem), modified)
+            for name, certificate_pem in certificates]
+
+        with self._lock:
+            with self._connection:
+                self._connection.execute('BEGIN')
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO certificates (name, pem, not_after, modified) VALUES (?, ?, ?, ?)', rows)
+
+            for name, certificate_pem, not_after, _ in rows:
+                if self._index is not None:
+                    self._index[name] = not_after
+                if self._pem_cache is not None:
+                    self._pem_cache[name] = certificate_pem
+
+    def delete_expired(self, expiry_margin_seconds: float = 0) -> int:
+        """
+        Delete the certificates that are expired, or will expire in the margin.
+        Certificates without expiry time (their PEM couldn't be read when they were set) are not deleted.
+
+        :param expiry_margin_seconds: float, certificates that expire in this number of seconds from now are
+            deleted too.
+        :return: integer, number of deleted certificates.
+        """
+
+        expiry_timestamp: float = time.time() + expiry_margin_seconds
+        with self._lock:
+            with self._connection:
+                self._connection.execute('BEGIN')
+                names: list = [row[0] for row in self._connection.execute(
+                    'SELECT name FROM certificates WHERE not_after < ?', (expiry_timestamp,))]
+                self._connection.execute('DELETE FROM certificates WHERE not_after < ?', (expiry_timestamp,))
+
+            for name in names:
+                if self._index is not None:
+                    self._index.pop(name, None)
+                if self._pem_cache is not None:
+                    self._pem_cache.pop(name, None)
+
+        return len(names)
+
+    def import_pem_directory(self, directory_path: str) -> int:
+        """
+        Import all the '.pem' files in the directory to the store, the file name without the extension is used as
+        the certificate name. Files that don't contain a readable certificate are skipped, so every imported
+        certificate has expiry time for 'delete_expired'.
+        The files are not deleted, they stay in the directory after the import and are not read again.
+
+        :param directory_path: string, full path to the directory.
+        :return: integer, number of imported certificates.
+        """
+
+        certificates: list = list()
+        with os.scandir(directory_path) as directory_entries:
+            for directory_entry in directory_entries:
+                if not directory_entry.is_file() or not directory_entry.name.endswith('.pem'):
+                    continue
+                with open(directory_entry.path, 'rb') as file_object:
+                    certificate_pem: bytes = file_object.read()
+                if get_certificate_not_after_timestamp(certificate_pem) is None:
+                    continue
+                certificates.append((directory_entry.name[:-len('.pem')], certificate_pem))
+
+        if certificates:
+            self.set_many(certificates)
+        return len(certificates)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_STORES: dict[str, CertificateStore] = dict()
+_STORES_LOCK = threading.Lock()
+
+
+def get_certificate_store(directory_path: str, import_pem_files: bool = True) -> CertificateStore:
+    """
+    Get the process wide certificate store of the directory, open it on the first call.
+
+    :param directory_path: string, full path to the directory of the store file.
+    :param import_pem_files: boolean, if True and the store file is created, the '.pem' files that are already
+        in the directory are imported to it.
+    :return: CertificateStore instance.
+    """
+
+    database_path: str = os.path.join(directory_path, STORE_FILE_NAME)
+    with _STORES_LOCK:
+        certificate_store = _STORES.get(database_path)
+        if certificate_store is None:
+            certificate_store = CertificateStore(database_path)
+            if certificate_store.is_created and import_pem_files:
+                certificate_store.import_pem_directory(directory_path)
+            _STORES[database_path] = certificate_store
+
+    return certificate_store
+
+
+def close_certificate_store(directory_path: str):
+    """
+    Close the certificate store of the directory, if it was opened by 'get_certificate_store'.
+
+    :param directory_path: string, full path to the directory of the store file.
+    :return: None.
+    """
+
+    with _STORES_LOCK:
+        certificate_store = _STORES.pop(os.path.join(directory_path, STORE_FILE_NAME), None)
+    if certificate_store is not None:
+        certificate_store.close()
@@ -261,6 +261,28 @@ class FileCache(object):
             return b''
 
 
+# =================================================================
+class StoreCache(object):
+    """
+    Host certificates cache in a 'cert_store.CertificateStore', instead of a file per host.
+    The cache key of a host is its name in the store.
+    """
+    def __init__(self, certificate_store):
+        self.certificate_store = certificate_store
+        self.modified = False
+
+    @staticmethod
+    def key_for_host(host):
+        return host.replace(':', '-')
+
+    def __setitem__(self, host, cert_string):
+        self.certificate_store[self.key_for_host(host)] = cert_string
+        self.modified = True
+
+    def get(self, host):
+        return self.certificate_store.get(self.key_for_host(host))
+
+
 # =================================================================
 class RootCACache(FileCache):
     def __init__(self, ca_file):
@@ -1,6 +1,6 @@
 from ...domains import get_domain_without_first_subdomain_if_no_subdomain_return_as_is
 from ...print_api import print_api
-from .certauth import CertificateAuthority
+from .certauth import CertificateAuthority, StoreCache
 
 # Needed to read SAN (Subject Alternative Names) from certificate.
 from cryptography import x509
@@ -37,17 +37,23 @@ def extract_san_dns_entries_from_x509_certificate(open_ssl_x509):
 
 
 class CertAuthWrapper:
-    def __init__(self, ca_certificate_name, ca_certificate_filepath, server_certificate_directory):
+    def __init__(
+            self, ca_certificate_name, ca_certificate_filepath, server_certificate_directory,
+            server_certificate_store=None):
         """
         :param ca_certificate_name:
         :param ca_certificate_filepath: string, full file path to CA certificate. If CA certificate is non-existent
             in this path, it will be created there.
         :param server_certificate_directory: string, full path to directory, where to store server certificate.
             If server certificate already exists it will be overwritten.
+        :param server_certificate_store: 'cert_store.CertificateStore' object. If provided, server certificates
+            are stored in it instead of files in 'server_certificate_directory', and the cache key that
+            is returned for a server certificate is its name in the store instead of the file path.
         """
         self.ca_certificate_name: str = ca_certificate_name
         self.ca_certificate_filepath: str = ca_certificate_filepath
         self.server_certificate_directory: str = server_certificate_directory
+        self.server_certificate_store = server_certificate_store
 
         # CertificateAuthority instance.
         self.cert_auth = None
@@ -59,8 +65,13 @@ class CertAuthWrapper:
         # Full file paths for certificates should be used.
         # The CA file has to be ".pem" extension. The key and the certificate generated by certauth are included
         # in the same file. The private key is first and the certificate second.
+        if self.server_certificate_store is not None:
+            cert_cache = StoreCache(self.server_certificate_store)
+        else:
+            cert_cache = self.server_certificate_directory
+
         self.cert_auth = CertificateAuthority(
-            self.ca_certificate_name, self.ca_certificate_filepath, cert_cache=self.server_certificate_directory)
+            self.ca_certificate_name, self.ca_certificate_filepath, cert_cache=cert_cache)
 
     def create_overwrite_server_certificate_ca_signed(
             self, domains_with_wildcards: list, server_certificate_file_name_no_extension: str, **kwargs):
@@ -0,0 +1,261 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Union
+
+
+# Constants from 'sys/inotify.h'.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+# Events that mean that the content of a file in the watched directory was changed.
+# 'IN_MODIFY' and 'IN_CREATE' are not used, since they fire in the middle of a write (truncate on open, each write),
+# the final state is reported by 'IN_CLOSE_WRITE' / 'IN_MOVED_TO'. Files that are written without closing
+# (logs) should be waited with a timeout.
+FILE_CHANGE_EVENTS_MASK: int = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+
+# struct inotify_event: int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[len].
+_EVENT_HEADER_STRUCT = struct.Struct('iIII')
+_READ_BUFFER_SIZE: int = 64 * 1024
+
+_LIBC = None
+
+
+def is_inotify_available() -> bool:
+    """
+    Check if inotify can be used on current system.
+
+    :return: boolean.
+    """
+
+    if not sys.platform.startswith('linux'):
+        return False
+
+    try:
+        _get_libc()
+    except (OSError, AttributeError):
+        return False
+
+    return True
+
+
+def _get_libc():
+    global _LIBC
+
+    if _LIBC is None:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_init1.restype = ctypes.c_int
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_add_watch.restype = ctypes.c_int
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        libc.inotify_rm_watch.restype = ctypes.c_int
+        _LIBC = libc
+
+    return _LIBC
+
+
+def _raise_os_error(message: str):
+    error_number = ctypes.get_errno()
+    raise OSError(error_number, f'{message}: {os.strerror(error_number)}')
+
+
+class InotifyFileWatcher:
+    """
+    Watch many files with one inotify file descriptor and one reader thread.
+    The watches are on the parent directories, not on the files themselves, so a file that is replaced with
+    rename (editors, atomic writes) is still tracked. Each watched file gets its own 'threading.Event' that is set
+    when the kernel reports a change for its name in the directory.
+
+    Usage:
+        watcher = get_shared_file_watcher()
+        watcher.add_file('/etc/hosts')
+        # Blocks until the file is closed after write, replaced or deleted.
+        changed: bool = watcher.wait_for_change('/etc/hosts', timeout=None)
+    """
+
+    def __init__(self):
+        self._libc = _get_libc()
+        self._inotify_fd: int = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._inotify_fd < 0:
+            _raise_os_error('inotify_init1 failed')
+
+        # Wake up pipe, used to stop the reader thread.
+        self._wake_read_fd, self._wake_write_fd = os.pipe()
+
+        self._lock = threading.Lock()
+        # wd -> directory path.
+        self._watch_descriptors: dict[int, str] = dict()
+        # directory path -> wd.
+        self._directory_watches: dict[str, int] = dict()
+        # directory path -> {file name: threading.Event}.
+        self._file_events: dict[str, dict[str, threading.Event]] = dict()
+
+        self._running: bool = True
+        self._thread = threading.Thread(target=self._reader_loop, name='InotifyFileWatcher', daemon=True)
+        self._thread.start()
+
+    def add_file(self, file_path: str) -> threading.Event:
+        """
+        Start watching the file. Adding the same file again returns the same event.
+
+        :param file_path: string, full path to the file.
+        :return: threading.Event, set on each change of the file.
+        """
+
+        directory_path, file_name = self._split_path(file_path)
+
+        with self._lock:
+            if directory_path not in self._directory_watches:
+                wd: int = self._libc.inotify_add_watch(
+                    self._inotify_fd, os.fsencode(directory_path), FILE_CHANGE_EVENTS_MASK | IN_ONLYDIR)
+                if wd < 0:
+                    _raise_os_error(f'inotify_add_watch failed on [{directory_path}]')
+                self._directory_watches[directory_path] = wd
+                self._watch_descriptors[wd] = directory_path
+
+            files_events = self._file_events.setdefault(directory_path, dict())
+            if file_name not in files_events:
+                files_events[file_name] = threading.Event()
+
+            return files_events[file_name]
+
+    def remove_file(self, file_path: str) -> None:
+        """
+        Stop watching the file. The directory watch is removed when no files are left in it.
+
+        :param file_path: string, full path to the file.
+        """
+
+        directory_path, file_name = self._split_path(file_path)
+
+        with self._lock:
+            files_events = self._file_events.get(directory_path)
+            if files_events is None:
+                return
+
+            files_events.pop(file_name, None)
+            if not files_events:
+                self._file_events.pop(directory_path)
+                wd = self._directory_watches.pop(directory_path, None)
+                if wd is not None:
+                    self._watch_descriptors.pop(wd, None)
+                    self._libc.inotify_rm_watch(self._inotify_fd, wd)
+
+    def wait_for_change(self, file_path: str, timeout: Union[float, None] = None) -> bool:
+        """
+        Block until the file changes. Changes that happened since the last call are also reported, so nothing
+        is lost between the calls.
+
+        :param file_path: string, full path to the file.
+        :param timeout: float, seconds to wait. None to wait forever.
+        :return: boolean, True if the file changed, False on timeout.
+        """
+
+        event = self.add_file(file_path)
+        changed: bool = event.wait(timeout)
+        if changed:
+            event.clear()
+        return changed
+
+    def close(self) -> None:
+        """
+        Stop the reader thread and close the inotify file descriptor.
+        """
+
+        if not self._running:
+            return
+
+        self._running = False
+        os.write(self._wake_write_fd, b'\0')
+        self._thread.join()
+
+        os.close(self._inotify_fd)
+        os.close(self._wake_read_fd)
+        os.close(self._wake_write_fd)
+
+    @staticmethod
+    def _split_path(file_path: str) -> tuple[str, str]:
+        path = Path(file_path).absolute()
+        return str(path.parent), path.name
+
+    def _reader_loop(self):
+        while self._running:
+            readable, _, _ = select.select([self._inotify_fd, self._wake_read_fd], [], [])
+            if self._wake_read_fd in readable:
+                break
+
+            try:
+                buffer = os.read(self._inotify_fd, _READ_BUFFER_SIZE)
+            except BlockingIOError:
+                continue
+            except OSError as exception_object:
+                if exception_object.errno == errno.EINTR:
+                    continue
+                raise
+
+            self._dispatch_events(buffer)
+
+    def _dispatch_events(self, buffer: bytes):
+        offset: int = 0
+        with self._lock:
+            while offset + _EVENT_HEADER_STRUCT.size <= len(buffer):
+                wd, mask, _, name_length = _EVENT_HEADER_STRUCT.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER_STRUCT.size
+                file_name = os.fsdecode(buffer[offset:offset + name_length].rstrip(b'\0'))
+                offset += name_length
+
+                directory_path = self._watch_descriptors.get(wd)
+                if directory_path is None:
+                    continue
+
+                files_events = self._file_events[directory_path]
+
+                # The directory itself was removed / unmounted, the kernel dropped the watch.
+                # Wake everyone in it, the watch will be added again on next 'add_file'.
+                if mask & IN_IGNORED:
+                    self._watch_descriptors.pop(wd, None)
+                    self._directory_watches.pop(directory_path, None)
+                    for event in files_events.values():
+                        event.set()
+                    continue
+
+                event = files_events.get(file_name)
+                if event is not None:
+                    event.set()
+
+
+_SHARED_WATCHER: Union[InotifyFileWatcher, None] = None
+_SHARED_WATCHER_LOCK = threading.Lock()
+
+
+def get_shared_file_watcher() -> InotifyFileWatcher:
+    """
+    Get the process wide 'InotifyFileWatcher', so all the file monitors share one inotify descriptor and thread.
+
+    :return: InotifyFileWatcher.
+    """
+
+    global _SHARED_WATCHER
+
+    with _SHARED_WATCHER_LOCK:
+        if _SHARED_WATCHER is None:
+            _SHARED_WATCHER = InotifyFileWatcher()
+        return _SHARED_WATCHER
@@ -0,0 +1,353 @@
+import json
+import time
+import queue
+import threading
+from datetime import datetime, date
+from typing import Callable, Union
+
+from elasticsearch import Elasticsearch, ApiError, TransportError
+
+from . import elasticsearchw
+from ...basics import dicts
+from ... import print_api
+
+
+DEFAULT_MAX_BATCH_DOCUMENTS: int = 1000
+DEFAULT_MAX_BATCH_BYTES: int = 5 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL_SECONDS: float = 1.0
+# HTTP statuses of the whole bulk request or of a single item that are worth sending again.
+RETRYABLE_STATUS_CODES: tuple = (429, 502, 503, 504)
+
+
+def _json_default(value):
+    # Same types that the Elasticsearch client serializer supports for the regular 'index'.
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class _Batch:
+    def __init__(self):
+        # Each entry is a tuple of the action line and the source line, both ndjson encoded bytes.
+        self.entries: list[tuple[bytes, bytes]] = []
+        self.size_bytes: int = 0
+        self.created_time: float = time.monotonic()
+
+    def add(self, action_line: bytes, source_line: bytes):
+        self.entries.append((action_line, source_line))
+        self.size_bytes += len(action_line) + len(source_line)
+
+    @staticmethod
+    def get_operations_of(entries: list[tuple[bytes, bytes]]) -> list[bytes]:
+        operations: list = []
+        for action_line, source_line in entries:
+            operations.append(action_line)
+            operations.append(source_line)
+        return operations
+
+
+class BulkIndexer:
+    """
+    Buffered bulk indexing of documents to Elasticsearch, instead of one HTTP request for each document
+    in 'elasticsearchw.index'.
+    The documents are serialized on 'add' and collected to a batch. The batch is flushed when it reaches the
+    maximum documents count or bytes, or when it is older than the flush interval.
+    Flushed batches are sent by background threads through a bounded queue. When the queue is full, 'add' blocks
+    until a batch is sent (backpressure), so the memory is bounded when Elasticsearch is slower than the producer.
+    Items of the bulk response that failed with a retryable status (429, 5xx) are sent again with backoff,
+    the other failures are counted and reported.
+
+    Usage:
+        with BulkIndexer(index_name='statistics') as indexer:
+            for doc in docs:
+                indexer.add(doc)
+
+        print(indexer.get_statistics())
+    """
+
+    def __init__(
+            self,
+            index_name: str,
+            elastic_wrapper: Elasticsearch = None,
+            max_batch_documents: int = DEFAULT_MAX_BATCH_DOCUMENTS,
+            max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+            flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+            worker_count: int = 2,
+            max_queued_batches: int = 4,
+            max_retries: int = 3,
+            retry_backoff_seconds: float = 0.5,
+            use_current_timestamp: bool = False,
+            convert_mixed_lists_to_strings: bool = False,
+            batch_report_callback: Callable[[dict], None] = None,
+            print_kwargs: dict = None
+    ):
+        """
+        :param index_name: str, the default index of the documents.
+        :param elastic_wrapper: Elasticsearch, the Elasticsearch wrapper. If None, 'get_elastic_wrapper' is used once.
+        :param max_batch_documents: int, the maximum number of documents in one bulk request.
+        :param max_batch_bytes: int, the maximum size of the ndjson body of one bulk request.
+        :param flush_interval_seconds: float, the maximum time in seconds that a document waits in the buffer.
+        :param worker_count: int, number of threads that send the bulk requests.
+        :param max_queued_batches: int, number of flushed batches that wait for a worker. When the queue is full,
+            'add' blocks.
+        :param max_retries: int, number of times to send again the retryable failures of a batch.
+        :param retry_backoff_seconds: float, the wait before the first retry, doubled on each next retry.
+        :param use_current_timestamp: bool, if True, the current datetime is used as the timestamp of each document.
+        :param convert_mixed_lists_to_strings: bool, if True, mixed lists or tuples when entries are strings and
+            integers, the integers will be converted to strings.
+        :param batch_report_callback: callable, called from the worker thread after each batch with a dict:
+            'documents': int, number of documents in the batch.
+            'bytes': int, size of the batch body.
+            'latency_seconds': float, time from the first request of the batch until the last response.
+            'retries': int, number of retries of the batch.
+            'failed': int, number of documents that weren't indexed.
+            'errors': list, the errors of the failed documents.
+        :param print_kwargs: dict, print_api kwargs.
+        """
+
+        if elastic_wrapper is None:
+            elastic_wrapper = elasticsearchw.get_elastic_wrapper()
+
+        self.index_name: str = index_name
+        self.elastic_wrapper: Elasticsearch = elastic_wrapper
+        self.max_batch_documents: int = max_batch_documents
+        self.max_batch_bytes: int = max_batch_bytes
+        self.flush_interval_seconds: float = flush_interval_seconds
+        self.max_retries: int = max_retries
+        self.retry_backoff_seconds: float = retry_backoff_seconds
+        self.use_current_timestamp: bool = use_current_timestamp
+        self.convert_mixed_lists_to_strings: bool = convert_mixed_lists_to_strings
+        self.batch_report_callback: Callable[[dict], None] = batch_report_callback
+        self.print_kwargs: dict = print_kwargs or {}
+
+        self.statistics: dict = {
+            'batches': 0,
+            'documents_indexed': 0,
+            'documents_failed': 0,
+            'retries': 0,
+            'last_batch_latency_seconds': None,
+            'max_batch_latency_seconds': 0.0,
+            'total_batch_latency_seconds': 0.0
+        }
+
+        self._buffer: _Batch = _Batch()
+        self._buffer_lock = threading.Lock()
+        self._statistics_lock = threading.Lock()
+        self._batches_queue: queue.Queue = queue.Queue(maxsize=max_queued_batches)
+        self._stop_event = threading.Event()
+        self._is_closed: bool = False
+
+        self._workers: list = []
+        for worker_index in range(worker_count):
+            worker = threading.Thread(
+                target=self._worker_loop, name=f'BulkIndexer-{worker_index}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        self._flush_timer_thread = threading.Thread(
+            target=self._flush_timer_loop, name='BulkIndexer-timer', daemon=True)
+        self._flush_timer_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(
+            self,
+            doc: dict,
+            doc_id: str = None,
+            index_name: str = None
+    ):
+        """
+        Add a document to the current batch. Blocks if the queue of flushed batches is full.
+
+        :param doc: dict, the document to be indexed.
+        :param doc_id: str, the id of the document. If None, a random id is generated.
+        :param index_name: str, the index of this document. If None, the index of the indexer is used.
+        """
+
+        if self._is_closed:
+            raise RuntimeError('BulkIndexer is closed.')
+
+        if self.use_current_timestamp:
+            doc['timestamp'] = datetime.now()
+
+        if self.convert_mixed_lists_to_strings:
+            doc = dicts.convert_int_to_str_in_mixed_lists(doc)
+
+        action: dict = {'_index': index_name or self.index_name}
+        if doc_id is not None:
+            action['_id'] = doc_id
+
+        action_line: bytes = json.dumps({'index': action}, separators=(',', ':')).encode() + b'\n'
+        source_line: bytes = (
+                json.dumps(doc, separators=(',', ':'), default=_json_default, ensure_ascii=False).encode() + b'\n')
+
+        full_batch: Union[_Batch, None] = None
+        with self._buffer_lock:
+            self._buffer.add(action_line, source_line)
+            if (len(self._buffer.entries) >= self.max_batch_documents or
+                    self._buffer.size_bytes >= self.max_batch_bytes):
+                full_batch = self._swap_buffer()
+
+        # The put is outside the lock, so the timer and other producers aren't blocked by the backpressure.
+        if full_batch is not None:
+            self._batches_queue.put(full_batch)
+
+    def flush(self):
+        """
+        Send the current batch and wait until all the flushed batches were sent.
+        """
+
+        with self._buffer_lock:
+            batch: Union[_Batch, None] = self._swap_buffer()
+        if batch is not None:
+            self._batches_queue.put(batch)
+
+        self._batches_queue.join()
+
+    def close(self):
+        """
+        Flush all the documents and stop the background threads.
+        """
+
+        if self._is_closed:
+            return
+
+        self.flush()
+        self._is_closed = True
+        self._stop_event.set()
+
+        for _ in self._workers:
+            self._batches_queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._flush_timer_thread.join()
+
+    def get_statistics(self) -> dict:
+        """
+        Get the statistics of all the batches that were sent.
+
+        :return: dict, the 'statistics' with the 'average_batch_latency_seconds'.
+        """
+
+        with self._statistics_lock:
+            statistics: dict = dict(self.statistics)
+
+        if statistics['batches']:
+            statistics['average_batch_latency_seconds'] = (
+                    statistics['total_batch_latency_seconds'] / statistics['batches'])
+        else:
+            statistics['average_batch_latency_seconds'] = None
+
+        return statistics
+
+    def _swap_buffer(self) -> Union[_Batch, None]:
+        # Must be called with the buffer lock.
+        if not self._buffer.entries:
+            return None
+
+        batch: _Batch = self._buffer
+        self._buffer = _Batch()
+        return batch
+
+    def _flush_timer_loop(self):
+        while not self._stop_event.wait(self.flush_interval_seconds / 2):
+            with self._buffer_lock:
+                if time.monotonic() - self._buffer.created_time < self.flush_interval_seconds:
+                    continue
+                batch: Union[_Batch, None] = self._swap_buffer()
+                # Reset the age of an empty buffer, so the first document gets the full interval.
+                if batch is None:
+                    self._buffer.created_time = time.monotonic()
+
+            if batch is not None:
+                self._batches_queue.put(batch)
+
+    def _worker_loop(self):
+        while True:
+            batch: Union[_Batch, None] = self._batches_queue.get()
+            try:
+                if batch is None:
+                    return
+                self._send_batch(batch)
+            except Exception as exception_object:
+                print_api.print_api(
+                    f'BulkIndexer batch failed: {exception_object}', error_type=True, logger_method='error',
+                    **self.print_kwargs)
+            finally:
+                self._batches_queue.task_done()
+
+    def _send_batch(self, batch: _Batch):
+        documents_count: int = len(batch.entries)
+        entries: list = batch.entries
+        errors: list = []
+        retries: int = 0
+
+        start_time: float = time.perf_counter()
+        while True:
+            retry_entries: list = []
+            try:
+                response = self.elastic_wrapper.bulk(operations=_Batch.get_operations_of(entries))
+            except (ApiError, TransportError) as exception_object:
+                status_code = getattr(getattr(exception_object, 'meta', None), 'status', None)
+                # Connection errors don't have a status, they are retried too.
+                if status_code is None or status_code in RETRYABLE_STATUS_CODES:
+                    retry_entries = entries
+                    last_errors = [str(exception_object)] * len(entries)
+                else:
+                    errors.extend([str(exception_object)] * len(entries))
+                    break
+            else:
+                last_errors: list = []
+                if response.get('errors'):
+                    for entry, item in zip(entries, response['items']):
+                        item_result: dict = next(iter(item.values()))
+                        if 'error' not in item_result:
+                            continue
+                        if item_result.get('status') in RETRYABLE_STATUS_CODES:
+                            retry_entries.append(entry)
+                            last_errors.append(item_result['error'])
+                        else:
+                            errors.append(item_result['error'])
+
+            if not retry_entries:
+                break
+            if retries >= self.max_retries:
+                errors.extend(last_errors)
+                break
+
+            time.sleep(self.retry_backoff_seconds * (2 ** retries))
+            retries += 1
+            entries = retry_entries
+
+        latency_seconds: float = time.perf_counter() - start_time
+
+        report: dict = {
+            'documents': documents_count,
+            'bytes': batch.size_bytes,
+            'latency_seconds': latency_seconds,
+            'retries': retries,
+            'failed': len(errors),
+            'errors': errors
+        }
+
+        with self._statistics_lock:
+            self.statistics['batches'] += 1
+            self.statistics['documents_indexed'] += documents_count - len(errors)
+            self.statistics['documents_failed'] += len(errors)
+            self.statistics['retries'] += retries
+            self.statistics['last_batch_latency_seconds'] = latency_seconds
+            self.statistics['max_batch_latency_seconds'] = max(
+                self.statistics['max_batch_latency_seconds'], latency_seconds)
+            self.statistics['total_batch_latency_seconds'] += latency_seconds
+
+        if errors:
+            print_api.print_api(
+                f'BulkIndexer: {len(errors)} of {documents_count} documents failed to index. '
+                f'First error: {errors[0]}', error_type=True, logger_method='error', **self.print_kwargs)
+
+        if self.batch_report_callback is not None:
+            self.batch_report_callback(report)
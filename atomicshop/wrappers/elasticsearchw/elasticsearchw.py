@@ -1,7 +1,11 @@
 from elasticsearch import Elasticsearch
 from datetime import datetime
+import copy
 import json
-from typing import Union
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Generator
 
 from . import config_basic
 from ...basics import dicts
@@ -122,6 +126,7 @@ def search(
         and converts their values using 'json.loads' if found.
     :param elastic_wrapper: Elasticsearch, the Elasticsearch wrapper.
     :return: dict, the result of the search operation.
+        The whole result is in memory, for large result sets use 'search_iterator'.
 
     Usage:
         query = {
@@ -132,37 +137,6 @@ def search(
         res = search(index_name="test_index", query=query)
     """
 
-    def convert_key_values_to_objects(returned_data: Union[dict, list]) -> Union[dict, list]:
-        """
-        Recursively searches for keys 'test1' and 'test2' in a nested dictionary 'd'
-        and converts their values using json.loads if found.
-
-        :param returned_data: The nested dictionary to search through.
-        :type returned_data: dict
-        """
-
-        nonlocal keys_convert_to_json
-
-        if isinstance(returned_data, dict):
-            for key, value in returned_data.items():
-                if key in keys_convert_to_json:
-                    # Can be that the value is None, so we don't need to convert it.
-                    if value is None:
-                        continue
-
-                    try:
-                        returned_data[key] = json.loads(value)
-                    except (ValueError, TypeError):
-                        # This is needed only to know the possible exception types.
-                        raise
-                else:
-                    convert_key_values_to_objects(value)
-        elif isinstance(returned_data, list):
-            for i, item in enumerate(returned_data):
-                returned_data[i] = convert_key_values_to_objects(item)
-
-        return returned_data
-
     if elastic_wrapper is None:
         elastic_wrapper = get_elastic_wrapper()
 
@@ -171,7 +145,7 @@ def search(
     hits_only: list = get_response_hits(res)
 
     if keys_convert_to_json is not None:
-        hits_only = convert_key_values_to_objects(hits_only)
+        hits_only = convert_key_values_to_objects(hits_only, keys_convert_to_json)
 
     aggregations: dict = dict()
     if 'aggregations' in res:
@@ -180,6 +154,184 @@ def search(
     return res, hits_only, aggregations
 
 
+def convert_key_values_to_objects(
+        returned_data: Union[dict, list],
+        keys_convert_to_json: list
+) -> Union[dict, list]:
+    """
+    Recursively searches for keys from 'keys_convert_to_json' in a nested dictionary or list
+    and converts their values using json.loads if found.
+
+    :param returned_data: The nested dictionary or list to search through.
+    :param keys_convert_to_json: list, the keys that their values should be converted from string to json.
+    :return: the same 'returned_data' object, with converted values.
+    """
+
+    if isinstance(returned_data, dict):
+        for key, value in returned_data.items():
+            if key in keys_convert_to_json:
+                # Can be that the value is None, so we don't need to convert it.
+                if value is None:
+                    continue
+
+                try:
+                    returned_data[key] = json.loads(value)
+                except (ValueError, TypeError):
+                    # This is needed only to know the possible exception types.
+                    raise
+            else:
+                convert_key_values_to_objects(value, keys_convert_to_json)
+    elif isinstance(returned_data, list):
+        for i, item in enumerate(returned_data):
+            returned_data[i] = convert_key_values_to_objects(item, keys_convert_to_json)
+
+    return returned_data
+
+
+def search_iterator(
+        index_name: str,
+        query: dict = None,
+        keys_convert_to_json: list = None,
+        page_size: int = 1000,
+        keep_alive: str = '1m',
+        slices: int = 1,
+        hits_sources_only: bool = True,
+        elastic_wrapper: Elasticsearch = None
+) -> Generator[dict, None, None]:
+    """
+    The function iterates over all the documents that match the query, page by page, with a point in time (PIT)
+    and 'search_after'. Unlike 'search' and the 'from' / 'size' of 'queries.pagination', there is no limit on the
+    depth of the results and deep pages are as fast as the first one.
+    Only one page (per slice) is held in memory, the 'keys_convert_to_json' conversion is done for each hit
+    when it is yielded.
+
+    :param index_name: str, the name of the index.
+    :param query: dict, the query to be used for searching the documents. Same as in 'search'.
+        If None, all the documents are returned.
+        The 'from' and 'size' keys are ignored, aggregations are removed.
+        If 'sort' is specified, the documents are yielded by this order (for one slice), otherwise by the
+        most efficient order '_shard_doc'.
+    :param keys_convert_to_json: list, the keys of the documents that should be converted from string to json.
+        Check the 'search' function.
+    :param page_size: int, the number of documents in each request.
+    :param keep_alive: str, how long Elasticsearch should keep the point in time between the requests.
+        Example: '1m', '30s'.
+    :param slices: int, number of slices of the point in time that are fetched concurrently, each in its own thread.
+        With more than 1 slice, the order of the documents between the slices is not kept.
+    :param hits_sources_only: bool, if True, the '_source' of each hit is yielded, same as 'get_response_hits'.
+        If False, the full hit is yielded with its '_id', '_index', 'sort' and '_source'.
+    :param elastic_wrapper: Elasticsearch, the Elasticsearch wrapper.
+    :return: generator of dicts, each dict is a document.
+
+    Usage:
+        query = {
+            "query": {
+                "range": {"timestamp": {"gte": "now-1d"}}
+            }
+        }
+        for doc in search_iterator(index_name="test_index", query=query, slices=4):
+            print(doc)
+    """
+
+    if elastic_wrapper is None:
+        elastic_wrapper = get_elastic_wrapper()
+
+    base_body: dict = copy.deepcopy(query) if query else {}
+    for key in ('from', 'size', 'aggs', 'aggregations'):
+        base_body.pop(key, None)
+    if 'query' not in base_body:
+        base_body['query'] = {'match_all': {}}
+    if 'sort' not in base_body:
+        base_body['sort'] = [{'_shard_doc': 'asc'}]
+    base_body['size'] = page_size
+
+    pit_id: str = elastic_wrapper.open_point_in_time(index=index_name, keep_alive=keep_alive)['id']
+
+    def get_hit_result(hit: dict) -> dict:
+        if keys_convert_to_json is not None:
+            hit['_source'] = convert_key_values_to_objects(hit['_source'], keys_convert_to_json)
+
+        if hits_sources_only:
+            return hit['_source']
+        return hit
+
+    def iterate_pages(slice_id: int = None, stop_event: threading.Event = None):
+        body: dict = copy.deepcopy(base_body)
+        if slice_id is not None:
+            body['slice'] = {'id': slice_id, 'max': slices}
+
+        current_pit_id: str = pit_id
+        while stop_event is None or not stop_event.is_set():
+            body['pit'] = {'id': current_pit_id, 'keep_alive': keep_alive}
+            response = elastic_wrapper.search(body=body)
+            # The id of the point in time can change between the requests.
+            current_pit_id = response.get('pit_id', current_pit_id)
+
+            hits: list = response['hits']['hits']
+            if not hits:
+                return
+
+            yield hits
+
+            if len(hits) < page_size:
+                return
+            body['search_after'] = hits[-1]['sort']
+
+    def iterate_slices() -> Generator[dict, None, None]:
+        # Each slice thread puts its pages to the queue, the queue is bounded so the memory is too.
+        pages_queue: queue.Queue = queue.Queue(maxsize=slices * 2)
+        stop_event = threading.Event()
+        end_of_slice = object()
+
+        def put_to_queue(item) -> bool:
+            while not stop_event.is_set():
+                try:
+                    pages_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fetch_slice(slice_id: int):
+            try:
+                for page in iterate_pages(slice_id, stop_event):
+                    if not put_to_queue(page):
+                        return
+            except Exception as exception_object:
+                put_to_queue(exception_object)
+                return
+            put_to_queue(end_of_slice)
+
+        with ThreadPoolExecutor(max_workers=slices) as executor:
+            for slice_index in range(slices):
+                executor.submit(fetch_slice, slice_index)
+
+            try:
+                finished_slices: int = 0
+                while finished_slices < slices:
+                    item = pages_queue.get()
+                    if item is end_of_slice:
+                        finished_slices += 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        for hit in item:
+                            yield get_hit_result(hit)
+            finally:
+                # Stops the slice threads if the generator was closed before the end.
+                stop_event.set()
+
+    try:
+        if slices > 1:
+            yield from iterate_slices()
+        else:
+            for page in iterate_pages():
+                for hit in page:
+                    yield get_hit_result(hit)
+    finally:
+        elastic_wrapper.close_point_in_time(id=pit_id)
+
+
 def count(index_name: str, query: dict, elastic_wrapper: Elasticsearch = None):
     """
     The function counts the number of documents in the index that match the query.
@@ -9,6 +9,7 @@ import threading
 import queue
 import multiprocessing
 import time
+import random
 
 from . import loggers, handlers, filters
 from ...file_io import csvs
@@ -595,12 +596,111 @@ def get_logger_with_level(
     # Get the logger.
     logger: logging.Logger = loggers.get_logger(logger_name)
     # Set the logger level if it is not None.
-    if logging_level:
+    # Setting the level clears the level cache of all the loggers, so it is skipped if the level is the same.
+    if logging_level and logging_level not in (logger.level, logging.getLevelName(logger.level)):
         loggers.set_logging_level(logger, logging_level)
 
     return logger
 
 
+def get_child_logger(
+        logger: Union[logging.Logger, 'ConnectionLogger'],
+        child_name: str
+) -> Union[logging.Logger, 'ConnectionLogger']:
+    """
+    Function to get the child logger of the logger, like the logger of a module.
+    If the logger is a ConnectionLogger, the child is resolved once per connection and has the same gating.
+
+    :param logger: Logger or ConnectionLogger.
+    :param child_name: string, name of the child, it is added to the name of the logger after a dot.
+    :return: Logger or ConnectionLogger.
+    """
+
+    if isinstance(logger, ConnectionLogger):
+        return logger.get_child(child_name)
+    return get_logger_with_level(f'{logger.name}.{child_name}')
+
+
+def get_logging_level_number(logging_level: Union[int, str]) -> int:
+    """
+    Convert the logging level name to its number.
+
+    :param logging_level: 'int' or 'str', the logging level, the name is case-insensitive. Example: 'DEBUG', 'info'.
+    :return: int, the logging level number.
+    :raises ValueError: if the name is not a known logging level.
+    """
+
+    if isinstance(logging_level, bool) or not isinstance(logging_level, (int, str)):
+        raise ValueError(f'Logging level must be a level name or number, not [{logging_level!r}].')
+    if isinstance(logging_level, int):
+        return logging_level
+
+    level_names_mapping: dict = logging.getLevelNamesMapping()
+    try:
+        return level_names_mapping[logging_level.upper()]
+    except KeyError:
+        raise ValueError(
+            f'Unknown logging level [{logging_level}], known levels: {list(level_names_mapping)}.') from None
+
+
+class ConnectionLogger(logging.LoggerAdapter):
+    """
+    Logger of one connection, that wraps the network logger.
+    Messages below the gating level are dropped before they are formatted, so use the lazy form
+    'logger.info("Received [%d] bytes", length)' on the hot paths instead of f-strings.
+    Only the sampled part of the connections logs all the levels, the rest of the connections log warnings and
+    errors only. Errors are never gated.
+    """
+    def __init__(
+            self,
+            logger: logging.Logger,
+            logging_level: Union[int, str] = logging.DEBUG,
+            sample_rate: float = 1.0,
+            is_sampled: bool = None
+    ):
+        """
+        :param logger: Logger to wrap.
+        :param logging_level: 'int' or 'str', the lowest level that is logged. Levels above 'ERROR' are lowered to
+            'ERROR', so errors are always logged. Unknown level name raises 'ValueError'.
+        :param sample_rate: float, part of the connections (0.0 to 1.0) that log all the levels from
+            'logging_level'. The rest of the connections log from 'WARNING'.
+        :param is_sampled: boolean, if provided, used instead of drawing the sample by 'sample_rate'.
+        """
+
+        super().__init__(logger, extra=None)
+
+        logging_level = min(get_logging_level_number(logging_level), logging.ERROR)
+
+        if is_sampled is None:
+            is_sampled = sample_rate >= 1 or random.random() < sample_rate
+
+        self.logging_level: int = logging_level
+        self.sample_rate: float = sample_rate
+        self.is_sampled: bool = is_sampled
+        self.gating_level: int = logging_level if is_sampled else max(logging_level, logging.WARNING)
+
+        self._children: dict[str, ConnectionLogger] = dict()
+
+    def isEnabledFor(self, level: int) -> bool:
+        return level >= self.gating_level and self.logger.isEnabledFor(level)
+
+    def get_child(self, child_name: str) -> 'ConnectionLogger':
+        """
+        Get the child ConnectionLogger with the same gating, resolved once per connection.
+
+        :param child_name: string, name of the child, it is added to the name of the logger after a dot.
+        :return: ConnectionLogger.
+        """
+
+        child_logger = self._children.get(child_name)
+        if child_logger is None:
+            child_logger = ConnectionLogger(
+                get_logger_with_level(f'{self.logger.name}.{child_name}'),
+                logging_level=self.logging_level, sample_rate=self.sample_rate, is_sampled=self.is_sampled)
+            self._children[child_name] = child_logger
+        return child_logger
+
+
 def disable_default_logger():
     """
     Function to disable default logger.
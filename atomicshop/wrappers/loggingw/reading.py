@@ -1,12 +1,14 @@
 import os
-from typing import Literal, Union
+from typing import Literal, Union, Generator, Iterable
 from pathlib import Path
 import datetime
 import re
+import csv
+import locale
 
 from ... import filesystem, datetimes
 from ...basics import booleans, list_of_classes
-from ...file_io import csvs
+from ...file_io import csvs, jsons
 
 
 def is_string_ends_with_ymd(s: str) -> bool:
@@ -247,6 +249,180 @@ def get_all_log_files_into_list(
     return logs_content
 
 
+def _get_file_checkpoint_key(file_stat: os.stat_result) -> str:
+    # The key is the identity of the file and not its path, so after rotation (rename) the file keeps its checkpoint
+    # and the new file with the old name is read from the start.
+    return f'{file_stat.st_dev}:{file_stat.st_ino}'
+
+
+def _iterate_complete_lines(
+        file_object,
+        encoding: str,
+        position: list
+) -> Generator[str, None, None]:
+    # Yields only lines that end with a new line, a partial line at the end of the file is still being written.
+    # 'position[0]' is the byte offset after the last line that was yielded.
+    for line in file_object:
+        if not line.endswith(b'\n'):
+            return
+        position[0] += len(line)
+        yield line.decode(encoding)
+
+
+def iterate_log_files_rows(
+        log_file_path: str,
+        date_format: str = None,
+        log_type: Literal['csv'] = 'csv',
+        header_type_of_files: Literal['first', 'all'] = 'first',
+        columns: list = None,
+        checkpoint_file_path: str = None,
+        encoding: str = None
+) -> Generator[dict, None, None]:
+    """
+    Generator version of 'get_all_log_files_into_list'. The rows of the log files are yielded one by one,
+    from the oldest file to the latest, so the memory doesn't depend on the size of the logs.
+
+    With 'checkpoint_file_path', the byte offset of each file (by the file identity, not the path, so it survives
+    the rotation rename) is kept in a json file, with the size and the modification time. On the next run only
+    the rows that were added after the previous run are read, and files that didn't change are not opened at all.
+    The checkpoint is saved when the generator is exhausted or closed, and includes all the rows that were yielded.
+    A partial last line (that is still being written) is not yielded and is read on the next run.
+
+    :param log_file_path: Path to the log file. Check the 'get_logs_paths' function for more details.
+    :param date_format: date format string pattern to match the date in the log file name.
+        Check the 'get_all_log_files_into_list' function.
+    :param log_type: Type of log to get.
+    :param header_type_of_files: Type of header to get from the files.
+        'first' - Only the first file has a header for CSV. This header will be used for the rest of the files.
+        'all' - Each CSV file has a header. Get the header from each file.
+    :param columns: list of strings, the columns to yield. If None, all the columns are yielded.
+        Rows are built only with these columns, same as 'csv.DictReader' missing values are None.
+    :param checkpoint_file_path: string, path to the json checkpoint file. If None, all the rows of all the files
+        are read on each run.
+    :param encoding: string, encoding of the files. None is the default encoding of 'open()'.
+        Only encodings that keep the new line as a single byte are supported (utf-8, cp1252...).
+    :return: generator of dicts, each dict is a row of the log files.
+
+    Usage:
+        for row in reading.iterate_log_files_rows(
+                log_file_path='/logs/statistics.csv', date_format='%Y-%m-%d',
+                columns=['host', 'path'], checkpoint_file_path='/logs/statistics_checkpoint.json'):
+            # Only the rows that were added since the previous run.
+            ...
+    """
+
+    if log_type != 'csv':
+        raise ValueError('Only "csv" log type is supported.')
+
+    if header_type_of_files not in ['first', 'all']:
+        raise ValueError('Only "first" and "all" header types are supported.')
+
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+
+    checkpoint: dict = {'header': None, 'files': {}}
+    if checkpoint_file_path and os.path.isfile(checkpoint_file_path):
+        checkpoint = jsons.read_json_file(checkpoint_file_path, stdout=False)
+
+    logs_files: list = get_logs_paths(
+        log_file_path=log_file_path,
+        date_format=date_format)
+
+    # Stat all the files first, so the checkpoints of the files that weren't reached (if the generator is closed
+    # in the middle) are kept, and only the checkpoints of the files that don't exist anymore are removed.
+    logs_files_stats: list = []
+    for single_file in logs_files:
+        try:
+            logs_files_stats.append((single_file, os.stat(single_file.path)))
+        except FileNotFoundError:
+            continue
+
+    new_files_checkpoints: dict = {}
+    for _, file_stat in logs_files_stats:
+        file_key: str = _get_file_checkpoint_key(file_stat)
+        if file_key in checkpoint['files']:
+            new_files_checkpoints[file_key] = checkpoint['files'][file_key]
+
+    columns_indexes: list = []
+
+    def get_row_dict(row: list, header: list) -> dict:
+        # Same as 'csv.DictReader' rows.
+        if columns is not None:
+            return {column_name: (row[column_index] if column_index is not None and column_index < len(row) else None)
+                    for column_name, column_index in columns_indexes}
+
+        row_dict: dict = dict(zip(header, row))
+        if len(row) > len(header):
+            row_dict[None] = row[len(header):]
+        elif len(row) < len(header):
+            for column_name in header[len(row):]:
+                row_dict[column_name] = None
+        return row_dict
+
+    try:
+        for single_file, file_stat in logs_files_stats:
+            file_key: str = _get_file_checkpoint_key(file_stat)
+            file_checkpoint: Union[dict, None] = new_files_checkpoints.get(file_key)
+
+            # The file was truncated or replaced, read it from the start.
+            if file_checkpoint is not None and file_stat.st_size < file_checkpoint['offset']:
+                file_checkpoint = None
+
+            if file_checkpoint is None:
+                file_checkpoint = {'offset': 0, 'header': None}
+            file_checkpoint['path'] = single_file.path
+            new_files_checkpoints[file_key] = file_checkpoint
+
+            # Nothing was added to the file since the previous run.
+            if (file_checkpoint['offset'] == file_stat.st_size and
+                    file_checkpoint.get('mtime_ns') == file_stat.st_mtime_ns):
+                continue
+
+            with open(single_file.path, 'rb') as file_object:
+                file_object.seek(file_checkpoint['offset'])
+                position: list = [file_checkpoint['offset']]
+                csv_reader = csv.reader(_iterate_complete_lines(file_object, encoding, position))
+
+                if header_type_of_files == 'all':
+                    header: Union[list, None] = file_checkpoint['header']
+                else:
+                    header = checkpoint['header']
+
+                if header is None:
+                    header = next(csv_reader, None)
+                    if header is None:
+                        continue
+                    if header_type_of_files == 'all':
+                        file_checkpoint['header'] = header
+                    else:
+                        checkpoint['header'] = header
+                    file_checkpoint['offset'] = position[0]
+
+                if columns is not None:
+                    columns_indexes = [
+                        (column_name, header.index(column_name) if column_name in header else None)
+                        for column_name in columns]
+
+                for row in csv_reader:
+                    # The row will be counted as read if the consumer stops after it.
+                    file_checkpoint['offset'] = position[0]
+                    # Empty lines are skipped, same as 'csv.DictReader'.
+                    if not row:
+                        continue
+                    yield get_row_dict(row, header)
+
+                if file_checkpoint['offset'] == file_stat.st_size:
+                    file_checkpoint['size'] = file_stat.st_size
+                    file_checkpoint['mtime_ns'] = file_stat.st_mtime_ns
+    finally:
+        if checkpoint_file_path:
+            # Only the checkpoints of the files that still exist are kept.
+            checkpoint['files'] = new_files_checkpoints
+            temp_checkpoint_file_path: str = f'{checkpoint_file_path}.{os.getpid()}.tmp'
+            jsons.write_json_file(checkpoint, temp_checkpoint_file_path, use_default_indent=True, stdout=False)
+            os.replace(temp_checkpoint_file_path, checkpoint_file_path)
+
+
 class LogReader:
     """
     This class gets the latest lines from the log file.
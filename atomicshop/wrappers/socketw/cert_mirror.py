@@ -0,0 +1,318 @@
+"""
+Mirroring of upstream server certificates for SNI, out of the handshake path.
+The first handshake for a host schedules a background job that connects to the real server, gets its certificate,
+copies its extensions and signs the mirrored leaf with the CA. Until the job is done the handshakes of the host get
+a generic leaf for the host name. Concurrent handshakes of the same host share one job, and the SSLContext of the
+mirrored leaf is kept in memory for the next handshakes.
+"""
+
+import ssl
+import time
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from . import creator, socket_base, socket_client, ssl_base
+from .. import pyopensslw, cryptographyw
+from ..certauthw import cert_store, certauth
+from ..certauthw.certauthw import CertAuthWrapper
+from ...print_api import print_api
+
+
+# Number of upstream certificates that are fetched at the same time.
+MIRROR_MAX_WORKERS: int = 8
+# Number of SSLContexts of mirrored leaves kept in memory.
+MIRRORED_CONTEXTS_MAX_SIZE: int = 1024
+# Number of generic leaves (and their SSLContexts) kept in memory.
+GENERIC_LEAVES_MAX_SIZE: int = 256
+# After a failed fetch, the host gets the generic leaf for this time before the fetch is tried again.
+FAILED_FETCH_RETRY_SECONDS: float = 60.0
+
+
+class UpstreamCertificateMirror:
+    """
+    Background mirroring of upstream server certificates, with in-memory SSLContexts of the mirrored leaves.
+    """
+    def __init__(
+            self,
+            ca_certificate_name: str,
+            ca_certificate_filepath: str,
+            server_certificates_directory: str,
+            download_directory: str,
+            skip_extension_id_list: list = None,
+            forwarding_dns_service_ipv4_list___only_for_localhost: list = None,
+            enable_sslkeylogfile_env_to_client_ssl_context: bool = False,
+            sslkeylog_file_path: str = None,
+            max_workers: int = MIRROR_MAX_WORKERS
+    ):
+        """
+        :param ca_certificate_name: string, name of the CA certificate.
+        :param ca_certificate_filepath: string, full file path to the CA certificate.
+        :param server_certificates_directory: string, directory of the certificate store of the signed leaves.
+        :param download_directory: string, directory of the certificate store of the upstream certificates.
+        :param skip_extension_id_list: list of strings, OIDs of extensions that are not copied from the upstream
+            certificate.
+        :param forwarding_dns_service_ipv4_list___only_for_localhost: list of strings, DNS servers to resolve the
+            host with, when the client is on this device.
+        :param enable_sslkeylogfile_env_to_client_ssl_context: boolean, passed to the SSLContext creation.
+        :param sslkeylog_file_path: string, passed to the SSLContext creation.
+        :param max_workers: integer, number of upstream certificates that are fetched at the same time.
+        """
+
+        self.skip_extension_id_list: list = skip_extension_id_list
+        self.forwarding_dns_service_ipv4_list___only_for_localhost: list = (
+            forwarding_dns_service_ipv4_list___only_for_localhost)
+        self.enable_sslkeylogfile_env_to_client_ssl_context: bool = enable_sslkeylogfile_env_to_client_ssl_context
+        self.sslkeylog_file_path: str = sslkeylog_file_path
+
+        self.server_certificates_store = cert_store.get_certificate_store(server_certificates_directory)
+        self.downloaded_certificates_store = cert_store.get_certificate_store(download_directory)
+
+        # Signs the mirrored leaves into the store.
+        self.certauth_wrapper = CertAuthWrapper(
+            ca_certificate_name=ca_certificate_name,
+            ca_certificate_filepath=ca_certificate_filepath,
+            server_certificate_directory=server_certificates_directory,
+            server_certificate_store=self.server_certificates_store
+        )
+        self.certauth_wrapper.create_use_ca_certificate()
+
+        # Signs the generic leaves in memory only, so they are not mistaken for mirrored leaves in the store.
+        self.generic_certificate_authority = certauth.CertificateAuthority(
+            ca_certificate_name, ca_certificate_filepath, cert_cache=GENERIC_LEAVES_MAX_SIZE)
+
+        self._lock = threading.Lock()
+        self._mirrored_contexts: OrderedDict[str, ssl.SSLContext] = OrderedDict()
+        self._generic_contexts: OrderedDict[str, ssl.SSLContext] = OrderedDict()
+        self._generic_locks: dict[str, threading.Lock] = dict()
+        self._pending_futures: dict[str, Future] = dict()
+        # Host to the time of its last failed fetch.
+        self._failed_fetches: dict[str, float] = dict()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upstream_certificate_mirror')
+
+    def get_ssl_context(
+            self,
+            host: str,
+            port: int,
+            client_ip: str,
+            print_kwargs: dict = None
+    ) -> ssl.SSLContext:
+        """
+        Get the SSLContext of the mirrored leaf of the host. If it is not mirrored yet, schedule the mirroring and
+        return the SSLContext of a generic leaf for the host.
+
+        :param host: string, the host name from SNI.
+        :param port: integer, the port to connect to the real server on.
+        :param client_ip: string, IP address of the client. If it is this device, the host is resolved with
+            the forwarding DNS servers.
+        :param print_kwargs: dict, that contains all the arguments for 'print_api' function.
+        :return: SSLContext.
+        """
+
+        with self._lock:
+            ssl_context = self._mirrored_contexts.get(host)
+            if ssl_context is not None:
+                self._mirrored_contexts.move_to_end(host)
+                return ssl_context
+
+        # The leaf was already signed before, like in a previous run.
+        certificate_pem: bytes = self.server_certificates_store.get(
+            certauth.StoreCache.key_for_host(host))
+        if certificate_pem:
+            ssl_context = self._create_ssl_context(certificate_pem)
+            with self._lock:
+                self._put_lru(self._mirrored_contexts, host, ssl_context, MIRRORED_CONTEXTS_MAX_SIZE)
+            return ssl_context
+
+        self.mirror_certificate(host, port, client_ip, print_kwargs=print_kwargs)
+        return self.get_generic_ssl_context(host)
+
+    def mirror_certificate(
+            self,
+            host: str,
+            port: int,
+            client_ip: str,
+            print_kwargs: dict = None
+    ) -> Future | None:
+        """
+        Schedule the mirroring of the upstream certificate of the host, if it is not scheduled already.
+
+        :param host: string, the host name.
+        :param port: integer, the port to connect to the real server on.
+        :param client_ip: string, IP address of the client.
+        :param print_kwargs: dict, that contains all the arguments for 'print_api' function.
+        :return: Future of the mirroring job, its result is the SSLContext of the mirrored leaf.
+            None if the last fetch of the host failed and the retry time didn't pass yet.
+        """
+
+        with self._lock:
+            future = self._pending_futures.get(host)
+            if future is not None:
+                return future
+
+            failed_fetch_time = self._failed_fetches.get(host)
+            if failed_fetch_time and time.monotonic() - failed_fetch_time < FAILED_FETCH_RETRY_SECONDS:
+                return None
+
+            future = self._executor.submit(self._mirror_certificate, host, port, client_ip, print_kwargs)
+            self._pending_futures[host] = future
+
+        print_api(f"Upstream certificate mirroring scheduled: {host}", **(print_kwargs or {}))
+        return future
+
+    def get_generic_ssl_context(self, host: str) -> ssl.SSLContext:
+        """
+        Get the SSLContext of a generic leaf for the host, that is signed without the upstream certificate.
+
+        :param host: string, the host name.
+        :return: SSLContext.
+        """
+
+        with self._lock:
+            ssl_context = self._generic_contexts.get(host)
+            if ssl_context is not None:
+                return ssl_context
+            # Concurrent handshakes of the same host wait for one generic leaf.
+            host_lock = self._generic_locks.setdefault(host, threading.Lock())
+
+        with host_lock:
+            with self._lock:
+                ssl_context = self._generic_contexts.get(host)
+            if ssl_context is not None:
+                return ssl_context
+
+            certificate, key = self.generic_certificate_authority.load_cert(host)
+            certificate_pem_buffer = BytesIO()
+            self.generic_certificate_authority.write_pem(certificate_pem_buffer, certificate, key)
+            ssl_context = self._create_ssl_context(certificate_pem_buffer.getvalue())
+
+            with self._lock:
+                self._put_lru(self._generic_contexts, host, ssl_context, GENERIC_LEAVES_MAX_SIZE)
+                self._generic_locks.pop(host, None)
+        return ssl_context
+
+    def _mirror_certificate(self, host: str, port: int, client_ip: str, print_kwargs: dict = None):
+        try:
+            ssl_context = self._create_mirrored_ssl_context(host, port, client_ip, print_kwargs=print_kwargs)
+        except Exception as e:
+            with self._lock:
+                self._pending_futures.pop(host, None)
+                self._failed_fetches[host] = time.monotonic()
+            message = f"Upstream certificate mirroring failed: {host}: {e}"
+            print_api(message, error_type=True, logger_method='error', **(print_kwargs or {}))
+            raise
+
+        with self._lock:
+            self._put_lru(self._mirrored_contexts, host, ssl_context, MIRRORED_CONTEXTS_MAX_SIZE)
+            self._pending_futures.pop(host, None)
+            self._failed_fetches.pop(host, None)
+            self._generic_contexts.pop(host, None)
+
+        print_api(f"Upstream certificate mirrored: {host}", **(print_kwargs or {}))
+        return ssl_context
+
+    def _create_mirrored_ssl_context(
+            self,
+            host: str,
+            port: int,
+            client_ip: str,
+            print_kwargs: dict = None
+    ) -> ssl.SSLContext:
+        certificate_from_socket_pem: bytes = self.downloaded_certificates_store.get(host)
+        if certificate_from_socket_pem:
+            certificate_from_socket_x509_cryptography_object = (
+                cryptographyw.convert_object_to_x509(certificate_from_socket_pem))
+        else:
+            # If we're on localhost, then use external services list in order to resolve the domain.
+            if client_ip in socket_base.THIS_DEVICE_IP_LIST:
+                dns_servers_list = self.forwarding_dns_service_ipv4_list___only_for_localhost
+            else:
+                dns_servers_list = None
+
+            service_client = socket_client.SocketClient(
+                service_name=host,
+                service_port=port,
+                tls=True,
+                dns_servers_list=dns_servers_list,
+                logger=print_kwargs.get('logger') if print_kwargs else None
+            )
+            certificate_from_socket_der_bytes: bytes = service_client.get_certificate_from_server()
+
+            self.downloaded_certificates_store[host] = \
+                ssl_base.convert_der_x509_bytes_to_pem_string(certificate_from_socket_der_bytes).encode()
+            certificate_from_socket_x509_cryptography_object = \
+                cryptographyw.convert_der_to_x509_object(certificate_from_socket_der_bytes)
+
+        # Copy extensions from upstream certificate to new certificate, without specified extensions.
+        if self.skip_extension_id_list:
+            certificate_from_socket_x509_cryptography_object, _ = \
+                cryptographyw.copy_extensions_from_old_cert_to_new_cert(
+                    certificate_from_socket_x509_cryptography_object,
+                    skip_extensions=self.skip_extension_id_list,
+                    print_kwargs=print_kwargs
+                )
+
+        # Convert X509 cryptography module object to pyopenssl, since certauth uses pyopenssl.
+        certificate_from_socket_x509 = pyopensslw.convert_cryptography_object_to_pyopenssl(
+            certificate_from_socket_x509_cryptography_object)
+
+        server_certificate_name: str = self.certauth_wrapper.create_read_server_certificate_ca_signed(
+            host, certificate_from_socket_x509)
+
+        return self._create_ssl_context(self.server_certificates_store.get(server_certificate_name))
+
+    def _create_ssl_context(self, certificate_pem: bytes) -> ssl.SSLContext:
+        return creator.create_server_ssl_context___load_certificate_and_key_pem(
+            certificate_pem=certificate_pem,
+            enable_sslkeylogfile_env_to_client_ssl_context=self.enable_sslkeylogfile_env_to_client_ssl_context,
+            sslkeylog_file_path=self.sslkeylog_file_path
+        )
+
+    @staticmethod
+    def _put_lru(lru: OrderedDict, key, value, max_size: int):
+        lru[key] = value
+        lru.move_to_end(key)
+        if len(lru) > max_size:
+            lru.popitem(last=False)
+
+
+_MIRRORS: dict[tuple[str, str], UpstreamCertificateMirror] = dict()
+_MIRRORS_LOCK = threading.Lock()
+
+
+def get_upstream_certificate_mirror(
+        ca_certificate_name: str,
+        ca_certificate_filepath: str,
+        server_certificates_directory: str,
+        download_directory: str,
+        skip_extension_id_list: list = None,
+        forwarding_dns_service_ipv4_list___only_for_localhost: list = None,
+        enable_sslkeylogfile_env_to_client_ssl_context: bool = False,
+        sslkeylog_file_path: str = None
+) -> UpstreamCertificateMirror:
+    """
+    Get the process wide UpstreamCertificateMirror of the directories, create it on the first call.
+    Check 'UpstreamCertificateMirror' for the parameters.
+
+    :return: UpstreamCertificateMirror instance.
+    """
+
+    mirror_key: tuple[str, str] = (server_certificates_directory, download_directory)
+    with _MIRRORS_LOCK:
+        mirror = _MIRRORS.get(mirror_key)
+        if mirror is None:
+            mirror = UpstreamCertificateMirror(
+                ca_certificate_name=ca_certificate_name,
+                ca_certificate_filepath=ca_certificate_filepath,
+                server_certificates_directory=server_certificates_directory,
+                download_directory=download_directory,
+                skip_extension_id_list=skip_extension_id_list,
+                forwarding_dns_service_ipv4_list___only_for_localhost=(
+                    forwarding_dns_service_ipv4_list___only_for_localhost),
+                enable_sslkeylogfile_env_to_client_ssl_context=enable_sslkeylogfile_env_to_client_ssl_context,
+                sslkeylog_file_path=sslkeylog_file_path
+            )
+            _MIRRORS[mirror_key] = mirror
+
+    return mirror
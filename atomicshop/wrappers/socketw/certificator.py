@@ -1,13 +1,21 @@
-import os
 import sys
+import ssl
+import threading
+from collections import OrderedDict
 
-from cryptography import x509
-
-from . import creator, socket_base, socket_client
-from .. import pyopensslw, cryptographyw
+from . import creator, socket_base, san_buckets, cert_mirror
+from ..certauthw import cert_store
 from ..certauthw.certauthw import CertAuthWrapper
 from ...print_api import print_api
-from ... import filesystem
+
+
+# Maximum number of SSLContexts of the per domain server certificates from the store, that are kept in memory.
+SNI_SERVER_SSL_CONTEXTS_MAX_SIZE: int = 1024
+
+# (store file path, certificate name) -> (PEM, SSLContext). Process wide, since Certificator is created for each
+# connection. The PEM is compared on each use, so a certificate that was re-created gets a new context.
+_SNI_SERVER_SSL_CONTEXTS: OrderedDict[tuple[str, str], tuple[bytes, ssl.SSLContext]] = OrderedDict()
+_SNI_SERVER_SSL_CONTEXTS_LOCK = threading.Lock()
 
 
 class Certificator:
@@ -58,16 +66,24 @@ class Certificator:
         # noinspection PyTypeChecker
         self.certauth_wrapper: CertAuthWrapper = None
 
-    def initialize_certauth_create_use_ca_certificate(self, server_certificate_directory: str):
+    def initialize_certauth_create_use_ca_certificate(
+            self,
+            server_certificate_directory: str,
+            server_certificate_store: cert_store.CertificateStore = None
+    ):
         """
         Initialize CertAuthWrapper and create CA certificate if it doesn't exist.
+        :param server_certificate_directory: string, directory of the server certificates.
+        :param server_certificate_store: CertificateStore, if provided, the server certificates are stored in it
+            instead of files in the directory.
         :return:
         """
         # Initialize CertAuthWrapper.
         certauth_wrapper = CertAuthWrapper(
             ca_certificate_name=self.ca_certificate_name,
             ca_certificate_filepath=self.ca_certificate_filepath,
-            server_certificate_directory=server_certificate_directory
+            server_certificate_directory=server_certificate_directory,
+            server_certificate_store=server_certificate_store
         )
 
         # Create CA certificate if it doesn't exist.
@@ -137,99 +153,114 @@ class Certificator:
 
         return server_certificate_file_path, default_server_certificate_san
 
+    def get_default_certificate_buckets(self) -> san_buckets.DefaultCertificateBuckets:
+        """
+        Get the process wide SAN buckets of the default server certificate, that new SNI domains are added to.
+        :return: DefaultCertificateBuckets instance.
+        """
+
+        return san_buckets.get_default_certificate_buckets(
+            ca_certificate_name=self.ca_certificate_name,
+            ca_certificate_filepath=self.ca_certificate_filepath,
+            certificate_directory=self.default_server_certificate_directory,
+            certificate_name=self.default_server_certificate_name,
+            default_certificate_domain_list=self.default_certificate_domain_list,
+            enable_sslkeylogfile_env_to_client_ssl_context=self.enable_sslkeylogfile_env_to_client_ssl_context,
+            sslkeylog_file_path=self.sslkeylog_file_path
+        )
+
+    def get_upstream_certificate_mirror(self) -> cert_mirror.UpstreamCertificateMirror:
+        """
+        Get the process wide mirror of the upstream server certificates.
+        :return: UpstreamCertificateMirror instance.
+        """
+
+        return cert_mirror.get_upstream_certificate_mirror(
+            ca_certificate_name=self.ca_certificate_name,
+            ca_certificate_filepath=self.ca_certificate_filepath,
+            server_certificates_directory=self.sni_server_certificates_cache_directory,
+            download_directory=self.sni_server_certificate_from_server_socket_download_directory,
+            skip_extension_id_list=self.skip_extension_id_list,
+            forwarding_dns_service_ipv4_list___only_for_localhost=(
+                self.forwarding_dns_service_ipv4_list___only_for_localhost),
+            enable_sslkeylogfile_env_to_client_ssl_context=self.enable_sslkeylogfile_env_to_client_ssl_context,
+            sslkeylog_file_path=self.sslkeylog_file_path
+        )
+
     def create_use_sni_server_certificate_ca_signed(
             self,
             sni_received_parameters,
             print_kwargs: dict = None
     ):
-        # === Connect to the domain and get the certificate. ===========================================================
-        certificate_from_socket_x509 = None
+        destination_port: int = socket_base.get_destination_address_from_socket(sni_received_parameters.ssl_socket)[1]
+
+        # === Mirror the certificate of the domain. ====================================================================
         if self.sni_get_server_certificate_from_server_socket:
-            # Generate PEM certificate file path string for downloaded certificates. Signed certificates will go to the
-            # 'certs' folder.
-            certificate_from_socket_file_path: str = \
-                self.sni_server_certificate_from_server_socket_download_directory + \
-                os.sep + sni_received_parameters.destination_name + ".pem"
-            # Get client ip.
+            # The certificate is fetched from the domain and mirrored in the background, the handshake doesn't
+            # wait for it. Until it is ready, a generic certificate of the domain is used.
             client_ip = socket_base.get_source_address_from_socket(sni_received_parameters.ssl_socket)[0]
+            sni_received_parameters.ssl_socket.context = self.get_upstream_certificate_mirror().get_ssl_context(
+                host=sni_received_parameters.destination_name, port=destination_port, client_ip=client_ip,
+                print_kwargs=print_kwargs)
+            return
+        # === EOF Mirror the certificate of the domain. ================================================================
 
-            # If we're on localhost, then use external services list in order to resolve the domain:
-            if client_ip in socket_base.THIS_DEVICE_IP_LIST:
-                service_client = socket_client.SocketClient(
-                    service_name=sni_received_parameters.destination_name,
-                    service_port=socket_base.get_destination_address_from_socket(sni_received_parameters.ssl_socket)[1],
-                    tls=self.tls,
-                    dns_servers_list=self.forwarding_dns_service_ipv4_list___only_for_localhost,
-                    logger=print_kwargs.get('logger') if print_kwargs else None
-                )
-            # If we're not on localhost, then connect to domain directly.
-            else:
-                service_client = socket_client.SocketClient(
-                    service_name=sni_received_parameters.destination_name,
-                    service_port=socket_base.get_destination_address_from_socket(sni_received_parameters.ssl_socket)[1],
-                    tls=self.tls,
-                    logger=print_kwargs.get('logger') if print_kwargs else None
-                )
-
-            # If certificate from socket exists, then we don't need to get it from the socket and write to file.
-            # and we will return None, since no certificate was fetched.
-            # noinspection PyTypeChecker
-            certificate_from_socket_x509_cryptography_object: x509.Certificate = None
-            if not filesystem.is_file_exists(certificate_from_socket_file_path):
-                print_api("Certificate from socket doesn't exist, fetching.", **(print_kwargs or {}))
-                # Get certificate from socket and convert to X509 cryptography module object.
-                certificate_from_socket_x509_cryptography_object: x509.Certificate = (
-                    service_client.get_certificate_from_server(
-                        save_as_file=True, cert_file_path=certificate_from_socket_file_path,
-                        cert_output_type='cryptography')
-                )
-            else:
-                print_api("The Certificate from socket already exists, not fetching", **(print_kwargs or {}))
-                certificate_from_socket_x509_cryptography_object: x509.Certificate = (
-                    cryptographyw.convert_object_to_x509(certificate_from_socket_file_path))
-
-            # skip_extensions = ['1.3.6.1.5.5.7.3.2', '2.5.29.31', '1.3.6.1.5.5.7.1.1']
-
-            # If certificate was downloaded successfully, then remove extensions if they were provided.
-            # If certificate was downloaded successfully and no extensions to skip were provided, then use it as is.
-            if certificate_from_socket_x509_cryptography_object and self.skip_extension_id_list:
-                # Copy extensions from old certificate to new certificate, without specified extensions.
-                certificate_from_socket_x509_cryptography_object, _ = \
-                    cryptographyw.copy_extensions_from_old_cert_to_new_cert(
-                        certificate_from_socket_x509_cryptography_object,
-                        skip_extensions=self.skip_extension_id_list,
-                        print_kwargs=print_kwargs
-                    )
-
-            # If certificate was downloaded successfully, then convert it to pyopenssl object.
-            if certificate_from_socket_x509_cryptography_object:
-                # Convert X509 cryptography module object to pyopenssl, since certauth uses pyopenssl.
-                certificate_from_socket_x509 = \
-                    pyopensslw.convert_cryptography_object_to_pyopenssl(
-                        certificate_from_socket_x509_cryptography_object)
-
-        # === EOF Get certificate from the domain. =====================================================================
+        # Server certificates of the domains are kept in the store of the certificates cache directory.
+        server_certificates_store = cert_store.get_certificate_store(self.sni_server_certificates_cache_directory)
 
         # If CertAuthWrapper wasn't initialized yet, it means that CA wasn't created/loaded yet.
-        if not self.certauth_wrapper:
+        # If it was initialized for the default server certificate, it stores the certificates in its directory.
+        if not self.certauth_wrapper or self.certauth_wrapper.server_certificate_store is not server_certificates_store:
             self.certauth_wrapper = self.initialize_certauth_create_use_ca_certificate(
-                server_certificate_directory=self.sni_server_certificates_cache_directory)
+                server_certificate_directory=self.sni_server_certificates_cache_directory,
+                server_certificate_store=server_certificates_store)
         # try:
         # Create if non-existent / read existing server certificate.
-        sni_server_certificate_file_path = self.certauth_wrapper.create_read_server_certificate_ca_signed(
-            sni_received_parameters.destination_name, certificate_from_socket_x509)
+        sni_server_certificate_name: str = self.certauth_wrapper.create_read_server_certificate_ca_signed(
+            sni_received_parameters.destination_name)
 
-        message = f"SNI Handler: port " \
-                  f"{socket_base.get_destination_address_from_socket(sni_received_parameters.ssl_socket)[1]}: " \
-                  f"Using certificate: {sni_server_certificate_file_path}"
+        message = f"SNI Handler: port {destination_port}: " \
+                  f"Using certificate: {sni_server_certificate_name} from {server_certificates_store.database_path}"
         print_api(message, **print_kwargs)
 
-        # You need to build new context and exchange the context that being inherited from the main socket,
+        # You need to exchange the context that being inherited from the main socket,
         # or else the context will receive previous certificate each time.
-        sni_received_parameters.ssl_socket.context = (
-            creator.create_server_ssl_context___load_certificate_and_key(
-                certificate_file_path=sni_server_certificate_file_path, key_file_path=None,
-                enable_sslkeylogfile_env_to_client_ssl_context=self.enable_sslkeylogfile_env_to_client_ssl_context,
-                sslkeylog_file_path=self.sslkeylog_file_path
-            )
+        sni_received_parameters.ssl_socket.context = self.get_sni_server_ssl_context(
+            server_certificates_store, sni_server_certificate_name)
+
+    def get_sni_server_ssl_context(
+            self,
+            server_certificates_store: cert_store.CertificateStore,
+            certificate_name: str
+    ) -> ssl.SSLContext:
+        """
+        Get the SSLContext of the server certificate from the store. The context is built once for each certificate
+        in the process, so the PEM is written to a temporary file only on the first handshake of the domain.
+
+        :param server_certificates_store: CertificateStore, the store of the certificate.
+        :param certificate_name: string, name of the certificate in the store.
+        :return: SSLContext.
+        """
+
+        certificate_pem: bytes = server_certificates_store.get(certificate_name)
+        cache_key: tuple[str, str] = (server_certificates_store.database_path, certificate_name)
+
+        with _SNI_SERVER_SSL_CONTEXTS_LOCK:
+            cached = _SNI_SERVER_SSL_CONTEXTS.get(cache_key)
+            if cached is not None and cached[0] == certificate_pem:
+                _SNI_SERVER_SSL_CONTEXTS.move_to_end(cache_key)
+                return cached[1]
+
+        ssl_context: ssl.SSLContext = creator.create_server_ssl_context___load_certificate_and_key_pem(
+            certificate_pem=certificate_pem,
+            enable_sslkeylogfile_env_to_client_ssl_context=self.enable_sslkeylogfile_env_to_client_ssl_context,
+            sslkeylog_file_path=self.sslkeylog_file_path
         )
+
+        with _SNI_SERVER_SSL_CONTEXTS_LOCK:
+            _SNI_SERVER_SSL_CONTEXTS[cache_key] = (certificate_pem, ssl_context)
+            _SNI_SERVER_SSL_CONTEXTS.move_to_end(cache_key)
+            if len(_SNI_SERVER_SSL_CONTEXTS) > SNI_SERVER_SSL_CONTEXTS_MAX_SIZE:
+                _SNI_SERVER_SSL_CONTEXTS.popitem(last=False)
+
+        return ssl_context
@@ -0,0 +1,377 @@
+"""
+Parser of the TLS ClientHello, the first message of the client in the TLS handshake.
+The ClientHello is read from the socket with MSG_PEEK, so it stays in the socket buffer for the SSL handshake.
+This gives the SNI, ALPN, TLS versions and the JA3 / JA4 fingerprints of the connection before any handshake work.
+"""
+
+import time
+import socket
+import struct
+import hashlib
+from dataclasses import dataclass, field
+from typing import Union
+
+
+TLS_RECORD_HEADER_LENGTH: int = 5
+TLS_RECORD_TYPE_HANDSHAKE: int = 0x16
+TLS_HANDSHAKE_TYPE_CLIENT_HELLO: int = 0x01
+# Max TLS record payload (2^14) plus the allowed expansion, ClientHello bigger than that is not valid.
+TLS_MAX_RECORD_LENGTH: int = 16384 + 2048
+
+EXTENSION_SERVER_NAME: int = 0x0000
+EXTENSION_SUPPORTED_GROUPS: int = 0x000a
+EXTENSION_EC_POINT_FORMATS: int = 0x000b
+EXTENSION_SIGNATURE_ALGORITHMS: int = 0x000d
+EXTENSION_ALPN: int = 0x0010
+EXTENSION_SUPPORTED_VERSIONS: int = 0x002b
+
+TLS_VERSION_NAMES: dict = {
+    0x0300: 'SSLv3.0',
+    0x0301: 'TLSv1.0',
+    0x0302: 'TLSv1.1',
+    0x0303: 'TLSv1.2',
+    0x0304: 'TLSv1.3'
+}
+# Version codes in the JA4 fingerprint.
+_JA4_VERSION_CODES: dict = {
+    0x0300: 's3',
+    0x0301: '10',
+    0x0302: '11',
+    0x0303: '12',
+    0x0304: '13'
+}
+
+_UINT16_STRUCT = struct.Struct('!H')
+_RECORD_HEADER_STRUCT = struct.Struct('!BHH')
+
+
+class ClientHelloParseError(Exception):
+    pass
+
+
+def is_grease_value(value: int) -> bool:
+    """
+    GREASE values (RFC 8701) are random values that clients add to the lists to check that the servers ignore unknown
+    values. They are skipped in the fingerprints, since they are different on each connection.
+
+    :param value: integer, 16-bit value from the ClientHello list.
+    :return: boolean.
+    """
+
+    return (value & 0x0f0f) == 0x0a0a and (value >> 8) == (value & 0xff)
+
+
+@dataclass
+class ClientHello:
+    """
+    The fields of the ClientHello. The lists are in the order that the client sent them, including GREASE values.
+    """
+    record_version: int
+    legacy_version: int
+    cipher_suites: list = field(default_factory=list)
+    extensions: list = field(default_factory=list)
+    server_name: Union[str, None] = None
+    alpn_protocols: list = field(default_factory=list)
+    supported_versions: list = field(default_factory=list)
+    supported_groups: list = field(default_factory=list)
+    ec_point_formats: list = field(default_factory=list)
+    signature_algorithms: list = field(default_factory=list)
+
+    def get_max_version(self) -> int:
+        """
+        :return: integer, the highest TLS version that the client offers. TLS 1.3 is offered only in the
+            'supported_versions' extension, the 'legacy_version' stays TLS 1.2.
+        """
+
+        versions: list = [version for version in self.supported_versions if not is_grease_value(version)]
+        if versions:
+            return max(versions)
+        return self.legacy_version
+
+    def get_max_version_string(self) -> str:
+        """
+        :return: string, name of the highest TLS version that the client offers, like 'TLSv1.3'.
+        """
+
+        max_version: int = self.get_max_version()
+        return TLS_VERSION_NAMES.get(max_version, hex(max_version))
+
+    def get_ja3_string(self) -> str:
+        """
+        JA3 string: version,ciphers,extensions,groups,point formats. The lists are '-' separated decimal values
+        without GREASE.
+
+        :return: string.
+        """
+
+        def join_values(values: list) -> str:
+            return '-'.join(str(value) for value in values if not is_grease_value(value))
+
+        return ','.join([
+            str(self.legacy_version),
+            join_values(self.cipher_suites),
+            join_values(self.extensions),
+            join_values(self.supported_groups),
+            '-'.join(str(value) for value in self.ec_point_formats)
+        ])
+
+    def get_ja3_hash(self) -> str:
+        """
+        :return: string, MD5 hex digest of the JA3 string.
+        """
+
+        return hashlib.md5(self.get_ja3_string().encode()).hexdigest()
+
+    def get_ja4(self, transport: str = 't') -> str:
+        """
+        JA4 fingerprint: '<a>_<b>_<c>'.
+        a: transport, version, 'd' if SNI is domain else 'i', number of ciphers, number of extensions,
+            first and last characters of the first ALPN.
+        b: first 12 hex characters of SHA256 of the sorted ciphers.
+        c: first 12 hex characters of SHA256 of the sorted extensions (without SNI and ALPN) and the signature
+            algorithms in their order.
+
+        :param transport: string, 't' for TCP, 'q' for QUIC.
+        :return: string.
+        """
+
+        ciphers: list = [value for value in self.cipher_suites if not is_grease_value(value)]
+        extensions: list = [value for value in self.extensions if not is_grease_value(value)]
+        signature_algorithms: list = [value for value in self.signature_algorithms if not is_grease_value(value)]
+
+        version_code: str = _JA4_VERSION_CODES.get(self.get_max_version(), '00')
+        sni_code: str = 'd' if self.server_name else 'i'
+        if self.alpn_protocols and self.alpn_protocols[0]:
+            first_alpn: str = self.alpn_protocols[0]
+            alpn_code: str = f'{first_alpn[0]}{first_alpn[-1]}'
+        else:
+            alpn_code = '00'
+
+        part_a: str = (
+            f'{transport}{version_code}{sni_code}{min(len(ciphers), 99):02d}{min(len(extensions), 99):02d}{alpn_code}')
+
+        def truncated_sha256(text: str) -> str:
+            if not text:
+                return '0' * 12
+            return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+        part_b: str = truncated_sha256(','.join(f'{value:04x}' for value in sorted(ciphers)))
+
+        extensions_text: str = ','.join(
+            f'{value:04x}' for value in sorted(extensions) if value not in (EXTENSION_SERVER_NAME, EXTENSION_ALPN))
+        if signature_algorithms:
+            extensions_text += '_' + ','.join(f'{value:04x}' for value in signature_algorithms)
+        part_c: str = truncated_sha256(extensions_text)
+
+        return f'{part_a}_{part_b}_{part_c}'
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data: memoryview = memoryview(data)
+        self.offset: int = 0
+
+    def remaining(self) -> int:
+        return len(self.data) - self.offset
+
+    def read(self, length: int) -> memoryview:
+        if length > self.remaining():
+            raise ClientHelloParseError('ClientHello is truncated.')
+        value = self.data[self.offset:self.offset + length]
+        self.offset += length
+        return value
+
+    def read_uint8(self) -> int:
+        return self.read(1)[0]
+
+    def read_uint16(self) -> int:
+        return _UINT16_STRUCT.unpack(self.read(2))[0]
+
+    def read_uint16_list(self, length: int) -> list:
+        values = self.read(length)
+        return [_UINT16_STRUCT.unpack_from(values, offset)[0] for offset in range(0, length - 1, 2)]
+
+    def read_vector(self, length_size: int) -> memoryview:
+        if length_size == 1:
+            return self.read(self.read_uint8())
+        return self.read(self.read_uint16())
+
+
+def get_handshake_bytes(data: bytes) -> tuple[int, bytes]:
+    """
+    Get the handshake message bytes from the TLS records. The ClientHello can be fragmented to several records.
+
+    :param data: bytes, the start of the TLS stream.
+    :return: tuple of the record version and the handshake message bytes, including the handshake header.
+        The handshake bytes can be shorter than the handshake message, if 'data' doesn't contain all the records.
+    """
+
+    offset: int = 0
+    record_version: int = 0
+    handshake_bytes: bytearray = bytearray()
+    while offset + TLS_RECORD_HEADER_LENGTH <= len(data):
+        content_type, version, length = _RECORD_HEADER_STRUCT.unpack_from(data, offset)
+        if content_type != TLS_RECORD_TYPE_HANDSHAKE:
+            if offset == 0:
+                raise ClientHelloParseError('Not a TLS handshake record.')
+            break
+        if length > TLS_MAX_RECORD_LENGTH:
+            raise ClientHelloParseError(f'TLS record length is too big: {length}.')
+        if not record_version:
+            record_version = version
+
+        offset += TLS_RECORD_HEADER_LENGTH
+        handshake_bytes += data[offset:offset + length]
+        offset += length
+
+        # Stop after the records of the first handshake message.
+        if len(handshake_bytes) >= 4:
+            message_length: int = int.from_bytes(handshake_bytes[1:4], 'big')
+            if len(handshake_bytes) >= 4 + message_length:
+                break
+
+    return record_version, bytes(handshake_bytes)
+
+
+def get_client_hello_length(data: bytes) -> Union[int, None]:
+    """
+    Get the number of bytes of the TLS stream that contain the whole ClientHello.
+
+    :param data: bytes, the start of the TLS stream.
+    :return: integer, or None if 'data' is too short to know.
+    """
+
+    offset: int = 0
+    handshake_length: int = 0
+    message_length: Union[int, None] = None
+    while True:
+        if offset + TLS_RECORD_HEADER_LENGTH > len(data):
+            return None
+        content_type, _, length = _RECORD_HEADER_STRUCT.unpack_from(data, offset)
+        if content_type != TLS_RECORD_TYPE_HANDSHAKE:
+            raise ClientHelloParseError('Not a TLS handshake record.')
+        if length > TLS_MAX_RECORD_LENGTH:
+            raise ClientHelloParseError(f'TLS record length is too big: {length}.')
+
+        if message_length is None and handshake_length == 0 and length >= 4 and \
+                offset + TLS_RECORD_HEADER_LENGTH + 4 <= len(data):
+            message_length = int.from_bytes(
+                data[offset + TLS_RECORD_HEADER_LENGTH + 1:offset + TLS_RECORD_HEADER_LENGTH + 4], 'big')
+
+        offset += TLS_RECORD_HEADER_LENGTH + length
+        handshake_length += length
+        if message_length is not None and handshake_length >= 4 + message_length:
+            return offset
+
+
+def parse_client_hello(data: bytes) -> ClientHello:
+    """
+    Parse the ClientHello from the start of the TLS stream.
+
+    :param data: bytes, the start of the TLS stream, with the TLS record headers.
+    :return: ClientHello.
+    """
+
+    record_version, handshake_bytes = get_handshake_bytes(data)
+
+    reader = _Reader(handshake_bytes)
+    if reader.read_uint8() != TLS_HANDSHAKE_TYPE_CLIENT_HELLO:
+        raise ClientHelloParseError('The handshake message is not ClientHello.')
+    message_length: int = int.from_bytes(reader.read(3), 'big')
+    reader = _Reader(reader.read(message_length))
+
+    client_hello = ClientHello(record_version=record_version, legacy_version=reader.read_uint16())
+    # Random.
+    reader.read(32)
+    # Legacy session id.
+    reader.read_vector(1)
+    cipher_suites_length: int = reader.read_uint16()
+    client_hello.cipher_suites = reader.read_uint16_list(cipher_suites_length)
+    # Legacy compression methods.
+    reader.read_vector(1)
+
+    # SSLv3 / TLS 1.0 ClientHello can be without extensions.
+    if not reader.remaining():
+        return client_hello
+
+    extensions_reader = _Reader(reader.read_vector(2))
+    while extensions_reader.remaining():
+        extension_type: int = extensions_reader.read_uint16()
+        extension_data = _Reader(extensions_reader.read_vector(2))
+        client_hello.extensions.append(extension_type)
+
+        if extension_type == EXTENSION_SERVER_NAME:
+            names_reader = _Reader(extension_data.read_vector(2))
+            while names_reader.remaining():
+                name_type: int = names_reader.read_uint8()
+                name = names_reader.read_vector(2)
+                # Host name type.
+                if name_type == 0 and client_hello.server_name is None:
+                    client_hello.server_name = bytes(name).decode('ascii', errors='replace').lower()
+        elif extension_type == EXTENSION_ALPN:
+            protocols_reader = _Reader(extension_data.read_vector(2))
+            while protocols_reader.remaining():
+                client_hello.alpn_protocols.append(
+                    bytes(protocols_reader.read_vector(1)).decode('ascii', errors='replace'))
+        elif extension_type == EXTENSION_SUPPORTED_VERSIONS:
+            versions_length: int = extension_data.read_uint8()
+            client_hello.supported_versions = extension_data.read_uint16_list(versions_length)
+        elif extension_type == EXTENSION_SUPPORTED_GROUPS:
+            groups_length: int = extension_data.read_uint16()
+            client_hello.supported_groups = extension_data.read_uint16_list(groups_length)
+        elif extension_type == EXTENSION_EC_POINT_FORMATS:
+            client_hello.ec_point_formats = list(extension_data.read_vector(1))
+        elif extension_type == EXTENSION_SIGNATURE_ALGORITHMS:
+            algorithms_length: int = extension_data.read_uint16()
+            client_hello.signature_algorithms = extension_data.read_uint16_list(algorithms_length)
+
+    return client_hello
+
+
+def peek_client_hello(
+        client_socket: socket.socket,
+        timeout: float = None,
+        poll_interval: float = 0.005
+) -> ClientHello:
+    """
+    Read the ClientHello from the socket with MSG_PEEK, the data stays in the socket buffer for the SSL handshake.
+    Big ClientHello (post-quantum key shares) can arrive in several TCP segments, so the socket is peeked until all
+    the ClientHello records are in the buffer.
+
+    :param client_socket: socket, accepted socket that starts with TLS handshake record.
+    :param timeout: float, seconds to wait for the whole ClientHello. None to wait forever.
+    :param poll_interval: float, seconds between the peeks while the ClientHello is not complete.
+    :return: ClientHello.
+    :raises TimeoutError: if the whole ClientHello didn't arrive in 'timeout' ('socket.timeout' is 'TimeoutError').
+    """
+
+    deadline: Union[float, None] = None if timeout is None else time.monotonic() + timeout
+    peek_length: int = TLS_RECORD_HEADER_LENGTH
+    last_data_length: int = -1
+
+    client_socket.settimeout(timeout)
+    try:
+        while True:
+            data: bytes = client_socket.recv(peek_length, socket.MSG_PEEK)
+            if not data:
+                raise ConnectionResetError('The socket was closed before the ClientHello.')
+
+            client_hello_length = get_client_hello_length(data)
+            if client_hello_length is not None and len(data) >= client_hello_length:
+                return parse_client_hello(data[:client_hello_length])
+
+            if client_hello_length is not None:
+                peek_length = client_hello_length
+            elif len(data) >= peek_length:
+                # The headers that are in the buffer point to more records, peek the next record header too.
+                peek_length = len(data) + TLS_RECORD_HEADER_LENGTH + TLS_MAX_RECORD_LENGTH
+
+            # The data in the buffer didn't change, wait for the next segment. MSG_PEEK doesn't remove the data,
+            # so the socket stays readable and 'select' can't be used for waiting.
+            if len(data) == last_data_length:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError('Timed out waiting for the whole ClientHello.')
+                time.sleep(poll_interval)
+            last_data_length = len(data)
+    finally:
+        client_socket.settimeout(None)
@@ -1,11 +1,25 @@
 import os
 import socket
 import ssl
+import tempfile
+import threading
+from collections import OrderedDict
 
 from . import socket_base, exception_wrapper
 from ...print_api import print_api
 
 
+# Preconfigured client SSL contexts, shared between the threads. Check 'get_client_ssl_context' for details.
+_CLIENT_SSL_CONTEXTS: dict = dict()
+_CLIENT_SSL_CONTEXTS_LOCK = threading.Lock()
+
+# TLS sessions of the last connections to each server, so the next connections can resume them.
+# Keyed by (id of the ssl context, server hostname, port), since a session can be used only with its context.
+CLIENT_TLS_SESSIONS_MAX_SIZE: int = 4096
+_CLIENT_TLS_SESSIONS: OrderedDict = OrderedDict()
+_CLIENT_TLS_SESSIONS_LOCK = threading.Lock()
+
+
 def create_socket_ipv4_tcp():
     # When using 'with' statement, no need to use "socket.close()" method to disconnect when finished
     # AF_INET - Socket family of IPv4
@@ -151,6 +165,113 @@ def set_client_ssl_context_certificate_verification_ignore(ssl_context):
     ssl_context.verify_mode = ssl.CERT_NONE
 
 
+def get_client_ssl_context(
+        custom_pem_client_certificate_file_path: str = None,
+        enable_sslkeylogfile_env_to_client_ssl_context: bool = False,
+        sslkeylog_file_path: str = None,
+        ignore_verification: bool = True
+) -> ssl.SSLContext:
+    """
+    Get the client SSL context with the CA default certificates from the registry of the contexts.
+    The context is created once for each combination of the parameters, and shared between all the connections
+    and threads. Creating a context for each connection loads the whole system trust store and the client
+    certificate each time, and TLS sessions can't be resumed between connections of different contexts.
+
+    :param custom_pem_client_certificate_file_path: string, full file path for the client certificate PEM file.
+        Default is None.
+    :param enable_sslkeylogfile_env_to_client_ssl_context: boolean, enables the SSLKEYLOGFILE environment variable
+        to the SSL context. Default is False.
+    :param sslkeylog_file_path: string, full file path for the SSL key log file. Default is None.
+    :param ignore_verification: boolean, if True, the server's certificate will not be verified.
+    :return: ssl.SSLContext
+    """
+
+    if enable_sslkeylogfile_env_to_client_ssl_context and sslkeylog_file_path is None:
+        sslkeylog_file_path = os.environ.get('SSLKEYLOGFILE')
+    if not enable_sslkeylogfile_env_to_client_ssl_context:
+        sslkeylog_file_path = None
+
+    context_key: tuple = (
+        custom_pem_client_certificate_file_path, enable_sslkeylogfile_env_to_client_ssl_context,
+        sslkeylog_file_path, ignore_verification)
+
+    ssl_context = _CLIENT_SSL_CONTEXTS.get(context_key)
+    if ssl_context is not None:
+        return ssl_context
+
+    with _CLIENT_SSL_CONTEXTS_LOCK:
+        ssl_context = _CLIENT_SSL_CONTEXTS.get(context_key)
+        if ssl_context is None:
+            ssl_context = create_ssl_context_for_client(
+                enable_sslkeylogfile_env_to_client_ssl_context=enable_sslkeylogfile_env_to_client_ssl_context,
+                sslkeylog_file_path=sslkeylog_file_path)
+            set_client_ssl_context_ca_default_certs(ssl_context)
+            if ignore_verification:
+                set_client_ssl_context_certificate_verification_ignore(ssl_context)
+
+            if custom_pem_client_certificate_file_path:
+                ssl_context.load_cert_chain(certfile=custom_pem_client_certificate_file_path, keyfile=None)
+
+            _CLIENT_SSL_CONTEXTS[context_key] = ssl_context
+
+    return ssl_context
+
+
+def clear_client_ssl_contexts():
+    """
+    Remove all the client SSL contexts from the registry and their TLS sessions.
+    Needed if the system trust store or the client certificate file were changed.
+    """
+
+    with _CLIENT_SSL_CONTEXTS_LOCK:
+        _CLIENT_SSL_CONTEXTS.clear()
+    with _CLIENT_TLS_SESSIONS_LOCK:
+        _CLIENT_TLS_SESSIONS.clear()
+
+
+def get_client_tls_session(ssl_context: ssl.SSLContext, server_hostname: str, port: int) -> ssl.SSLSession | None:
+    """
+    Get the TLS session of the last connection to the server with this context.
+
+    :param ssl_context: ssl.SSLContext, the context that the new connection will use.
+    :param server_hostname: string, hostname of the server.
+    :param port: integer, port of the server.
+    :return: ssl.SSLSession or None if there is no session to resume.
+    """
+
+    with _CLIENT_TLS_SESSIONS_LOCK:
+        return _CLIENT_TLS_SESSIONS.get((id(ssl_context), server_hostname, port))
+
+
+def save_client_tls_session(ssl_socket: ssl.SSLSocket, port: int) -> None:
+    """
+    Save the TLS session of the connected client socket, so the next connection to the same server can resume it.
+    With TLS 1.3 the server sends the session tickets after the handshake, so it is better to call this also
+    after data was received from the server, or before the socket is closed.
+
+    :param ssl_socket: ssl.SSLSocket, connected client socket.
+    :param port: integer, port of the server.
+    """
+
+    if not isinstance(ssl_socket, ssl.SSLSocket):
+        return
+
+    try:
+        session = ssl_socket.session
+    except (ValueError, OSError):
+        return
+
+    if session is None or not session.has_ticket and not session.id:
+        return
+
+    session_key: tuple = (id(ssl_socket.context), ssl_socket.server_hostname, port)
+    with _CLIENT_TLS_SESSIONS_LOCK:
+        _CLIENT_TLS_SESSIONS[session_key] = session
+        _CLIENT_TLS_SESSIONS.move_to_end(session_key)
+        while len(_CLIENT_TLS_SESSIONS) > CLIENT_TLS_SESSIONS_MAX_SIZE:
+            _CLIENT_TLS_SESSIONS.popitem(last=False)
+
+
 def load_certificate_and_key_into_server_ssl_context(
         ssl_context,
         certificate_file_path: str,
@@ -181,6 +302,32 @@ def load_certificate_and_key_into_server_ssl_context(
             print_api(message, error_type=True, logger_method="critical", **print_kwargs)
 
 
+def load_certificate_and_key_pem_into_server_ssl_context(
+        ssl_context,
+        certificate_pem: bytes,
+        print_kwargs: dict = None
+):
+    """
+    Load certificate and key from PEM bytes, like from a certificate store, into the SSLContext.
+    'load_cert_chain' accepts only file paths, so the PEM is written to a temporary file that is removed right after.
+
+    :param ssl_context: SSLContext object.
+    :param certificate_pem: bytes, PEM that contains both the key and the certificate.
+    :param print_kwargs: dictionary, keyword arguments for 'print_api' function.
+    :return:
+    """
+
+    # 'NamedTemporaryFile' is created readable only by the current user.
+    with tempfile.NamedTemporaryFile(suffix='.pem', delete=False) as temporary_file:
+        temporary_file.write(certificate_pem)
+
+    try:
+        load_certificate_and_key_into_server_ssl_context(
+            ssl_context, temporary_file.name, None, print_kwargs=print_kwargs or {})
+    finally:
+        os.remove(temporary_file.name)
+
+
 def copy_server_ctx_settings(src: ssl.SSLContext, dst: ssl.SSLContext) -> None:
     # Versions & options
     try: dst.minimum_version = src.minimum_version
@@ -229,6 +376,24 @@ def create_server_ssl_context___load_certificate_and_key(
     return ssl_context
 
 
+def create_server_ssl_context___load_certificate_and_key_pem(
+        certificate_pem: bytes,
+        inherit_from: ssl.SSLContext | None = None,
+        enable_sslkeylogfile_env_to_client_ssl_context: bool = False,
+        sslkeylog_file_path: str = None,
+) -> ssl.SSLContext:
+    # Same as 'create_server_ssl_context___load_certificate_and_key', but the certificate and key are PEM bytes.
+    ssl_context: ssl.SSLContext = create_ssl_context_for_server(
+        allow_legacy=True, enable_sslkeylogfile_env_to_client_ssl_context=enable_sslkeylogfile_env_to_client_ssl_context,
+        sslkeylog_file_path=sslkeylog_file_path)
+
+    if inherit_from is not None:
+        copy_server_ctx_settings(inherit_from, ssl_context)
+
+    load_certificate_and_key_pem_into_server_ssl_context(ssl_context, certificate_pem)
+    return ssl_context
+
+
 @exception_wrapper.connection_exception_decorator
 def wrap_socket_with_ssl_context_server(
         socket_object,
@@ -271,13 +436,16 @@ def wrap_socket_with_ssl_context_server_with_error_message(
     return ssl_socket, error_message
 
 
-def wrap_socket_with_ssl_context_client(socket_object, ssl_context, server_hostname: str = None):
+def wrap_socket_with_ssl_context_client(
+        socket_object, ssl_context, server_hostname: str = None, session: ssl.SSLSession = None):
     # Wrapping the socket with "ssl.SSLContext" object to make "ssl.SSLSocket" object.
     # With "server_hostname" you don't have to use DNS hostname, you can use the IP, just remember to add
     # the address to your Certificate under "X509v3 Subject Alternative Name"
     # SSL wrapping should happen after socket creation and before connection:
     # https://docs.python.org/3/library/ssl.html
-    return ssl_context.wrap_socket(sock=socket_object, server_side=False, server_hostname=server_hostname)
+    # "session" is a TLS session of previous connection with the same context to resume on the handshake.
+    return ssl_context.wrap_socket(
+        sock=socket_object, server_side=False, server_hostname=server_hostname, session=session)
 
 
 def bind_socket_with_ip_port(socket_object, ip_address: str, port: int, **kwargs):
@@ -326,11 +494,13 @@ def wrap_socket_with_ssl_context_client___default_certs___ignore_verification(
         server_hostname: str = None,
         custom_pem_client_certificate_file_path: str = None,
         enable_sslkeylogfile_env_to_client_ssl_context: bool = False,
-        sslkeylog_file_path: str = None
+        sslkeylog_file_path: str = None,
+        port: int = None
 ) -> ssl.SSLSocket:
     """
     This function is a preset for wrapping the socket with SSL context for the client.
     It sets the CA default certificates, and ignores the server's certificate verification.
+    The SSL context is taken from the shared registry, check 'get_client_ssl_context'.
 
     :param socket_object: socket.socket object
     :param server_hostname: string, hostname of the server. Default is None.
@@ -339,19 +509,21 @@ def wrap_socket_with_ssl_context_client___default_certs___ignore_verification(
     :param enable_sslkeylogfile_env_to_client_ssl_context: boolean, enables the SSLKEYLOGFILE environment variable
         to the SSL context. Default is False.
     :param sslkeylog_file_path: string, full file path for the SSL key log file. Default is None.
+    :param port: integer, port of the server. If specified, the TLS session that was saved with
+        'save_client_tls_session' for this server will be resumed. Default is None.
 
     :return: ssl.SSLSocket object
     """
-    ssl_context: ssl.SSLContext = create_ssl_context_for_client(
-        enable_sslkeylogfile_env_to_client_ssl_context=enable_sslkeylogfile_env_to_client_ssl_context
-        ,sslkeylog_file_path=sslkeylog_file_path)
-    set_client_ssl_context_ca_default_certs(ssl_context)
-    set_client_ssl_context_certificate_verification_ignore(ssl_context)
+    ssl_context: ssl.SSLContext = get_client_ssl_context(
+        custom_pem_client_certificate_file_path=custom_pem_client_certificate_file_path,
+        enable_sslkeylogfile_env_to_client_ssl_context=enable_sslkeylogfile_env_to_client_ssl_context,
+        sslkeylog_file_path=sslkeylog_file_path)
 
-    if custom_pem_client_certificate_file_path:
-        ssl_context.load_cert_chain(certfile=custom_pem_client_certificate_file_path, keyfile=None)
+    session = None
+    if port is not None:
+        session = get_client_tls_session(ssl_context, server_hostname, port)
 
     ssl_socket: ssl.SSLSocket = wrap_socket_with_ssl_context_client(
-        socket_object, ssl_context, server_hostname=server_hostname)
+        socket_object, ssl_context, server_hostname=server_hostname, session=session)
 
     return ssl_socket
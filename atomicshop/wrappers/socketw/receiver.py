@@ -9,6 +9,8 @@ from ...print_api import print_api
 from ...basics import tracebacks
 from ..loggingw import loggingw
 
+from . import socket_io
+
 
 def peek_first_bytes(
         client_socket,
@@ -71,7 +73,8 @@ class Receiver:
             logger: logging.Logger = None
     ):
         self.ssl_socket: ssl.SSLSocket = ssl_socket
-        self.buffer_size_receive: int = 16384
+        # The receive buffer size of the socket adapts to the received data, check 'socket_io.receive'.
+        self.buffer_size_receive: int = socket_io.get_socket_io_state(ssl_socket).receive_buffer_size
         # Timeout of 2 is enough for regular HTTP sessions`.
         # Timeout on send to service servers dropped after 120 seconds
         # 60 seconds * 60 = minute * 60 = 1 hour
@@ -88,7 +91,8 @@ class Receiver:
 
         if logger:
             # Create child logger for the provided logger with the module's name.
-            self.logger: logging.Logger = loggingw.get_logger_with_level(f'{logger.name}.{Path(__file__).stem}')
+            # For 'loggingw.ConnectionLogger' it is resolved once per connection.
+            self.logger: logging.Logger = loggingw.get_child_logger(logger, Path(__file__).stem)
         else:
             self.logger: logging.Logger = logger
 
@@ -109,7 +113,7 @@ class Receiver:
         try:
             # "recv(byte buffer size)" to read the server's response.
             # A signal to close connection will be empty bytes string: b''.
-            received_data = self.ssl_socket.recv(self.buffer_size_receive)
+            received_data = socket_io.receive(self.ssl_socket)
         except ConnectionAbortedError:
             error_message = "ConnectionAbortedError: Connection was aborted by local TCP stack (not remote close)..."
         except ConnectionResetError:
@@ -138,8 +142,10 @@ class Receiver:
 
         :return: Tuple(full data binary bytes, is socket closed boolean, error message string).
         """
-        # Define the variable that is going to aggregate the whole data received
-        full_data: bytes = bytes()
+        # Define the variable that is going to aggregate the whole data received.
+        # Chunks are joined once at the end, since concatenating bytes copies all the data received so far.
+        received_chunks: list[bytes] = list()
+        full_data_length: int = 0
         # noinspection PyTypeChecker
         error_message: str = None
 
@@ -161,10 +167,8 @@ class Receiver:
 
                 # And if the message received is not empty then aggregate it to the main "data received" variable
                 if received_chunk != b'' and received_chunk is not None:
-                    full_data += received_chunk
-
-                    self.logger.info(f"Received packet bytes: [{len(received_chunk)}] | "
-                                     f"Total aggregated bytes: [{len(full_data)}]")
+                    received_chunks.append(received_chunk)
+                    full_data_length += len(received_chunk)
 
                 elif received_chunk == b'' or received_chunk is None:
                     # If there received_chunk is None, this means that the socket was closed,
@@ -178,8 +182,11 @@ class Receiver:
                 received_chunk = None
                 break
 
+        full_data: bytes = b''.join(received_chunks)
         if full_data:
-            self.logger.info(f"Received total: [{len(full_data)}] bytes")
+            socket_io_state = socket_io.get_socket_io_state(self.ssl_socket)
+            self.logger.info("Received total: [%d] bytes in [%d] chunks, connection total received: [%d] bytes.",
+                             full_data_length, len(received_chunks), socket_io_state.bytes_received)
 
         # In case the full data is empty, and the received chunk is None, it doesn't mean that the socket is closed.
         # But it means that there was no data to be read from the socket, because of error or timeout.
@@ -198,11 +205,10 @@ class Receiver:
             error message string if there was a connection exception).
         """
         # Getting client address and Local port from the socket
-        self.class_client_address = self.ssl_socket.getpeername()[0]
-        self.class_client_local_port = self.ssl_socket.getpeername()[1]
+        self.class_client_address, self.class_client_local_port = self.ssl_socket.getpeername()[:2]
 
         # Receiving data from the socket and closing the socket if send is finished.
-        self.logger.info(f"Waiting for data from {self.class_client_address}:{self.class_client_local_port}")
+        self.logger.info("Waiting for data from %s:%s", self.class_client_address, self.class_client_local_port)
         socket_data_bytes, is_socket_closed, error_message = self.socket_receive_message_full()
         socket_data_bytes: bytes
         is_socket_closed: bool
@@ -210,6 +216,6 @@ class Receiver:
 
         if socket_data_bytes:
             # Put only 100 characters to the log, since we record the message any way in full - later.
-            self.logger.info(f"Received: {socket_data_bytes[0: 100]}...")
+            self.logger.info("Received: %s...", socket_data_bytes[0: 100])
 
         return socket_data_bytes, is_socket_closed, error_message
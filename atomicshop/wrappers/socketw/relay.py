@@ -0,0 +1,235 @@
+"""
+Relay of raw bytes between two connected sockets, without parsing or decryption.
+On Linux the bytes are moved with 'os.splice' through a pipe, so they don't get copied to the user space.
+On other systems 'recv_into' to one preallocated buffer and 'send' of its memoryview are used.
+The sockets are non-blocking, each direction waits for its socket with 'poll' ('select' on Windows) up to the idle
+timeout of the relay.
+"""
+
+import os
+import socket
+import select
+import fnmatch
+import threading
+import time
+from typing import Union
+
+
+# Size of the kernel pipe / user space buffer for each direction.
+RELAY_BUFFER_SIZE: int = 256 * 1024
+# Seconds without any relayed bytes in both directions, after which the relay is closed.
+# Same as the receive timeout of the intercepted connections.
+RELAY_IDLE_TIMEOUT_SECONDS: float = 60.0
+# Linux 'fcntl' command to set the pipe size.
+_F_SETPIPE_SZ: int = 1031
+
+IS_SPLICE_AVAILABLE: bool = hasattr(os, 'splice')
+
+
+def is_domain_matched(domain: str, domain_patterns: list) -> bool:
+    """
+    Check if the domain matches one of the patterns.
+
+    :param domain: string, the domain.
+    :param domain_patterns: list of strings, domains or 'fnmatch' wildcard patterns, like '*.example.com'.
+    :return: boolean.
+    """
+
+    if not domain or not domain_patterns:
+        return False
+
+    domain = domain.lower()
+    for pattern in domain_patterns:
+        if fnmatch.fnmatchcase(domain, pattern.lower()):
+            return True
+    return False
+
+
+def _create_pipe(buffer_size: int) -> tuple[int, int]:
+    read_fd, write_fd = os.pipe()
+    try:
+        import fcntl
+        fcntl.fcntl(write_fd, _F_SETPIPE_SZ, buffer_size)
+    except (ImportError, OSError):
+        # The default pipe size is used, it only limits the size of each splice.
+        pass
+    return read_fd, write_fd
+
+
+class _RelayState:
+    """
+    State of the relay, shared by both directions: the relayed bytes and the error of each direction, and the time
+    of the last activity in any of the directions.
+    """
+
+    def __init__(self, idle_timeout: Union[float, None]):
+        self.idle_timeout: Union[float, None] = idle_timeout
+        # client to service, service to client.
+        self.relayed_bytes: list = [0, 0]
+        self.errors: list = [None, None]
+        self.last_activity_time: float = time.monotonic()
+
+    def add_relayed_bytes(self, direction_index: int, relayed_bytes: int):
+        self.relayed_bytes[direction_index] += relayed_bytes
+        self.last_activity_time = time.monotonic()
+
+    def wait_for_socket(self, socket_object: socket.socket, is_write: bool):
+        """
+        Wait until the socket is ready to read from or to write to.
+        Raise 'TimeoutError' if there was no activity in both directions for the 'idle_timeout'.
+        """
+
+        while True:
+            if self.idle_timeout is None:
+                timeout = None
+            else:
+                timeout = self.last_activity_time + self.idle_timeout - time.monotonic()
+                if timeout <= 0:
+                    raise TimeoutError(f'The relay was idle for {self.idle_timeout} seconds.')
+
+            if _is_socket_ready(socket_object, is_write, timeout):
+                return
+
+
+def _is_socket_ready(socket_object: socket.socket, is_write: bool, timeout: Union[float, None]) -> bool:
+    # 'poll' doesn't have the file descriptor number limit of 'select', Windows doesn't have 'poll'.
+    if hasattr(select, 'poll'):
+        poll_object = select.poll()
+        poll_object.register(socket_object, select.POLLOUT if is_write else select.POLLIN)
+        return bool(poll_object.poll(None if timeout is None else timeout * 1000))
+
+    if is_write:
+        _, ready_sockets, _ = select.select([], [socket_object], [], timeout)
+    else:
+        ready_sockets, _, _ = select.select([socket_object], [], [], timeout)
+    return bool(ready_sockets)
+
+
+def _relay_direction_splice(
+        source_socket: socket.socket,
+        target_socket: socket.socket,
+        buffer_size: int,
+        state: _RelayState,
+        direction_index: int
+):
+    read_fd, write_fd = _create_pipe(buffer_size)
+    source_fd: int = source_socket.fileno()
+    target_fd: int = target_socket.fileno()
+    try:
+        while True:
+            state.wait_for_socket(source_socket, is_write=False)
+            try:
+                received_bytes: int = os.splice(source_fd, write_fd, buffer_size, flags=os.SPLICE_F_MOVE)
+            except BlockingIOError:
+                continue
+            if received_bytes == 0:
+                break
+
+            while received_bytes:
+                state.wait_for_socket(target_socket, is_write=True)
+                try:
+                    sent_bytes: int = os.splice(read_fd, target_fd, received_bytes, flags=os.SPLICE_F_MOVE)
+                except BlockingIOError:
+                    continue
+                received_bytes -= sent_bytes
+                state.add_relayed_bytes(direction_index, sent_bytes)
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def _relay_direction_buffer(
+        source_socket: socket.socket,
+        target_socket: socket.socket,
+        buffer_size: int,
+        state: _RelayState,
+        direction_index: int
+):
+    buffer = bytearray(buffer_size)
+    buffer_view = memoryview(buffer)
+    while True:
+        state.wait_for_socket(source_socket, is_write=False)
+        try:
+            received_bytes: int = source_socket.recv_into(buffer)
+        except BlockingIOError:
+            continue
+        if received_bytes == 0:
+            break
+
+        sent_position: int = 0
+        while sent_position < received_bytes:
+            state.wait_for_socket(target_socket, is_write=True)
+            try:
+                sent_bytes: int = target_socket.send(buffer_view[sent_position:received_bytes])
+            except BlockingIOError:
+                continue
+            sent_position += sent_bytes
+            state.add_relayed_bytes(direction_index, sent_bytes)
+
+
+def _relay_direction(
+        source_socket: socket.socket,
+        target_socket: socket.socket,
+        buffer_size: int,
+        state: _RelayState,
+        direction_index: int
+):
+    try:
+        if IS_SPLICE_AVAILABLE:
+            _relay_direction_splice(source_socket, target_socket, buffer_size, state, direction_index)
+        else:
+            _relay_direction_buffer(source_socket, target_socket, buffer_size, state, direction_index)
+    except OSError as e:
+        # The bytes that were relayed before the error stay in the state.
+        state.errors[direction_index] = e
+    finally:
+        # Pass the end of the stream to the other side, the other direction can still send.
+        # On error or idle timeout, shutdown both sides, so the other direction ends too.
+        try:
+            if state.errors[direction_index] is None:
+                target_socket.shutdown(socket.SHUT_WR)
+            else:
+                target_socket.shutdown(socket.SHUT_RDWR)
+                source_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def relay_sockets(
+        client_socket: socket.socket,
+        service_socket: socket.socket,
+        buffer_size: int = RELAY_BUFFER_SIZE,
+        idle_timeout: Union[float, None] = RELAY_IDLE_TIMEOUT_SECONDS
+) -> tuple[int, int, Union[OSError, None]]:
+    """
+    Relay the bytes between the sockets in both directions until both sides close.
+    The client to service direction runs in a new thread, the service to client direction in the current thread.
+    The sockets are set to non-blocking mode, and they are not closed by the function. If the relay ends with an
+    error or by the idle timeout, both sockets are shut down, the caller only needs to close them.
+    Data that was only peeked (MSG_PEEK) from the client socket is still in its buffer and is relayed too.
+
+    :param client_socket: socket, the accepted client socket.
+    :param service_socket: socket, the connected socket to the service.
+    :param buffer_size: integer, size of the buffer of each direction.
+    :param idle_timeout: float, seconds without any bytes relayed in both directions, after which the relay ends
+        with 'TimeoutError', so half-open connections don't keep the thread and the sockets forever.
+        None to wait without a limit.
+    :return: tuple: number of bytes from the client to the service, number of bytes from the service to the client,
+        and the first error of the relay, or None. The numbers of bytes include the bytes that were relayed
+        before the error.
+    """
+
+    client_socket.setblocking(False)
+    service_socket.setblocking(False)
+
+    state = _RelayState(idle_timeout)
+
+    client_to_service_thread = threading.Thread(
+        target=_relay_direction, args=(client_socket, service_socket, buffer_size, state, 0),
+        name=f'{threading.current_thread().name}-relay', daemon=True)
+    client_to_service_thread.start()
+
+    _relay_direction(service_socket, client_socket, buffer_size, state, 1)
+    client_to_service_thread.join()
+
+    return state.relayed_bytes[0], state.relayed_bytes[1], state.errors[0] or state.errors[1]
@@ -0,0 +1,240 @@
+"""
+Sharded default server certificate.
+Domains that are added to the default server certificate during SNI are spread over several small certificates
+(buckets) instead of one certificate with an ever-growing SAN list. Each domain always goes to the same bucket,
+so adding a domain re-issues only its bucket, in a background thread.
+The SSLContext of a bucket is replaced only after the new certificate is ready, handshakes that already got
+the previous context continue with it.
+"""
+
+import ssl
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from . import creator
+from ..certauthw.certauthw import CertAuthWrapper
+from ...domains import get_domain_without_first_subdomain_if_no_subdomain_return_as_is
+
+
+# Number of SAN buckets that the domains are spread over.
+DEFAULT_CERTIFICATE_BUCKET_COUNT: int = 32
+# How long the handshake of a new domain waits for its bucket certificate, before it continues with the
+# default server certificate.
+NEW_DOMAIN_WAIT_TIMEOUT_SECONDS: float = 10.0
+
+
+def get_hostname_parent_candidates(hostname: str) -> tuple[str, ...]:
+    """
+    Get the parent domains that can cover the hostname in a certificate that contains the parent domain and its
+    wildcard: the hostname itself and the hostname without its first label.
+    Example: 'www.example.com' is covered by 'www.example.com' or 'example.com' ('*.example.com'),
+        but not by 'com'.
+
+    :param hostname: string, the hostname.
+    :return: tuple of strings.
+    """
+
+    hostname_parts = hostname.lower().rstrip('.').split('.', 1)
+    if len(hostname_parts) < 2 or '.' not in hostname_parts[1]:
+        return ('.'.join(hostname_parts),)
+    return '.'.join(hostname_parts), hostname_parts[1]
+
+
+def is_hostname_covered(hostname: str, parent_domains: set) -> bool:
+    """
+    Check if the hostname is covered by exact suffix match with one of the parent domains, the way the certificate
+    SAN 'parent_domain' and '*.parent_domain' entries cover it.
+
+    :param hostname: string, the hostname.
+    :param parent_domains: set of strings, the parent domains in lower case.
+    :return: boolean.
+    """
+
+    return any(candidate in parent_domains for candidate in get_hostname_parent_candidates(hostname))
+
+
+class DefaultCertificateBuckets:
+    """
+    Manage the SAN buckets of the default server certificate.
+    """
+    def __init__(
+            self,
+            ca_certificate_name: str,
+            ca_certificate_filepath: str,
+            certificate_directory: str,
+            certificate_name: str,
+            default_certificate_domain_list: list,
+            bucket_count: int = DEFAULT_CERTIFICATE_BUCKET_COUNT,
+            enable_sslkeylogfile_env_to_client_ssl_context: bool = False,
+            sslkeylog_file_path: str = None
+    ):
+        """
+        :param ca_certificate_name: string, name of the CA certificate.
+        :param ca_certificate_filepath: string, full file path to the CA certificate.
+        :param certificate_directory: string, directory to store the bucket certificates in.
+        :param certificate_name: string, name of the default server certificate. The bucket certificates will be
+            named '<certificate_name>_bucket_<index>.pem'.
+        :param default_certificate_domain_list: list of strings, domains that are already in the default server
+            certificate. These domains are not added to the buckets.
+        :param bucket_count: integer, number of SAN buckets.
+        :param enable_sslkeylogfile_env_to_client_ssl_context: boolean, passed to the SSLContext creation.
+        :param sslkeylog_file_path: string, passed to the SSLContext creation.
+        """
+
+        self.certificate_name: str = certificate_name
+        self.bucket_count: int = bucket_count
+        self.enable_sslkeylogfile_env_to_client_ssl_context: bool = enable_sslkeylogfile_env_to_client_ssl_context
+        self.sslkeylog_file_path: str = sslkeylog_file_path
+
+        self.default_parent_domains: set = {
+            get_domain_without_first_subdomain_if_no_subdomain_return_as_is(domain).lower()
+            for domain in default_certificate_domain_list}
+
+        self.certauth_wrapper = CertAuthWrapper(
+            ca_certificate_name=ca_certificate_name,
+            ca_certificate_filepath=ca_certificate_filepath,
+            server_certificate_directory=certificate_directory
+        )
+
+        self._lock = threading.Lock()
+        # Parent domains that were added to each bucket.
+        self._bucket_domains: list[set] = [set() for _ in range(bucket_count)]
+        # Tuple of (SSLContext, set of parent domains in its certificate) of each issued bucket.
+        self._bucket_issued: list[tuple[ssl.SSLContext, frozenset] | None] = [None] * bucket_count
+        # Issue jobs that were queued, but didn't take the domain snapshot yet.
+        self._queued_futures: dict[int, Future] = dict()
+        # One worker, so the certificates are issued one at a time, in the order the domains were added.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='default_certificate_buckets')
+
+    def get_bucket_index(self, parent_domain: str) -> int:
+        """
+        Get the bucket index of the parent domain. The index is stable between runs.
+
+        :param parent_domain: string, the parent domain.
+        :return: integer.
+        """
+
+        return zlib.crc32(parent_domain.lower().encode()) % self.bucket_count
+
+    def is_covered_by_default_certificate(self, hostname: str) -> bool:
+        """
+        Check if the hostname is covered by the domains of the default server certificate itself.
+
+        :param hostname: string, the hostname.
+        :return: boolean.
+        """
+
+        return is_hostname_covered(hostname, self.default_parent_domains)
+
+    def get_ssl_context(self, hostname: str) -> ssl.SSLContext | None:
+        """
+        Get the SSLContext of the issued bucket certificate that covers the hostname.
+
+        :param hostname: string, the hostname.
+        :return: SSLContext or None if no issued bucket certificate covers the hostname yet.
+        """
+
+        for candidate in get_hostname_parent_candidates(hostname):
+            bucket_issued = self._bucket_issued[self.get_bucket_index(candidate)]
+            if bucket_issued and candidate in bucket_issued[1]:
+                return bucket_issued[0]
+        return None
+
+    def add_domain(self, hostname: str, inherit_from: ssl.SSLContext = None) -> Future:
+        """
+        Add the parent domain of the hostname to its bucket and queue the re-issue of the bucket certificate.
+        If the bucket re-issue is already queued and didn't start yet, the queued job is returned, since it will
+        include the new domain too.
+
+        :param hostname: string, the hostname.
+        :param inherit_from: SSLContext, the settings of the new bucket SSLContext will be copied from it.
+        :return: Future of the re-issue, its result is a tuple of
+            (certificate file path, list of SAN DNS names, SSLContext).
+        """
+
+        parent_domain: str = get_domain_without_first_subdomain_if_no_subdomain_return_as_is(hostname.lower())
+        bucket_index: int = self.get_bucket_index(parent_domain)
+
+        with self._lock:
+            self._bucket_domains[bucket_index].add(parent_domain)
+
+            future = self._queued_futures.get(bucket_index)
+            if future is None:
+                future = self._executor.submit(self._issue_bucket, bucket_index, inherit_from)
+                self._queued_futures[bucket_index] = future
+
+        return future
+
+    def _issue_bucket(self, bucket_index: int, inherit_from: ssl.SSLContext = None):
+        # Domains that are added from now on will queue a new job.
+        with self._lock:
+            self._queued_futures.pop(bucket_index, None)
+            domain_list: list = sorted(self._bucket_domains[bucket_index])
+
+        certificate_file_path, subject_alternate_names = \
+            self.certauth_wrapper.create_overwrite_server_certificate_ca_signed_return_path_and_san(
+                domain_list=domain_list,
+                server_certificate_file_name_no_extension=f'{self.certificate_name}_bucket_{bucket_index}'
+            )
+
+        if not certificate_file_path:
+            raise RuntimeError(f"Couldn't create / overwrite Default Server Certificate bucket: {bucket_index}")
+
+        ssl_context: ssl.SSLContext = creator.create_server_ssl_context___load_certificate_and_key(
+            certificate_file_path,
+            None,
+            inherit_from=inherit_from,
+            enable_sslkeylogfile_env_to_client_ssl_context=self.enable_sslkeylogfile_env_to_client_ssl_context,
+            sslkeylog_file_path=self.sslkeylog_file_path
+        )
+
+        # Replace the bucket at once, handshakes that already got the previous context keep it.
+        self._bucket_issued[bucket_index] = (ssl_context, frozenset(domain_list))
+
+        return certificate_file_path, subject_alternate_names, ssl_context
+
+
+_BUCKETS_INSTANCES: dict[tuple[str, str], DefaultCertificateBuckets] = dict()
+_BUCKETS_INSTANCES_LOCK = threading.Lock()
+
+
+def get_default_certificate_buckets(
+        ca_certificate_name: str,
+        ca_certificate_filepath: str,
+        certificate_directory: str,
+        certificate_name: str,
+        default_certificate_domain_list: list,
+        enable_sslkeylogfile_env_to_client_ssl_context: bool = False,
+        sslkeylog_file_path: str = None
+) -> DefaultCertificateBuckets:
+    """
+    Get the process wide DefaultCertificateBuckets instance of the default server certificate, create it on the
+    first call.
+
+    :param ca_certificate_name: string, name of the CA certificate.
+    :param ca_certificate_filepath: string, full file path to the CA certificate.
+    :param certificate_directory: string, directory of the default server certificate.
+    :param certificate_name: string, name of the default server certificate.
+    :param default_certificate_domain_list: list of strings, domains of the default server certificate.
+    :param enable_sslkeylogfile_env_to_client_ssl_context: boolean, passed to the SSLContext creation.
+    :param sslkeylog_file_path: string, passed to the SSLContext creation.
+    :return: DefaultCertificateBuckets instance.
+    """
+
+    instance_key: tuple[str, str] = (certificate_directory, certificate_name)
+    with _BUCKETS_INSTANCES_LOCK:
+        buckets = _BUCKETS_INSTANCES.get(instance_key)
+        if buckets is None:
+            buckets = DefaultCertificateBuckets(
+                ca_certificate_name=ca_certificate_name,
+                ca_certificate_filepath=ca_certificate_filepath,
+                certificate_directory=certificate_directory,
+                certificate_name=certificate_name,
+                default_certificate_domain_list=default_certificate_domain_list,
+                enable_sslkeylogfile_env_to_client_ssl_context=enable_sslkeylogfile_env_to_client_ssl_context,
+                sslkeylog_file_path=sslkeylog_file_path
+            )
+            _BUCKETS_INSTANCES[instance_key] = buckets
+
+    return buckets
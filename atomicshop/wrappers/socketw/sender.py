@@ -7,22 +7,29 @@ from ...print_api import print_api
 from ..loggingw import loggingw
 from ...basics import tracebacks
 
-from . import socket_base
+from . import socket_base, socket_io
 
 
 class Sender:
     def __init__(
             self,
             ssl_socket: ssl.SSLSocket | socket.socket,
-            bytes_to_send: bytes,
+            bytes_to_send: bytes | list[bytes] | tuple[bytes, ...],
             logger: logging.Logger = None
     ):
-        self.bytes_to_send: bytes = bytes_to_send
+        """
+        :param ssl_socket: socket object to send to.
+        :param bytes_to_send: bytes, or list/tuple of bytes, like header and body, that will be sent in order
+            without joining them.
+        :param logger: logger, the child logger of the module will be created from it.
+        """
+        self.bytes_to_send: bytes | list[bytes] | tuple[bytes, ...] = bytes_to_send
         self.ssl_socket: ssl.SSLSocket | socket.socket = ssl_socket
 
         if logger:
             # Create child logger for the provided logger with the module's name.
-            self.logger: logging.Logger = loggingw.get_logger_with_level(f'{logger.name}.{Path(__file__).stem}')
+            # For 'loggingw.ConnectionLogger' it is resolved once per connection.
+            self.logger: logging.Logger = loggingw.get_child_logger(logger, Path(__file__).stem)
         else:
             self.logger: logging.Logger = logger
 
@@ -32,41 +39,33 @@ class Sender:
         # Unlike "send()" method, "socket.sendall()" doesn't return number of bytes at all. It sends all the data
         # until other side receives all, so there's no way knowing how much data was sent. Returns "None" on
         # Success though.
+        # The partial sends are handled in 'socket_io', which continues from a memoryview of the message.
 
         # The error string that will be returned by the function in case of error.
         # If returned None then everything is fine.
         # noinspection PyTypeChecker
         error_message: str = None
 
-        # Current amount of bytes sent is 0, since we didn't start yet
-        total_sent_bytes = 0
-
         try:
             # Getting byte length of current message
-            current_message_length = len(self.bytes_to_send)
-
-            self.logger.info(
-                f"Sending message to "
-                f"{self.ssl_socket.getpeername()[0]}:{self.ssl_socket.getpeername()[1]}")
-
-            # Looping through "socket.send()" method while total sent bytes are less than message length
-            while total_sent_bytes < current_message_length:
-                # Sending the message and getting the amount of bytes sent
-                sent_bytes = self.ssl_socket.send(self.bytes_to_send[total_sent_bytes:])
-                # If there were only "0" bytes sent, then connection on the other side was terminated
-                if sent_bytes == 0:
-                    error_message = (
-                        f"Sent {sent_bytes} bytes - connection is down... Could send only "
-                        f"{total_sent_bytes} bytes out of {current_message_length}. Closing socket...")
-                    self.logger.info(error_message)
-                    break
-
-                # Adding amount of currently sent bytes to the total amount of bytes sent
-                total_sent_bytes += sent_bytes
-                self.logger.info(f"Sent {total_sent_bytes} bytes out of {current_message_length}")
-
-            # At this point the sending loop finished successfully
-            self.logger.info(f"Sent the message to destination.")
+            if isinstance(self.bytes_to_send, (list, tuple)):
+                current_message_length = sum(len(buffer) for buffer in self.bytes_to_send)
+                total_sent_bytes: int = socket_io.send_buffers(self.ssl_socket, self.bytes_to_send)
+            else:
+                current_message_length = len(self.bytes_to_send)
+                total_sent_bytes: int = socket_io.send_all(self.ssl_socket, self.bytes_to_send)
+
+            # If the send stopped on "0" bytes sent, then connection on the other side was terminated
+            if total_sent_bytes < current_message_length:
+                error_message = (
+                    f"Sent 0 bytes - connection is down... Could send only "
+                    f"{total_sent_bytes} bytes out of {current_message_length}. Closing socket...")
+                self.logger.info(error_message)
+            else:
+                # At this point the sending finished successfully
+                self.logger.info(
+                    "Sent the message to destination: [%d] bytes, connection total sent: [%d] bytes.",
+                    total_sent_bytes, socket_io.get_socket_io_state(self.ssl_socket).bytes_sent)
         except Exception as e:
             source_tuple, destination_tuple = socket_base.get_source_destination(self.ssl_socket)
             source_address, source_port = source_tuple
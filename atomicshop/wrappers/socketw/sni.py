@@ -3,10 +3,9 @@ from dataclasses import dataclass
 from typing import Callable, Any
 
 from ..loggingw import loggingw
-from ...domains import get_domain_without_first_subdomain_if_no_subdomain_return_as_is
 from ...print_api import print_api
 
-from . import certificator, creator
+from . import certificator, creator, san_buckets
 
 
 @dataclass
@@ -303,48 +302,48 @@ class SNIHandler:
             self,
             print_kwargs: dict = None
     ):
-        # Check if incoming domain is already in the parent domains of 'domains_all_times' list.
-        if not any(x in self.sni_received_parameters.ssl_socket.server_hostname for x in
-                   self.default_certificate_domain_list):
+        hostname: str = self.sni_received_parameters.ssl_socket.server_hostname
+        if not hostname:
+            return
+
+        # New domains are not added to the default server certificate itself, but to one of its small SAN buckets,
+        # so only that bucket is re-issued.
+        default_certificate_buckets = self.certificator_instance.get_default_certificate_buckets()
+
+        # Check if incoming domain is already covered by the parent domains of 'domains_all_times' list.
+        if default_certificate_buckets.is_covered_by_default_certificate(hostname):
+            return
+
+        # Check if incoming domain is already covered by one of the issued buckets.
+        bucket_ssl_context = default_certificate_buckets.get_ssl_context(hostname)
+        if not bucket_ssl_context:
             message = f"SNI Handler: Current domain is not in known domains list. Adding."
             print_api(message, **(print_kwargs or {}))
-            # In the past was using 'certauth' to extract tlds, but it works only in online mode, so rewrote
-            # the function to disable online fetching of TLD snapshot.
-            # Initialize 'certauth' object.
-            # certificate_object = CertificateAuthority(certificate_ca_name, certificate_ca_filepath)
-            # Extract parent domain from the current SNI domain.
-            # parent_domain = certificate_object.get_wildcard_domain(service_name_from_sni)
-
-            # Extract parent domain from the current SNI domain.
-            parent_domain = get_domain_without_first_subdomain_if_no_subdomain_return_as_is(
-                self.sni_received_parameters.ssl_socket.server_hostname)
-            # Add the parent domain to the known domains list.
-            self.default_certificate_domain_list.append(parent_domain)
-
-            default_server_certificate_path, subject_alternate_names = \
-                self.certificator_instance.create_overwrite_default_server_certificate_ca_signed()
-
-            if default_server_certificate_path:
-                message = f"SNI Handler: Default Server Certificate was created / overwritten: " \
-                            f"{default_server_certificate_path}"
-                print_api(message, **(print_kwargs or {}))
-
-                message = f"SNI Handler: Server Certificate current 'Subject Alternative Names': " \
-                          f"{subject_alternate_names}"
-                print_api(message, **(print_kwargs or {}))
-
-                # Since new default certificate was created we need to create new SSLContext and add the certificate.
-                # You need to build new context and exchange the context that being inherited from the main socket,
-                # or else the context will receive previous certificate each time.
-                self.sni_received_parameters.ssl_socket.context = (
-                    creator.create_server_ssl_context___load_certificate_and_key(
-                        default_server_certificate_path,
-                        None,
-                        inherit_from=self.sni_received_parameters.ssl_socket.context,
-                        enable_sslkeylogfile_env_to_client_ssl_context=self.enable_sslkeylogfile_env_to_client_ssl_context,
-                        sslkeylog_file_path=self.sslkeylog_file_path
-                    )
-                )
-            else:
-                message = f"Couldn't create / overwrite Default Server Certificate: {default_server_certificate_path}"
-                raise SNIDefaultCertificateCreationError(message)
+
+            # The bucket is re-issued in the background, other handshakes keep using the previous bucket context.
+            # Only the handshake of the new domain waits for it.
+            bucket_future = default_certificate_buckets.add_domain(
+                hostname, inherit_from=self.sni_received_parameters.ssl_socket.context)
+            try:
+                default_server_certificate_path, subject_alternate_names, bucket_ssl_context = \
+                    bucket_future.result(timeout=san_buckets.NEW_DOMAIN_WAIT_TIMEOUT_SECONDS)
+            except TimeoutError:
+                message = (f"SNI Handler: Default Server Certificate bucket for [{hostname}] is not ready yet, "
+                           f"using the Default Server Certificate.")
+                print_api(message, color="yellow", **(print_kwargs or {}))
+                return
+            except Exception as e:
+                message = f"Couldn't create / overwrite Default Server Certificate bucket for [{hostname}]: {e}"
+                raise SNIDefaultCertificateCreationError(message) from e
+
+            message = f"SNI Handler: Default Server Certificate bucket was created / overwritten: " \
+                      f"{default_server_certificate_path}"
+            print_api(message, **(print_kwargs or {}))
+
+            message = f"SNI Handler: Server Certificate bucket current 'Subject Alternative Names': " \
+                      f"{subject_alternate_names}"
+            print_api(message, **(print_kwargs or {}))
+
+        # You need to exchange the context that being inherited from the main socket,
+        # or else the context will present the default certificate.
+        self.sni_received_parameters.ssl_socket.context = bucket_ssl_context
@@ -73,7 +73,8 @@ class SocketClient:
 
         if logger:
             # Create child logger for the provided logger with the module's name.
-            self.logger: logging.Logger = loggingw.get_logger_with_level(f'{logger.name}.{Path(__file__).stem}')
+            # For 'loggingw.ConnectionLogger' it is resolved once per connection.
+            self.logger: logging.Logger = loggingw.get_child_logger(logger, Path(__file__).stem)
         else:
             self.logger: logging.Logger = logger
 
@@ -104,7 +105,8 @@ class SocketClient:
             return creator.wrap_socket_with_ssl_context_client___default_certs___ignore_verification(
                 socket_object, self.service_name, self.custom_pem_client_certificate_file_path,
                 enable_sslkeylogfile_env_to_client_ssl_context=self.enable_sslkeylogfile_env_to_client_ssl_context,
-                sslkeylog_file_path=self.sslkeylog_file_path
+                sslkeylog_file_path=self.sslkeylog_file_path,
+                port=self.service_port
             )
 
     def service_connection(
@@ -180,7 +182,7 @@ class SocketClient:
         else:
             destination = self.service_name
 
-        self.logger.info(f"Connecting to [{destination}]")
+        self.logger.info("Connecting to [%s]", destination)
         try:
             # "connect()" to the server using address and port
             self.socket_instance.connect((destination, self.service_port))
@@ -209,6 +211,8 @@ class SocketClient:
 
         # If everything was fine, we'll log the connection.
         self.logger.info("Connected...")
+        # Save the TLS session, so the next connection to the service can resume it.
+        creator.save_client_tls_session(self.socket_instance, self.service_port)
 
         # Return the connected socket.
         return self.socket_instance, None
@@ -217,9 +221,11 @@ class SocketClient:
         return self.socket_instance
 
     def close_socket(self):
+        # With TLS 1.3 the session tickets arrive after the handshake, save the session again before closing.
+        creator.save_client_tls_session(self.socket_instance, self.service_port)
         self.socket_instance.close()
         self.socket_instance = None
-        self.logger.info(f"Closed socket to service server [{self.service_name}:{self.service_port}]")
+        self.logger.info("Closed socket to service server [%s:%s]", self.service_name, self.service_port)
 
     def send_receive_to_service(
             self,
@@ -0,0 +1,169 @@
+"""
+Low level I/O on connected sockets, shared by 'Sender' and 'Receiver'.
+The state of each socket (adaptive receive buffer size and byte counters) lives as long as the socket object,
+since 'Sender' and 'Receiver' are created again for each send/receive cycle.
+"""
+
+import socket
+import ssl
+import threading
+import weakref
+from typing import Iterable
+
+
+# The receive buffer starts from the minimum size and grows twice each time a receive fills it, up to the maximum.
+RECEIVE_BUFFER_MIN_SIZE: int = 16384
+RECEIVE_BUFFER_MAX_SIZE: int = 1024 * 1024
+# Number of receives in a row that fill less than a quarter of the buffer, before the buffer is shrunk by half.
+RECEIVE_BUFFER_SHRINK_AFTER: int = 8
+# Maximum total size of buffers that are joined to one buffer, when 'sendmsg' can't be used.
+SEND_JOIN_MAX_SIZE: int = 64 * 1024
+# Maximum number of buffers in one 'sendmsg' call.
+SENDMSG_MAX_BUFFERS: int = 512
+
+
+class SocketIOState:
+    """
+    Per socket I/O state: the adaptive receive buffer size and the byte counters.
+    """
+    def __init__(self):
+        self.receive_buffer_size: int = RECEIVE_BUFFER_MIN_SIZE
+        self.bytes_received: int = 0
+        self.bytes_sent: int = 0
+        self.receive_calls: int = 0
+        self.send_calls: int = 0
+        self._small_receives_in_row: int = 0
+
+    def update_after_receive(self, received_bytes_count: int):
+        """
+        Update the counters and the receive buffer size after a receive.
+
+        :param received_bytes_count: integer, number of bytes that the receive returned.
+        :return: None.
+        """
+
+        self.bytes_received += received_bytes_count
+        self.receive_calls += 1
+
+        if received_bytes_count >= self.receive_buffer_size:
+            self.receive_buffer_size = min(self.receive_buffer_size * 2, RECEIVE_BUFFER_MAX_SIZE)
+            self._small_receives_in_row = 0
+        elif received_bytes_count < self.receive_buffer_size // 4:
+            self._small_receives_in_row += 1
+            if self._small_receives_in_row >= RECEIVE_BUFFER_SHRINK_AFTER:
+                self.receive_buffer_size = max(self.receive_buffer_size // 2, RECEIVE_BUFFER_MIN_SIZE)
+                self._small_receives_in_row = 0
+        else:
+            self._small_receives_in_row = 0
+
+    def update_after_send(self, sent_bytes_count: int):
+        self.bytes_sent += sent_bytes_count
+        self.send_calls += 1
+
+
+_SOCKETS_IO_STATES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_SOCKETS_IO_STATES_LOCK = threading.Lock()
+
+
+def get_socket_io_state(socket_object: socket.socket | ssl.SSLSocket) -> SocketIOState:
+    """
+    Get the I/O state of the socket, create it on the first call.
+
+    :param socket_object: socket object.
+    :return: SocketIOState instance.
+    """
+
+    with _SOCKETS_IO_STATES_LOCK:
+        socket_io_state = _SOCKETS_IO_STATES.get(socket_object)
+        if socket_io_state is None:
+            socket_io_state = SocketIOState()
+            _SOCKETS_IO_STATES[socket_object] = socket_io_state
+    return socket_io_state
+
+
+def receive(socket_object: socket.socket | ssl.SSLSocket) -> bytes:
+    """
+    Receive one chunk from the socket with the adaptive buffer size of the socket.
+    SSL sockets return at most one TLS record (16 KB) for each receive, so the buffer grows only on plain sockets.
+
+    :param socket_object: socket object.
+    :return: bytes, the received chunk. Empty bytes if the socket was closed on the other side.
+    """
+
+    socket_io_state = get_socket_io_state(socket_object)
+    received_data: bytes = socket_object.recv(socket_io_state.receive_buffer_size)
+    socket_io_state.update_after_receive(len(received_data))
+    return received_data
+
+
+def send_all(socket_object: socket.socket | ssl.SSLSocket, data: bytes | bytearray | memoryview) -> int:
+    """
+    Send all the data to the socket. Partial sends continue from a memoryview of the data, without copying the rest
+    of the data on each send.
+
+    :param socket_object: socket object.
+    :param data: bytes-like object to send.
+    :return: integer, number of bytes that were sent. It is less than the data length only if the socket
+        sent 0 bytes, which means that the connection is down.
+    """
+
+    socket_io_state = get_socket_io_state(socket_object)
+    data_view = memoryview(data).cast('B')
+    data_length: int = len(data_view)
+    total_sent_bytes: int = 0
+
+    while total_sent_bytes < data_length:
+        sent_bytes: int = socket_object.send(data_view[total_sent_bytes:])
+        if sent_bytes == 0:
+            break
+        total_sent_bytes += sent_bytes
+        socket_io_state.update_after_send(sent_bytes)
+
+    return total_sent_bytes
+
+
+def send_buffers(socket_object: socket.socket | ssl.SSLSocket, buffers: Iterable[bytes]) -> int:
+    """
+    Send all the buffers to the socket in order, like header and body, without joining them to one buffer.
+    Plain sockets send them with vectored 'sendmsg', where it is available. SSL sockets don't support 'sendmsg',
+    so small buffers are joined and big buffers are sent one by one.
+
+    :param socket_object: socket object.
+    :param buffers: iterable of bytes-like objects.
+    :return: integer, number of bytes that were sent. It is less than the total length only if the socket
+        sent 0 bytes, which means that the connection is down.
+    """
+
+    buffer_views: list[memoryview] = [memoryview(buffer).cast('B') for buffer in buffers]
+    buffer_views = [buffer_view for buffer_view in buffer_views if len(buffer_view)]
+    total_length: int = sum(len(buffer_view) for buffer_view in buffer_views)
+
+    if isinstance(socket_object, ssl.SSLSocket) or not hasattr(socket_object, 'sendmsg'):
+        if total_length <= SEND_JOIN_MAX_SIZE:
+            return send_all(socket_object, b''.join(buffer_views))
+
+        total_sent_bytes: int = 0
+        for buffer_view in buffer_views:
+            sent_bytes: int = send_all(socket_object, buffer_view)
+            total_sent_bytes += sent_bytes
+            if sent_bytes < len(buffer_view):
+                break
+        return total_sent_bytes
+
+    socket_io_state = get_socket_io_state(socket_object)
+    total_sent_bytes: int = 0
+    while buffer_views:
+        sent_bytes: int = socket_object.sendmsg(buffer_views[:SENDMSG_MAX_BUFFERS])
+        if sent_bytes == 0:
+            break
+        total_sent_bytes += sent_bytes
+        socket_io_state.update_after_send(sent_bytes)
+
+        # Drop the buffers that were sent fully, and continue from the middle of a partially sent buffer.
+        while buffer_views and sent_bytes >= len(buffer_views[0]):
+            sent_bytes -= len(buffer_views[0])
+            buffer_views.pop(0)
+        if sent_bytes:
+            buffer_views[0] = buffer_views[0][sent_bytes:]
+
+    return total_sent_bytes
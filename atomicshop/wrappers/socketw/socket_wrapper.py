@@ -1,5 +1,6 @@
 import multiprocessing
 import threading
+import logging
 import select
 from typing import Literal, Union, Callable, Any
 from pathlib import Path
@@ -11,15 +12,16 @@ import paramiko
 
 from ...mitm import initialize_engines
 from ..psutilw import psutil_networks
-from ..certauthw import certauthw
+from ..certauthw import certauthw, cert_store
 from ..loggingw import loggingw
 from ...permissions import permissions
 from ... import filesystem, certificates
-from ...basics import booleans, tracebacks
+from ...basics import booleans, tracebacks, threads
 from ...print_api import print_api
 from ...import ssh_remote
 
-from . import socket_base, creator, process_getter, accepter, statistics_csv, ssl_base, sni
+from . import socket_base, creator, process_getter, accepter, statistics_csv, ssl_base, sni, client_hello, relay
+from .socket_client import SocketClient
 
 
 class SocketWrapperPortInUseError(Exception):
@@ -33,6 +35,8 @@ class SocketWrapperConfigurationValuesError(Exception):
 # from ... import queues
 # SNI_QUEUE = queues.NonBlockQueue()
 LOGS_DIRECTORY_NAME: str = 'logs'
+# Cached server certificates that expire in this time are removed at startup.
+CERTIFICATES_EXPIRY_MARGIN_SECONDS: int = 86400
 
 
 class SocketWrapper:
@@ -79,6 +83,7 @@ class SocketWrapper:
             exceptions_logger_queue: multiprocessing.Queue = None,
             enable_sslkeylogfile_env_to_client_ssl_context: bool = False,
             sslkeylog_file_path: str = None,
+            passthrough_domain_list: list = None,
             print_kwargs: dict = None,
     ):
         """
@@ -132,12 +137,15 @@ class SocketWrapper:
             downloaded from the server socket.
         :param sni_server_certificate_from_server_socket_download_directory: string, path to directory where
             server certificate will be downloaded from the server socket.
+            The certificates are stored in one certificate store file in the directory, see 'cert_store'.
         :param default_server_certificate_name: default server certificate name.
         :param default_certificate_domain_list: list of string, domains to create the default certificate with.
         :param default_server_certificate_directory: string, path to directory where default certificate file
             will be stored.
         :param sni_server_certificates_cache_directory: string, path to directory where all server certificates for
             each domain will be created.
+            The certificates are stored in one certificate store file in the directory, see 'cert_store'.
+            The store is preloaded to memory and its expired certificates are deleted at startup.
         :param skip_extension_id_list: list of string, list of extension IDs that will be skipped when processing
             the certificate from the server socket.
             Example: ['1.3.6.1.5.5.7.3.2', '2.5.29.31', '1.3.6.1.5.5.7.1.1']
@@ -178,6 +186,10 @@ class SocketWrapper:
         :param sslkeylog_file_path: string, path to file where SSL handshake keys will be saved.
             If not provided and 'enable_sslkeylogfile_env_to_client_ssl_context' is True, then
             the environment variable 'SSLKEYLOGFILE' will be used.
+        :param passthrough_domain_list: list of strings, domains or wildcard patterns like '*.example.com'.
+            Connections to these domains (by the SNI, or by the DNS domain if there is no SNI) are not intercepted:
+            the bytes are relayed to the service as is, without TLS termination, parsing and recording.
+            Only the connection level statistics are written. Domains of the engine are never passed through.
         :param print_kwargs: dict, additional arguments to pass to the print function.
         """
 
@@ -216,6 +228,7 @@ class SocketWrapper:
         self.enable_sslkeylogfile_env_to_client_ssl_context: bool = (
             enable_sslkeylogfile_env_to_client_ssl_context)
         self.sslkeylog_file_path: str | None = sslkeylog_file_path
+        self.passthrough_domain_list: list | None = passthrough_domain_list
         self.print_kwargs: dict | None = print_kwargs
 
         self.socket_object = None
@@ -400,6 +413,7 @@ class SocketWrapper:
 
             # If someone removed the CA certificate file manually, and now it was created, we also need to
             # clear the cached certificates.
+            cert_store.close_certificate_store(self.sni_server_certificates_cache_directory)
             try:
                 shutil.rmtree(self.sni_server_certificates_cache_directory)
             # If the directory doesn't exist it will throw an exception, which is OK.
@@ -411,6 +425,23 @@ class SocketWrapper:
         else:
             os.makedirs(self.sni_server_certificates_cache_directory, exist_ok=True)
 
+        if self.sni_create_server_certificate_for_each_domain:
+            # Load the index of the cached server certificates to memory and remove the expired ones, so the
+            # certificates of new domains are signed again.
+            server_certificates_store = cert_store.get_certificate_store(self.sni_server_certificates_cache_directory)
+            server_certificates_store.preload()
+            expired_certificates_count: int = server_certificates_store.delete_expired(
+                expiry_margin_seconds=CERTIFICATES_EXPIRY_MARGIN_SECONDS)
+            if expired_certificates_count:
+                print_api(
+                    f"Removed {expired_certificates_count} expired cached server certificates.", logger=self.logger)
+
+        if self.sni_get_server_certificate_from_server_socket:
+            downloaded_certificates_store = cert_store.get_certificate_store(
+                self.sni_server_certificate_from_server_socket_download_directory)
+            downloaded_certificates_store.preload()
+            downloaded_certificates_store.delete_expired()
+
         if self.install_ca_certificate_to_root_store:
             if not self.ca_certificate_filepath:
                 message = "You set [install_ca_certificate_to_root_store = True],\n" \
@@ -728,6 +759,59 @@ class SocketWrapper:
             else:
                 tls_type, tls_version = None, None
 
+            # Parse the ClientHello before the handshake, the data stays in the socket buffer.
+            # SNI, ALPN and the fingerprints are available for the routing before any handshake work.
+            client_hello_info: client_hello.ClientHello | None = None
+            if is_tls and tls_type == 'Handshake':
+                try:
+                    client_hello_info = client_hello.peek_client_hello(client_socket, timeout=10)
+                except client_hello.ClientHelloParseError as e:
+                    self.logger.info(f"ClientHello wasn't parsed: {e}")
+                except (TimeoutError, ConnectionError) as e:
+                    # Same as the TLS detection, slow or closing client is dropped.
+                    error: str = f"{type(e).__name__}: ClientHello peek failed: {e}. Dropping accepted socket."
+                    self.logger.error(error)
+
+                    self.statistics_writer.write_accept_error(
+                        engine=engine_name,
+                        source_host=source_hostname,
+                        source_ip=source_ip,
+                        error_message=error,
+                        dest_port=str(dest_port),
+                        host=domain_from_engine,
+                        process_name=process_name)
+
+                    client_socket.close()
+                    return
+
+            if client_hello_info:
+                tls_version = client_hello_info.get_max_version_string()
+                # The fingerprints are hashed only if the line is logged.
+                if self.logger.isEnabledFor(logging.INFO):
+                    self.logger.info(
+                        "ClientHello: SNI=%s ALPN=%s max_version=%s JA3=%s JA4=%s",
+                        client_hello_info.server_name, client_hello_info.alpn_protocols, tls_version,
+                        client_hello_info.get_ja3_hash(), client_hello_info.get_ja4())
+
+                # Same as after the handshake, but the engine is known before the SSL context work.
+                if engine_name == '' and client_hello_info.server_name:
+                    engine_name = get_engine_name(client_hello_info.server_name, [self.engine])
+
+            # Connections to the passthrough domains are relayed as is, before any handshake work.
+            if self.passthrough_domain_list:
+                if client_hello_info and client_hello_info.server_name:
+                    destination_domain: str = client_hello_info.server_name
+                else:
+                    destination_domain = domain_from_engine
+
+                if (relay.is_domain_matched(destination_domain, self.passthrough_domain_list) and
+                        not (self.engine and destination_domain in self.engine.domain_target_dict)):
+                    self._relay_connection(
+                        client_socket=client_socket, destination_domain=destination_domain, dest_port=dest_port,
+                        engine_name=engine_name, source_hostname=source_hostname, source_ip=source_ip,
+                        process_name=process_name, tls_type=tls_type, tls_version=tls_version)
+                    return
+
             # If 'is_tls' is True.
             ssl_client_socket = None
             if is_tls:
@@ -840,6 +924,71 @@ class SocketWrapper:
             full_string: str = f"Engine: [{engine_name}] | {exception_string}"
             self.exceptions_logger.write(full_string)
 
+    def _relay_connection(
+            self,
+            client_socket,
+            destination_domain: str,
+            dest_port: int,
+            engine_name: str,
+            source_hostname: str,
+            source_ip: str,
+            process_name: str,
+            tls_type: str,
+            tls_version: str
+    ):
+        """
+        Connect to the service and relay the bytes of the connection in both directions, without interception.
+        Only one statistics row is written for the whole connection.
+        """
+
+        self.logger.info(f"Passthrough relay of [{source_ip}] to [{destination_domain}:{dest_port}]")
+
+        # Same as the connection thread worker, on localhost the domain is resolved by the forwarding DNS service,
+        # since the system DNS points to this server.
+        dns_servers_list: list | None = None
+        if source_ip in socket_base.THIS_DEVICE_IP_LIST:
+            dns_servers_list = self.forwarding_dns_service_ipv4_list___only_for_localhost
+
+        service_client = SocketClient(
+            service_name=destination_domain, service_port=dest_port, tls=False,
+            dns_servers_list=dns_servers_list, logger=self.logger)
+        service_socket, error_message = service_client.service_connection()
+
+        client_to_service_bytes: int = 0
+        service_to_client_bytes: int = 0
+        try:
+            if not error_message:
+                client_to_service_bytes, service_to_client_bytes, relay_error = relay.relay_sockets(
+                    client_socket, service_socket)
+                if relay_error:
+                    error_message = f"{type(relay_error).__name__}: {relay_error}"
+        finally:
+            client_socket.close()
+            if service_socket:
+                service_socket.close()
+
+        self.statistics_writer.write_row(
+            thread_id=str(threads.current_thread_id()),
+            engine=engine_name,
+            source_host=source_hostname,
+            source_ip=source_ip,
+            host=destination_domain,
+            tls_type=tls_type,
+            tls_version=tls_version,
+            protocol='passthrough',
+            protocol2='',
+            protocol3='',
+            dest_port=str(dest_port),
+            path='',
+            status_code='',
+            command='',
+            request_size_bytes=str(client_to_service_bytes),
+            response_size_bytes=str(service_to_client_bytes),
+            process_cmd=process_name,
+            error=error_message or '',
+            action='passthrough'
+        )
+
 
 def before_socket_thread_worker(
         callable_function: Callable[..., Any],